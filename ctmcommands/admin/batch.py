@@ -0,0 +1,138 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import os
+import sys
+import json
+import time
+import threading
+
+import ctmcommands.cmd
+import ctmcommands.dispatch
+from ctmcommands.param import Param
+
+
+class RateLimiter(object):
+    """Spaces calls out so no more than 'rate' start per second, across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_call = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.time()
+            delay = max(self.next_call - now, 0)
+            self.next_call = max(self.next_call, now) + self.interval
+        if delay:
+            time.sleep(delay)
+
+
+class Batch(ctmcommands.cmd.CSKCommand):
+
+    Description = '''Makes many independent API calls concurrently, from a manifest file.
+
+Each line of the manifest is a JSON object: {"command": "...", "args": {...}}.
+The command can be an API method name (run_task) or a ctm command (ctm-run-task or run-task).
+The args are the API arguments.  An optional "verb" of "POST" sends them as a POST.
+
+Results are written as JSON lines in the order the calls complete, each with the
+line number of its manifest entry.'''
+    API = ''
+    Examples = '''
+_To run a list of tasks, 20 at a time but no more than 5 per second_
+
+    ctm-batch -f run_tasks.jsonl -n 20 -r 5
+
+_where run_tasks.jsonl contains lines like_
+
+    {"command": "run_task", "args": {"task": "mytask01", "log_level": "10"}}
+'''
+    Options = [Param(name='manifest', short_name='f', long_name='manifest',
+                     optional=False, ptype='string',
+                     doc='The JSON lines manifest file, or - to read stdin.'),
+               Param(name='concurrency', short_name='n', long_name='concurrency',
+                     optional=True, ptype='integer',
+                     doc='Maximum number of calls in progress at once. (default=10)'),
+               Param(name='rate', short_name='r', long_name='rate',
+                     optional=True, ptype='integer',
+                     doc='Maximum number of calls started per second. (default=unlimited)')
+               ]
+
+    def read_manifest(self):
+        if self.manifest == "-":
+            lines = sys.stdin.readlines()
+        else:
+            fn = os.path.expanduser(self.manifest)
+            with open(fn, 'r') as f_in:
+                lines = f_in.readlines()
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield i + 1, line
+
+    def resolve(self, command):
+        """Returns the API method for a manifest command."""
+        name = ctmcommands.dispatch.find_command(command)
+        if name:
+            cls = ctmcommands.dispatch.load_command(name)[0]
+            if not cls.API:
+                raise Exception("[%s] does not have an API counterpart." % command)
+            return cls.API
+        if command.startswith("ctm-"):
+            raise Exception("Unknown command [%s]." % command)
+        return command
+
+    def run_entry(self, entry):
+        lineno, line = entry
+        result = {"line": lineno}
+        start = time.time()
+        try:
+            item = json.loads(line)
+            result["command"] = item["command"]
+            method = self.resolve(item["command"])
+            # nested values are sent as JSON, not as python reprs
+            args = dict((k, v if not isinstance(v, (dict, list)) else json.dumps(v)) for k, v in item.get("args", {}).items())
+
+            self._limiter.wait()
+            response = self.call_api_result(method, data=args, verb=item.get("verb", "GET").upper())
+            if isinstance(response, ctmcommands.cmd.ApiError):
+                result["error"] = str(response)
+            else:
+                result["result"] = response
+        except Exception as ex:
+            result["error"] = str(ex.args[0]) if ex.args else str(ex)
+        result["ok"] = "error" not in result
+        result["elapsed"] = round(time.time() - start, 3)
+        return result
+
+    def main(self):
+        from multiprocessing.pool import ThreadPool
+
+        # we're gonna be taking all API responses as JSON
+        self.output_format = "json"
+
+        concurrency = self.concurrency if self.concurrency > 0 else 10
+        self.pool_maxsize = max(int(self.pool_maxsize or 10), concurrency)
+        self._limiter = RateLimiter(self.rate)
+
+        failed = 0
+        pool = ThreadPool(concurrency)
+        try:
+            for result in pool.imap_unordered(self.run_entry, self.read_manifest()):
+                if not result["ok"]:
+                    failed += 1
+                print(json.dumps(result))
+                sys.stdout.flush()
+        finally:
+            pool.close()
+            pool.join()
+
+        if failed:
+            self.error_exit()
@@ -52,12 +52,23 @@ _To get the last 300 task modifications_
                      doc='A "to" date in the format of m/d/yyyy.'),
                Param(name='records', short_name='r', long_name='records',
                      optional=True, ptype='string',
-                     doc='Maximum number of records to return, default is 100.')
+                     doc='Maximum number of records to return, default is 100.'),
+               Param(name='output_file', long_name='output_file',
+                     optional=True, ptype='string', request_param=False,
+                     doc='Save the log to the specified file, as it downloads.  JSON is saved as the server sends it, not indented.')
                ]
 
+    Paging = {"limit": "records", "cursor": "to", "order": "desc",
+              "fields": ["EntryDT", "LogDT", "entry_dt", "Date"]}
+
     def main(self):
+        if self.page_size or self.rows_format:
+            self.write_rows(self.iter_rows(['object_id', 'object_type', 'log_type', 'action', 'filter', 'from', 'to', 'records', 'user']),
+                            output_file=self.output_file)
+            return
+
         try:
-            results = self.call_api(self.API, ['object_id', 'object_type', 'log_type', 'action', 'filter', 'from', 'to', 'records', 'user'])
-            print(results)
+            self.download(self.API, ['object_id', 'object_type', 'log_type', 'action', 'filter', 'from', 'to', 'records', 'user'],
+                          output_file=self.output_file, timeout=60)
         except Exception as ex:
             raise ex
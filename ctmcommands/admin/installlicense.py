@@ -18,7 +18,7 @@ class InstallLicense(ctmcommands.cmd.CSKCommand):
     ctm-install-license -i "~/license.lic"
 '''
     Options = [Param(name='inputfile', short_name='i', long_name='inputfile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='Path to a license.dat file.')]
 
     def main(self):
@@ -31,6 +31,12 @@ _List all users with Administrator role_
                      doc=('The maximum number of items to retrieve, or '
                           '0 for unlimited. (Default is unlimited.)'))]
 
+    Paging = {"limit": "limit"}
+
     def main(self):
+        if self.page_size or self.rows_format:
+            self.write_rows(self.iter_rows(['filter', 'limit']))
+            return
+
         results = self.call_api(self.API, ['filter', 'limit'])
         print(results)
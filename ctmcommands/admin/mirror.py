@@ -0,0 +1,451 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import os
+import json
+import time
+from datetime import datetime
+
+import ctmcommands.cmd
+from ctmcommands.param import Param
+from ctmcommands.automate.gettaskinstances import GetTaskInstances
+from ctmcommands.automate.waittaskinstances import status_of, instance_of, terminal_statuses
+from ctmcommands.flow.listpipelineinstances import ListPipelineInstances
+from ctmcommands.flow.watchpipelineinstance import finished_statuses
+
+default_db = "~/.ctm-mirror.db"
+
+# rows are written to the mirror this many at a time
+batch_size = 500
+
+time_formats = ["%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S",
+                "%Y-%m-%d %H:%M", "%Y-%m-%d", "%m/%d/%Y %H:%M:%S", "%m/%d/%Y %I:%M:%S %p", "%m/%d/%Y %H:%M", "%m/%d/%Y"]
+
+def unfinished_sql(status, finished):
+    """The SQL condition of an instance that hadn't finished at the last sync."""
+    return "%s IS NULL OR %s NOT IN (%s)" % (status, status, ", ".join("'%s'" % s for s in finished))
+
+
+# the kinds of instances mirrored: the table, the list command that fetches them and how,
+# the columns (besides id and data) with the properties their values may be in, and the
+# API method and argument to get one instance again while it's unfinished.
+kinds = {
+    "task": {
+        "table": "task_instances",
+        "command": GetTaskInstances,
+        "cursor": "from",
+        "options": {"records": "0"},
+        "id": instance_of,
+        "status": status_of,
+        "unfinished": unfinished_sql("status", terminal_statuses),
+        "columns": [("task", ["Task", "TaskName", "task_name", "task", "Name"]),
+                    ("version", ["Version", "task_version", "version"]),
+                    ("submitted", GetTaskInstances.Paging["fields"]),
+                    ("started", ["StartedDT", "Started", "started_dt"]),
+                    ("completed", ["CompletedDT", "Completed", "completed_dt"])],
+        "time": "submitted",
+        "name": "task",
+        "get": ("get_task_instance", "instance"),
+    },
+    "pipeline": {
+        "table": "pipeline_instances",
+        "command": ListPipelineInstances,
+        "cursor": "since",
+        "options": {"limit": 0},
+        "id": lambda row: "%s" % (row.get("_id") or row.get("id") or row.get("ID") or "") or None,
+        "status": lambda row: row.get("status", row.get("Status")),
+        "unfinished": unfinished_sql("lower(status)", finished_statuses),
+        "columns": [("name", ["name", "Name"]),
+                    ("definition", ["definition", "pipeline", "definition_name"]),
+                    ("project", ["project", "Project"]),
+                    ("group_name", ["group", "Group"]),
+                    ("created", ListPipelineInstances.Paging["fields"]),
+                    ("started", ["started_dt", "started", "_started"]),
+                    ("completed", ["completed_dt", "completed", "ended_dt", "_completed"])],
+        "time": "created",
+        "name": "definition",
+        "get": ("get_pipelineinstance", "pi"),
+    },
+}
+
+# what a query --by may group on, for each kind
+group_columns = {"task": ["status", "task", "version"],
+                 "pipeline": ["status", "definition", "name", "project", "group"]}
+
+schema = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS task_instances (
+    id TEXT PRIMARY KEY, task TEXT, version TEXT, status TEXT,
+    submitted TEXT, started TEXT, completed TEXT, duration REAL, data TEXT);
+CREATE INDEX IF NOT EXISTS task_instances_task ON task_instances (task, submitted);
+CREATE INDEX IF NOT EXISTS task_instances_status ON task_instances (status, submitted);
+CREATE INDEX IF NOT EXISTS task_instances_submitted ON task_instances (submitted);
+CREATE INDEX IF NOT EXISTS task_instances_completed ON task_instances (completed);
+CREATE TABLE IF NOT EXISTS pipeline_instances (
+    id TEXT PRIMARY KEY, name TEXT, definition TEXT, project TEXT, group_name TEXT, status TEXT,
+    created TEXT, started TEXT, completed TEXT, duration REAL, data TEXT);
+CREATE INDEX IF NOT EXISTS pipeline_instances_definition ON pipeline_instances (definition, created);
+CREATE INDEX IF NOT EXISTS pipeline_instances_project ON pipeline_instances (project, created);
+CREATE INDEX IF NOT EXISTS pipeline_instances_group ON pipeline_instances (group_name, created);
+CREATE INDEX IF NOT EXISTS pipeline_instances_status ON pipeline_instances (status, created);
+CREATE INDEX IF NOT EXISTS pipeline_instances_created ON pipeline_instances (created);
+CREATE INDEX IF NOT EXISTS pipeline_instances_completed ON pipeline_instances (completed);
+"""
+
+
+def normalize_time(value):
+    """
+    A timestamp as "YYYY-MM-DD HH:MM:SS", which sorts, and SQLite's date functions
+    understand.  None if the value isn't a timestamp we know.  Any time zone is dropped.
+    """
+    if isinstance(value, dict):
+        # a Mongo extended JSON {"$date": ...}
+        value = value.get("$date")
+    if value is None or value == "" or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        # seconds, or milliseconds, since the epoch
+        seconds = value / 1000.0 if value > 100000000000 else value
+        return datetime.utcfromtimestamp(seconds).strftime("%Y-%m-%d %H:%M:%S")
+    s = ("%s" % value).strip()
+    if s.endswith("Z"):
+        s = s[:-1]
+    elif len(s) > 19 and s[-6] in "+-" and s[-3] == ":":
+        s = s[:-6]
+    for fmt in time_formats:
+        try:
+            return datetime.strptime(s, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            pass
+    return None
+
+
+def seconds_between(start, end):
+    if not start or not end:
+        return None
+    fmt = "%Y-%m-%d %H:%M:%S"
+    delta = datetime.strptime(end, fmt) - datetime.strptime(start, fmt)
+    return delta.days * 86400 + delta.seconds
+
+
+def first_of(row, keys):
+    for k in keys:
+        if row.get(k) not in (None, ""):
+            return row[k]
+    return None
+
+
+class Mirror(ctmcommands.cmd.CSKCommand):
+
+    Description = '''Keeps a local SQLite copy of the task and pipeline instance history, and queries it.
+
+"sync" brings the mirror up to date.  The first sync gets every instance (or those since --since),
+after that only the instances since the newest one already mirrored are asked for, using the
+"from" filter of get_task_instances and the "since" filter of list_pipelineinstances.
+Instances that weren't finished at the last sync are fetched again, to get their final status
+and times.
+
+"query" answers from the mirror alone, without calling the API: the instances matching the
+filters, a summary of their counts and durations grouped --by a column, or any SQL (read only)
+with --sql.  The tables are task_instances and pipeline_instances.  A duration is the seconds
+from the start (or submission) of an instance to its completion.
+
+A mirror holds the instances of one server, use --db for another.'''
+    API = ''
+    Examples = '''
+_To bring the mirror up to date, starting with the instances of this year_
+
+    ctm-mirror sync --since 2019-01-01
+
+_To list the failed task instances of the last week_
+
+    ctm-mirror query -s Error --since 2019-06-01
+
+_To see how long each task takes, on average_
+
+    ctm-mirror query --by task
+
+_To see how each pipeline definition of a project is doing_
+
+    ctm-mirror query -k pipeline -r myproject --by definition
+
+_Anything else, in SQL_
+
+    ctm-mirror query --sql "select task, max(duration) from task_instances group by task"
+'''
+    Options = [Param(name='db', long_name='db',
+                     optional=True, ptype='string',
+                     doc='The mirror database file.  (default=~/.ctm-mirror.db)'),
+               Param(name='kind', short_name='k', long_name='kind',
+                     optional=True, ptype='string', choices=['task', 'pipeline'],
+                     doc='Task or pipeline instances.  sync does both unless this is given, query defaults to task.'),
+               Param(name='since', long_name='since',
+                     optional=True, ptype='string',
+                     doc='sync: where the first sync starts, query: only instances submitted (created) at or after this time.'),
+               Param(name='until', long_name='until',
+                     optional=True, ptype='string',
+                     doc='query: only instances submitted (created) before this time.'),
+               Param(name='task', short_name='t', long_name='task',
+                     optional=True, ptype='string',
+                     doc='query: only the instances of this task (or pipeline definition).'),
+               Param(name='status', short_name='s', long_name='status',
+                     optional=True, ptype='string',
+                     doc='query: a comma separated list of statuses.'),
+               Param(name='project', short_name='r', long_name='project',
+                     optional=True, ptype='string',
+                     doc='query: only pipeline instances of this project.'),
+               Param(name='group', short_name='g', long_name='group',
+                     optional=True, ptype='string',
+                     doc='query: only pipeline instances of this group.'),
+               Param(name='by', short_name='b', long_name='by',
+                     optional=True, ptype='string',
+                     doc='query: summarize the instances grouped by this column (status, task, version, definition, name, project or group).'),
+               Param(name='sql', long_name='sql',
+                     optional=True, ptype='string',
+                     doc='query: run this (read only) SQL on the mirror.'),
+               Param(name='limit', short_name='l', long_name='limit',
+                     optional=True, ptype='integer',
+                     doc='query: the most instances to list, newest first.  (default=100, 0 for all)'),
+               Param(name='page_size', long_name='page_size',
+                     optional=True, ptype='integer',
+                     doc='sync: instances asked for in each request.  (default=500)'),
+               Param(name='concurrency', short_name='c', long_name='concurrency',
+                     optional=True, ptype='integer',
+                     doc='sync: unfinished instances fetched again at once.  (default=10)'),
+               Param(name='rows_format', long_name='rows_format',
+                     optional=True, ptype='string', choices=['text', 'jsonl', 'csv'],
+                     doc='How query rows are written.  (default=text, or jsonl if the format is json)')
+               ]
+    Args = [Param(name='action', optional=False,
+                  doc='sync or query.')]
+
+    def requires_server(self):
+        # a query is answered from the mirror alone
+        return getattr(self, "action", None) != "query"
+
+    def open_db(self):
+        try:
+            import sqlite3
+        except ImportError:
+            print("This Python was built without sqlite3, which ctm-mirror needs.")
+            self.error_exit()
+        fn = os.path.expanduser(self.db or default_db)
+        conn = sqlite3.connect(fn)
+        conn.row_factory = sqlite3.Row
+        # readers (a query) aren't blocked by a sync
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(schema)
+        for k in kinds.values():
+            # only the few unfinished instances are in it, a sync finds them without a table scan
+            conn.execute("CREATE INDEX IF NOT EXISTS %s_unfinished ON %s (id) WHERE %s" % (k["table"], k["table"], k["unfinished"]))
+        return conn
+
+    def get_meta(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def row_values(self, kind, row):
+        """The values of a mirror row for an instance, None if it has no id."""
+        k = kinds[kind]
+        instance_id = k["id"](row)
+        if not instance_id:
+            return None
+        values = {"id": instance_id, "status": k["status"](row)}
+        for column, keys in k["columns"]:
+            value = first_of(row, keys)
+            if column in ["submitted", "created", "started", "completed"]:
+                value = normalize_time(value)
+            elif isinstance(value, dict):
+                # a reference, {"name": ...}
+                value = value.get("name") or value.get("Name") or json.dumps(value, sort_keys=True)
+            values[column] = None if value is None else "%s" % value
+        values["duration"] = seconds_between(values.get("started") or values.get(k["time"]), values.get("completed"))
+        values["data"] = json.dumps(row, sort_keys=True)
+        return values
+
+    def write(self, conn, kind, values):
+        columns = ["id", "status"] + [c for c, _ in kinds[kind]["columns"]] + ["duration", "data"]
+        sql = "INSERT OR REPLACE INTO %s (%s) VALUES (%s)" % (kinds[kind]["table"], ", ".join(columns), ", ".join("?" * len(columns)))
+        conn.executemany(sql, [[v.get(c) for c in columns] for v in values])
+        conn.commit()
+
+    def list_command(self, cls, options):
+        """A list command to page through the instances with, using this command's connection."""
+        cmd = cls(options=dict(options, url=self.url, token=self.token))
+        cmd.session = self.session
+        cmd.debug = self.debug
+        cmd.trace = self.trace
+        return cmd
+
+    def get_instance(self, item):
+        kind, instance_id = item
+        method, arg = kinds[kind]["get"]
+        try:
+            result = self.call_api_result(method, data={arg: instance_id})
+        except Exception as ex:
+            result = ex
+        if isinstance(result, list):
+            result = result[0] if result else None
+        return instance_id, result
+
+    def sync_kind(self, conn, kind):
+        k = kinds[kind]
+        start = time.time()
+        cursor_key = "%s.cursor" % k["table"]
+        cursor = self.get_meta(conn, cursor_key) or self.since
+
+        options = dict(k["options"], page_size=self.page_size or 500)
+        if cursor:
+            options[k["cursor"]] = cursor
+        cmd = self.list_command(k["command"], options)
+        params = [p.name for p in k["command"].Options]
+
+        # the newest instance time, as the server gave it, is where the next sync starts
+        newest = None
+        seen = set()
+        batch = []
+        for row in cmd.iter_rows(params):
+            if not isinstance(row, dict):
+                continue
+            values = self.row_values(kind, row)
+            if not values:
+                if self.debug:
+                    print("Skipping an instance without an id: %s" % json.dumps(row))
+                continue
+            seen.add(values["id"])
+            when = values.get(k["time"])
+            if when and (newest is None or when > newest[0]):
+                newest = (when, first_of(row, dict(k["columns"])[k["time"]]))
+            batch.append(values)
+            if len(batch) >= batch_size:
+                self.write(conn, kind, batch)
+                batch = []
+        self.write(conn, kind, batch)
+
+        # the ones that were still going at the last sync may have finished since
+        unfinished = [(kind, r["id"]) for r in conn.execute("SELECT id FROM %s WHERE %s" % (k["table"], k["unfinished"]))
+                      if r["id"] not in seen]
+        refreshed = 0
+        if unfinished:
+            from multiprocessing.pool import ThreadPool
+            concurrency = self.concurrency if self.concurrency and self.concurrency > 0 else 10
+            self.pool_maxsize = max(int(self.pool_maxsize or 10), concurrency)
+            pool = ThreadPool(concurrency)
+            try:
+                batch = []
+                for instance_id, result in pool.imap_unordered(self.get_instance, unfinished):
+                    if isinstance(result, dict):
+                        values = self.row_values(kind, result)
+                        if values:
+                            batch.append(values)
+                    elif self.debug:
+                        print("Unable to get %s instance [%s]. %s" % (kind, instance_id, result))
+                self.write(conn, kind, batch)
+                refreshed = len(batch)
+            finally:
+                pool.close()
+                pool.join()
+
+        if newest and newest[1] is not None:
+            self.set_meta(conn, cursor_key, "%s" % newest[1])
+        self.set_meta(conn, "%s.synced" % k["table"], datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"))
+        conn.commit()
+        total = conn.execute("SELECT count(*) FROM %s" % k["table"]).fetchone()[0]
+        print("%s instances: %d fetched, %d unfinished refreshed, %d in the mirror (%.1fs)." % (kind.capitalize(), len(seen), refreshed, total, time.time() - start))
+
+    def sync(self, conn):
+        url = self.get_meta(conn, "url")
+        if url and url != self.url:
+            print("The mirror [%s] is of %s, use --db for a mirror of %s." % (self.db or default_db, url, self.url))
+            self.error_exit()
+        if not url:
+            self.set_meta(conn, "url", self.url)
+            conn.commit()
+        for kind in [self.kind] if self.kind else ["task", "pipeline"]:
+            self.sync_kind(conn, kind)
+
+    def query_sql(self, kind):
+        """The SQL and parameters of a query, from the filters."""
+        k = kinds[kind]
+        where = []
+        params = []
+        if self.task:
+            where.append("%s = ?" % k["name"])
+            params.append(self.task)
+        if self.status:
+            statuses = [s.strip() for s in self.status.split(",") if s.strip()]
+            where.append("status IN (%s)" % ", ".join("?" * len(statuses)))
+            params.extend(statuses)
+        if kind == "pipeline":
+            if self.project:
+                where.append("project = ?")
+                params.append(self.project)
+            if self.group:
+                where.append("group_name = ?")
+                params.append(self.group)
+        for value, op in [(self.since, ">="), (self.until, "<")]:
+            if value:
+                t = normalize_time(value)
+                if not t:
+                    print("[%s] isn't a time this understands, use YYYY-MM-DD [HH:MM:SS]." % value)
+                    self.error_exit()
+                where.append("%s %s ?" % (k["time"], op))
+                params.append(t)
+        where = (" WHERE " + " AND ".join(where)) if where else ""
+
+        if self.by:
+            by = "group_name" if self.by == "group" else self.by
+            if self.by not in group_columns[kind]:
+                print("--by must be one of: %s" % "|".join(group_columns[kind]))
+                self.error_exit()
+            sql = ("SELECT %s AS %s, count(*) AS count, sum(duration IS NOT NULL) AS timed, round(avg(duration), 1) AS avg_duration, "
+                   "min(duration) AS min_duration, max(duration) AS max_duration, min(%s) AS first, max(%s) AS last "
+                   "FROM %s%s GROUP BY %s ORDER BY count(*) DESC") % (by, '"%s"' % self.by, k["time"], k["time"], k["table"], where, by)
+        else:
+            columns = ["id"] + [c for c, _ in k["columns"]] + ["status", "duration"]
+            sql = "SELECT %s FROM %s%s ORDER BY %s DESC" % (", ".join("%s AS \"%s\"" % (c, "group" if c == "group_name" else c) for c in columns), k["table"], where, k["time"])
+            limit = 100 if self.limit is None else self.limit
+            if limit:
+                sql += " LIMIT %d" % limit
+        return sql, params
+
+    def query(self, conn):
+        import sqlite3
+        if not conn.execute("SELECT 1 FROM meta WHERE key = 'url'").fetchone():
+            print("There's nothing in the mirror [%s], run ctm-mirror sync first." % (self.db or default_db))
+            self.error_exit()
+        if self.sql:
+            sql, params = self.sql, []
+        else:
+            sql, params = self.query_sql(self.kind or "task")
+        if self.debug:
+            print("%s %s" % (sql, params))
+        conn.execute("PRAGMA query_only = 1")
+        try:
+            cursor = conn.execute(sql, params)
+        except sqlite3.Error as ex:
+            print("The query failed. %s" % ex)
+            self.error_exit()
+        self.write_rows(dict(zip(r.keys(), tuple(r))) for r in cursor)
+
+    def main(self):
+        if self.action not in ["sync", "query"]:
+            print("The action must be sync or query.")
+            self.error_exit()
+        if self.action == "query" and not os.path.exists(os.path.expanduser(self.db or default_db)):
+            print("There's no mirror [%s], run ctm-mirror sync first." % (self.db or default_db))
+            self.error_exit()
+        conn = self.open_db()
+        try:
+            if self.action == "sync":
+                self.sync(conn)
+            else:
+                self.query(conn)
+        finally:
+            conn.close()
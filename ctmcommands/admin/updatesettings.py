@@ -34,10 +34,13 @@ _To update all settings for a particular module using a json formatted settings
                      optional=True, ptype='string',
                      doc='JSON Settings object.'),
                Param(name='settingsfile', short_name='f', long_name='settingsfile',
-                     optional=True, ptype='string',
+                     optional=True, ptype='string', request_param=False,
                      doc='A JSON file representing a module Settings object.')
                ]
 
+    # a settings document can be too long for a URL
+    PostLarge = True
+
     def main(self):
         go = False
         if self.force:
@@ -49,12 +52,13 @@ _To update all settings for a particular module using a json formatted settings
                     go = True
 
         if go:
+            files = None
             if self.settingsfile:
                 import os
                 fn = os.path.expanduser(self.settingsfile)
-                with open(fn, 'r') as f_in:
-                    if not f_in:
-                        print("Unable to open file [%s]." % fn)
-                    self.settings = f_in.read()
-            results = self.call_api(self.API, ['module', 'settings'])
+                if not os.path.isfile(fn):
+                    print("Unable to open file [%s]." % fn)
+                    self.error_exit()
+                files = {'settings': fn}
+            results = self.call_api(self.API, ['module', 'settings'], files=files)
             print(results)
@@ -0,0 +1,87 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+A single file alternative to an export directory: a tar (compressed if the name ends
+in .gz or .tgz) of the same directory tree, plus a manifest.json listing every file
+with its size and sha256.  The import commands read it directly, without unpacking it.
+"""
+
+import io
+import json
+import time
+import hashlib
+import tarfile
+import threading
+
+ManifestName = "manifest.json"
+
+
+def is_compressed(path):
+    return path.endswith(".gz") or path.endswith(".tgz")
+
+
+class ArchiveWriter(object):
+    """Adds files to a new archive, safe to use from several threads."""
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+        self.files = {}
+        self._lock = threading.Lock()
+        self._tar = tarfile.open(path, "w:gz" if is_compressed(path) else "w")
+
+    def add(self, relpath, data):
+        if not isinstance(data, bytes):
+            data = data.encode("utf-8")
+        info = tarfile.TarInfo(relpath)
+        info.size = len(data)
+        info.mtime = time.time()
+        with self._lock:
+            self._tar.addfile(info, io.BytesIO(data))
+            self.files[relpath] = {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+
+    def close(self):
+        manifest = json.dumps({"kind": self.kind, "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                               "files": self.files}, indent=1, sort_keys=True)
+        self.add(ManifestName, manifest)
+        self._tar.close()
+
+
+class ArchiveReader(object):
+    """Reads the files of an archive, checking each against the manifest."""
+
+    def __init__(self, path, kind=None):
+        self.path = path
+        self._tar = tarfile.open(path, "r:*")
+        self._members = dict((m.name, m) for m in self._tar.getmembers() if m.isfile())
+        self.manifest = {}
+        if ManifestName in self._members:
+            self.manifest = json.loads(self.read(ManifestName).decode("utf-8"))
+        if kind and self.manifest.get("kind") not in (None, kind):
+            raise Exception("[%s] is a %s archive, not a %s archive." % (path, self.manifest.get("kind"), kind))
+
+    def names(self, prefix=""):
+        """The files in the archive under a directory prefix, sorted."""
+        return sorted(n for n in self._members if n.startswith(prefix) and n != ManifestName)
+
+    def listdir(self, relpath=""):
+        """The immediate children of a directory in the archive, like os.listdir."""
+        prefix = relpath.rstrip("/") + "/" if relpath else ""
+        return sorted(set(n[len(prefix):].split("/")[0] for n in self.names(prefix)))
+
+    def isdir(self, relpath):
+        return bool(self.names(relpath.rstrip("/") + "/"))
+
+    def read(self, relpath):
+        data = self._tar.extractfile(self._members[relpath]).read()
+        expected = self.manifest.get("files", {}).get(relpath)
+        if expected and hashlib.sha256(data).hexdigest() != expected.get("sha256"):
+            raise Exception("[%s] in [%s] is corrupt." % (relpath, self.path))
+        return data
+
+    def close(self):
+        self._tar.close()
@@ -0,0 +1,123 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+The client for asyncio programs, many calls in flight at once on one event loop
+rather than a thread each.  Needs Python 3.5 or later and aiohttp, the "async" extra
+(pip install continuumclient[async]).
+
+    import asyncio
+    from ctmcommands.asyncclient import AsyncContinuumClient
+
+    async def statuses(ids):
+        async with AsyncContinuumClient("https://continuum.example.com", "mytoken", limit=100) as client:
+            return await asyncio.gather(*[client.call("get_task_instance_status", instance=i) for i in ids])
+
+The methods are those of ContinuumClient (client.get_pipelineinstance(pi=...)), each
+returning a coroutine, and call() makes any API call by name.  call_api() is CSKCommand.call_api for asyncio, the
+result as the command line would print it (JSON or XML unwrapped from the response).
+
+The URL, headers and unwrapping of the response are those of CSKCommand.  The
+requests are made by aiohttp, on at most limit connections (limit_per_host to
+one server, if it's set), a call waits for a connection when they're all in use.
+The timeout is for connecting and for each read, not the wait for a connection.
+
+Calls aren't cached, compressed, retried or traced.  run() is that of ContinuumClient,
+it blocks the loop while the command runs.
+"""
+
+import asyncio
+from urllib.parse import urlencode
+
+try:
+    import aiohttp
+except ImportError:
+    raise ImportError("The asyncio client needs aiohttp, install it with: pip install continuumclient[async]")
+
+from ctmcommands.client import ContinuumClient
+from ctmcommands.cmd import ApiError, http_error_message
+
+
+class AsyncContinuumClient(ContinuumClient):
+
+    def __init__(self, url=None, token=None, limit=100, limit_per_host=0, timeout=10, raise_errors=True, debug=False):
+        """
+        url and token default to CONTINUUM_URL and CONTINUUM_TOKEN.  limit is the
+        most connections open at once, 0 for no limit.
+        With raise_errors=False API errors are returned as ApiError objects, not raised.
+        """
+        ContinuumClient.__init__(self, url, token, timeout=timeout, raise_errors=raise_errors, debug=debug)
+        # the tracer is per thread, the calls here all share one
+        self._base.trace = None
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self._session = None
+
+    def get_session(self):
+        """The aiohttp session, created in the running loop on the first call."""
+        if self._session is None or self._session.closed:
+            # ssl=False, the same as verify=False of the requests session
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host, ssl=False)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, trust_env=True)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def send_request(self, method, data={}, verb="GET", content_type=None, output_format="json"):
+        """Makes the HTTP request for an API call, returning the body of the response."""
+        cmd = self._base
+        url, args = cmd.build_url(method, [], data, verb, output_format)
+        if cmd.debug:
+            print("Trying an HTTP %s to %s" % (verb, url))
+        hdrs = cmd.request_headers(output_format, content_type)
+
+        body = None
+        if verb != "GET":
+            body = args
+            if isinstance(body, dict):
+                body = urlencode(body, doseq=True)
+                hdrs.setdefault("Content-Type", "application/x-www-form-urlencoded")
+
+        try:
+            async with self.get_session().request(verb, url, headers=hdrs, data=body) as response:
+                content = await response.read()
+                status = response.status
+        except asyncio.TimeoutError as e:
+            raise Exception("Timeout attempting to access [%s]" % url, e)
+        except aiohttp.ClientConnectionError as e:
+            raise Exception("API connection error. Check http or https, server address and port.", e)
+        except aiohttp.ClientError as e:
+            raise Exception("API error.", e)
+
+        if cmd.debug:
+            print("<Response [%d]>" % status)
+        m = http_error_message(status)
+        if m:
+            raise Exception(m, status)
+        return content
+
+    async def call_api(self, method, data={}, verb="GET", content_type=None, output_format="json"):
+        """The result of an API call as the command line would print it, output_format is json, xml or text."""
+        content = await self.send_request(method, data, verb, content_type, output_format)
+        return self._base.format_content(content, output_format)
+
+    async def call(self, method, verb="GET", **args):
+        """Calls an API method by name, returning the parsed result."""
+        data = dict((k, v) for k, v in args.items() if v is not None)
+        result = self._base.parse_content(await self.send_request(method, data, verb))
+        if self.raise_errors and isinstance(result, ApiError):
+            raise result
+        return result
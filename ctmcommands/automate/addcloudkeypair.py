@@ -28,7 +28,7 @@ _To add a private key with a passphrase to the cloud endpoint_
                      optional=False, ptype='string',
                      doc='A name for the Key Pair.'),
                Param(name='keyfile', short_name='k', long_name='keyfile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='The path and filename for the private key pem file.'),
                Param(name='passphrase', short_name='p', long_name='passphrase',
                      optional=True, ptype='string',
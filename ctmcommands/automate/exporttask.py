@@ -28,25 +28,12 @@ _To export the of a task, include all subtask references and put results in a fi
                      optional=True, ptype='boolean',
                      doc='If provided, will include all referenced subtasks.'),
                Param(name='output_file', short_name='f', long_name='output_file',
-                     optional=True, ptype='string',
-                     doc='Save the exported Task(s) to the specified file.')
+                     optional=True, ptype='string', request_param=False,
+                     doc='Save the exported Task(s) to the specified file, as it downloads.  The JSON is saved as the server sends it, not indented.')
                ]
 
     def main(self):
         try:
-            results = self.call_api(self.API, ['task', 'include_refs'])
-
-            if self.output_file:
-                import os
-                fn = os.path.expanduser(self.output_file)
-                with open(fn, 'w') as f_out:
-                    if not f_out:
-                        print("Unable to open file [%s]." % fn)
-                    f_out.write(results)
-            else:
-                print(results)
-        except ValueError:
-            # the results could not be parsed as JSON, just return them
-            print(results)
+            self.download(self.API, ['task', 'include_refs'], output_file=self.output_file, timeout=60)
         except Exception as ex:
             raise ex
@@ -0,0 +1,167 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import os
+import sys
+
+import ctmcommands.cmd
+from ctmcommands.param import Param
+from ctmcommands.flow.exportcatalog import AsJSON, remove_illegal_chars_in_filename
+
+
+def task_field(task, names):
+    if isinstance(task, dict):
+        for k in names:
+            if task.get(k) not in (None, ""):
+                return str(task[k])
+    return None
+
+
+def task_id(task):
+    return task_field(task, ["ID", "id", "_id", "TaskID", "task_id"])
+
+
+def task_name(task):
+    return task_field(task, ["Name", "name", "TaskName", "task_name"])
+
+
+def task_version(task):
+    return task_field(task, ["Version", "version"])
+
+
+def task_path(task):
+    """The relative path of a task in the export, Name/Version.json."""
+    label = task_name(task) or task_id(task) or "task"
+    name, unique_str = remove_illegal_chars_in_filename(label)
+    if unique_str:
+        name += "_" + unique_str
+    version, unique_str = remove_illegal_chars_in_filename(task_version(task) or "default")
+    return "%s/%s.json" % (name, version or unique_str)
+
+
+class ExportTasks(ctmcommands.cmd.CSKCommand):
+
+    Description = '''Exports many Tasks at once, into a directory or a single compressed archive.
+
+The Tasks to export are found with list_tasks (optionally filtered), and exported several at a time.
+With --include_refs, referenced subtasks are included, but every Task is only written once,
+no matter how many others reference it, and is not exported again by itself.
+
+Each Task is written to Name/Version.json, a backup file that ctm-import-task can import.'''
+    API = 'export_task'
+    Examples = '''
+_To back up every task into a directory_
+
+    ctm-export-tasks -d ~/task_backup
+
+_To back up the tasks with "deploy" in the name, with their subtasks, into an archive_
+
+    ctm-export-tasks -f "deploy" -r -a ~/deploy_tasks.tar.gz
+'''
+    Options = [Param(name='filter', short_name='f', long_name='filter',
+                     optional=True, ptype='string',
+                     doc='Only export Tasks matching this filter (as for ctm-list-tasks).'),
+               Param(name='include_refs', short_name='r', long_name='include_refs',
+                     optional=True, ptype='boolean',
+                     doc='If provided, will include all referenced subtasks.'),
+               Param(name='output_dir', short_name='d', long_name='output_dir',
+                     optional=True, ptype='string', request_param=False,
+                     doc='The directory to write the Tasks to.'),
+               Param(name='archive', short_name='a', long_name='archive',
+                     optional=True, ptype='string', request_param=False,
+                     doc='Write the Tasks to this archive file instead of a directory.  Compressed if the name ends in .gz or .tgz.'),
+               Param(name='workers', short_name='w', long_name='workers',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Number of Tasks to export at once. (default=4)')
+               ]
+
+    def call(self, method, args):
+        result = self.call_api_result(method, data=args)
+        if isinstance(result, ctmcommands.cmd.ApiError):
+            raise result
+        return result
+
+    def export(self, task):
+        """Exports one task (and its references), returns (task, [exported tasks], error)."""
+        tid = task_id(task)
+        if tid in self._written:
+            # already exported as a subtask of another
+            return task, [], None
+        args = {"task": tid}
+        if self.include_refs:
+            args["include_refs"] = "true"
+        try:
+            result = self.call(self.API, args)
+        except Exception as ex:
+            return task, [], str(ex.args[0]) if ex.args else str(ex)
+        if not isinstance(result, list):
+            result = [result]
+        return task, result, None
+
+    def open_output(self):
+        if self.archive:
+            from ctmcommands.archive import ArchiveWriter
+            self._archive = ArchiveWriter(os.path.expanduser(self.archive), "tasks")
+        else:
+            self._archive = None
+            self._root = os.path.expanduser(self.output_dir)
+
+    def write(self, path, content):
+        data = content.encode("utf-8")
+        if self._archive:
+            self._archive.add(path, data)
+        else:
+            fn = os.path.join(self._root, *path.split("/"))
+            if not os.path.isdir(os.path.dirname(fn)):
+                os.makedirs(os.path.dirname(fn))
+            with open(fn, 'wb') as f_out:
+                f_out.write(data)
+
+    def main(self):
+        from multiprocessing.pool import ThreadPool
+
+        if not self.output_dir and not self.archive:
+            print("Either --output_dir or --archive is required.")
+            self.error_exit()
+
+        # we're gonna be taking all API responses as JSON
+        self.output_format = "json"
+
+        workers = self.workers if self.workers > 0 else 4
+        self.pool_maxsize = max(int(self.pool_maxsize or 10), workers)
+
+        tasks = self.call("list_tasks", {"filter": self.filter} if self.filter else {})
+        tasks = [t for t in tasks if task_id(t)] if isinstance(tasks, list) else []
+        print("Exporting %d Tasks..." % len(tasks))
+
+        # ids of every task written so far, only changed in this thread
+        self._written = set()
+        failed = 0
+        self.open_output()
+        pool = ThreadPool(workers)
+        try:
+            for task, exported, error in pool.imap_unordered(self.export, tasks):
+                if error:
+                    failed += 1
+                    print("Unable to export [%s]. %s" % (task_name(task) or task_id(task), error))
+                    continue
+                for t in exported:
+                    tid = task_id(t) or task_path(t)
+                    if tid in self._written:
+                        continue
+                    self._written.add(tid)
+                    self.write(task_path(t), AsJSON([t]))
+                sys.stdout.flush()
+        finally:
+            pool.close()
+            pool.join()
+            if self._archive:
+                self._archive.close()
+
+        print("Exported %d Tasks to [%s]." % (len(self._written), self.archive or self.output_dir))
+        if failed:
+            print("%d Tasks could not be exported." % failed)
+            self.error_exit()
@@ -50,7 +50,14 @@ _To get the last 10 task instance for any tasks with a particular string in the
                      doc='Maximum number of records to return.')
                ]
 
+    Paging = {"limit": "records", "cursor": "to", "order": "desc",
+              "fields": ["SubmittedDT", "Submitted", "submitted_dt", "CreatedDT"]}
+
     def main(self):
+        if self.page_size or self.rows_format:
+            self.write_rows(self.iter_rows(['filter', 'status', 'from', 'to', 'records']))
+            return
+
         try:
             results = self.call_api(self.API, ['filter', 'status', 'from', 'to', 'records'])
             print(results)
@@ -4,24 +4,167 @@
 # http://www.versionone.com
 #########################################################################
 
+import sys
+import time
+
 import ctmcommands.cmd
 from ctmcommands.param import Param
+from ctmcommands.automate.waittaskinstances import status_of, terminal_statuses
+
+
+class LogFollower(object):
+    """How much of one Task Instance log has been seen, and any incomplete last line."""
+
+    def __init__(self, instance):
+        self.instance = instance
+        self.position = 0
+        self.partial = b""
+        self.status = None
 
 
 class GetTaskLog(ctmcommands.cmd.CSKCommand):
 
-    Description = 'Retrieve the task instance log from the database'
+    Description = '''Retrieve the task instance log from the database
+
+With --follow, new log lines are printed as they're written, until the instance is finished.
+Only the part of the log not yet seen is asked for (with an HTTP Range), and several instances
+can be followed at once, each line prefixed with its instance.'''
     API = 'get_task_log'
     Examples = '''
     ctm-get-task-log -i 43667
+
+_To save a large log to a file_
+
+    ctm-get-task-log -i 43667 -f ~/43667.log
+
+_To follow the logs of two running instances until they finish_
+
+    ctm-get-task-log -i "43667,43668" --follow
 '''
     Options = [Param(name='instance', short_name='i', long_name='instance',
                      optional=False, ptype='string',
-                     doc='The Task Instance number.')]
+                     doc='The Task Instance number.  With --follow, a comma separated list of them.'),
+               Param(name='output_file', short_name='f', long_name='output_file',
+                     optional=True, ptype='string', request_param=False,
+                     doc='Save the log to the specified file.'),
+               Param(name='follow', long_name='follow',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='Keep printing new log lines until the instance is finished.'),
+               Param(name='interval', long_name='interval',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='With --follow, the maximum number of seconds between checks for new lines. (default=10)')]
 
     def main(self):
+        if self.follow:
+            self.follow_logs()
+            return
+
         try:
-            results = self.call_api(self.API, ['instance'])
-            print(results)
+            self.download(self.API, ['instance'], output_file=self.output_file, timeout=60)
         except Exception as ex:
             raise ex
+
+    def get_status(self, instance):
+        # the status is always taken as JSON
+        result = self.call_api_result("get_task_instance_status", data={"instance": instance})
+        if isinstance(result, ctmcommands.cmd.ApiError):
+            raise result
+        return status_of(result)
+
+    def read_new(self, follower):
+        """Returns the bytes of the log written since the last read."""
+        headers = {"Range": "bytes=%d-" % follower.position} if follower.position else None
+        # a 416 is the Range starting at the end of the log, there's nothing new
+        response = self.send_request(self.API, data={"instance": follower.instance}, timeout=60,
+                                     stream=True, headers=headers, allow_status=[416])[0]
+        try:
+            if response.status_code == 416:
+                self.end_trace(response_bytes=0)
+                return b""
+            if response.status_code not in (200, 206):
+                # an error document, not more of the log
+                m = "HTTP %d getting the log of [%s]." % (response.status_code, follower.instance)
+                self.end_trace(error=m)
+                raise ctmcommands.cmd.ApiError("API error", m)
+            skip = self.already_seen(response, follower.position)
+            new = []
+            for chunk in response.iter_content(chunk_size=65536):
+                if skip:
+                    n = min(skip, len(chunk))
+                    chunk = chunk[n:]
+                    skip -= n
+                new.append(chunk)
+        finally:
+            response.close()
+        new = b"".join(new)
+        self.end_trace(response_bytes=len(new))
+        follower.position += len(new)
+        return new
+
+    def already_seen(self, response, position):
+        """How many bytes at the start of a log response were read before."""
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code != 206 and not content_range:
+            # the server ignored the Range and sent the whole log
+            return position
+        # bytes START-END/TOTAL
+        try:
+            start = int(content_range.split()[1].split("-")[0])
+        except (IndexError, ValueError):
+            start = position
+        return max(position - start, 0)
+
+    def write_lines(self, follower, data, prefix, final=False):
+        """Writes the complete lines, keeping an incomplete last line for the next read."""
+        out = getattr(sys.stdout, "buffer", sys.stdout)
+        lines = (follower.partial + data).split(b"\n")
+        follower.partial = lines.pop()
+        if final and follower.partial:
+            lines.append(follower.partial)
+            follower.partial = b""
+        for line in lines:
+            out.write(prefix + line + b"\n")
+        out.flush()
+
+    def follow_logs(self):
+        # logs are followed as plain text, positions wouldn't mean anything in a JSON document
+        self.output_format = "text"
+
+        instances = [i.strip() for i in self.instance.split(",") if i.strip()]
+        followers = [LogFollower(i) for i in instances]
+        several = len(followers) > 1
+        max_interval = self.interval or 10
+        interval = 1
+        done = []
+
+        while followers:
+            got_any = False
+            for follower in list(followers):
+                try:
+                    # the status is checked first, so the lines read after it's finished are the last ones
+                    follower.status = self.get_status(follower.instance)
+                    finished = follower.status in terminal_statuses
+                    data = self.read_new(follower)
+                except ctmcommands.cmd.ApiError as ex:
+                    # an instance that doesn't exist won't ever finish, it's dropped (and the exit code is 1)
+                    sys.stderr.write("[%s] Unable to follow the log: %s\n" % (follower.instance, ex))
+                    follower.status = None
+                    followers.remove(follower)
+                    done.append(follower)
+                    continue
+                got_any = got_any or bool(data)
+                prefix = ("[%s] " % follower.instance).encode("utf-8") if several else b""
+                self.write_lines(follower, data, prefix, final=finished)
+                if finished:
+                    if several:
+                        print("[%s] %s" % (follower.instance, follower.status))
+                        sys.stdout.flush()
+                    followers.remove(follower)
+                    done.append(follower)
+
+            if followers:
+                interval = 1 if got_any else min(interval * 2, max_interval)
+                time.sleep(interval)
+
+        if [f for f in done if f.status != "Completed"]:
+            sys.exit(1)
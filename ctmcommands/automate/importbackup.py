@@ -21,26 +21,23 @@ class ImportBackup(ctmcommands.cmd.CSKCommand):
     ctm-import-backup -f ~/mytask01.xml
 '''
     Options = [Param(name='file', short_name='f', long_name='file',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='The file name of the backup file.'),
                Param(name='on_conflict', short_name='c', long_name='on_conflict',
                      optional=True, ptype='string',
                      doc='Action to take if one or more Tasks have a conflict. "replace", "cancel".')]
 
     def main(self):
-        self.import_text = None
+        fn = None
         if self.file:
             import os
             fn = os.path.expanduser(self.file)
-            with open(fn, 'r') as f_in:
-                if not f_in:
-                    print("Unable to open file [%s]." % fn)
-                data = f_in.read()
-                if data:
-                    self.import_text = data
-                else:
-                    print("File is empty.")
-                    return
+            if not os.path.isfile(fn):
+                print("Unable to open file [%s]." % fn)
+                self.error_exit()
+            if not os.path.getsize(fn):
+                print("File is empty.")
+                return
 
         go = False
         if self.force:
@@ -52,5 +49,5 @@ class ImportBackup(ctmcommands.cmd.CSKCommand):
                     go = True
 
         if go:
-            results = self.call_api(self.API, ['import_text', 'on_conflict'], verb='POST')
+            results = self.call_api(self.API, ['on_conflict'], verb='POST', files={'import_text': fn} if fn else None)
             print(results)
@@ -17,26 +17,23 @@ class ImportTask(ctmcommands.cmd.CSKCommand):
     ctm-import-backup -f ~/mytask02.json
 '''
     Options = [Param(name='file', short_name='f', long_name='file',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='The file name of the backup file.'),
                Param(name='on_conflict', short_name='c', long_name='on_conflict',
                      optional=True, ptype='string',
                      doc='Action to take if one or more Tasks have a conflict. "replace", "cancel".')]
 
     def main(self):
-        self.backup = None
+        fn = None
         if self.file:
             import os
             fn = os.path.expanduser(self.file)
-            with open(fn, 'r') as f_in:
-                if not f_in:
-                    print("Unable to open file [%s]." % fn)
-                data = f_in.read()
-                if data:
-                    self.backup = data
-                else:
-                    print("File is empty.")
-                    return
+            if not os.path.isfile(fn):
+                print("Unable to open file [%s]." % fn)
+                self.error_exit()
+            if not os.path.getsize(fn):
+                print("File is empty.")
+                return
 
         go = False
         if self.force:
@@ -48,5 +45,5 @@ class ImportTask(ctmcommands.cmd.CSKCommand):
                     go = True
 
         if go:
-            results = self.call_api(self.API, ['backup', 'on_conflict'], verb='POST')
+            results = self.call_api(self.API, ['on_conflict'], verb='POST', files={'backup': fn} if fn else None)
             print(results)
@@ -37,6 +37,10 @@ _Initial runtime data in a JSON file_
 
     ctm-run-task -t "mytask01" -d "~/mytask01_params.json"
 
+_To submit a task and wait for it to finish, exiting with 0 only if it Completed_
+
+    ctm-run-task -t "mytask01" --wait
+
 '''
     Options = [Param(name='task', short_name='t', long_name='task',
                      optional=False, ptype='string',
@@ -56,8 +60,18 @@ _Initial runtime data in a JSON file_
                Param(name='initialdata', short_name='i', long_name='initialdata',
                      optional=True, ptype='string',
                      doc='JSON object initial runtime data, or a path to a file containing a JSON object.'),
+               Param(name='wait', short_name='w', long_name='wait',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='''Wait for the Task Instance to finish.  The exit code is 0 if it Completed, 1 if not, 2 on timeout.
+                            The Task Instance is printed as JSON with -F json, otherwise just its id.'''),
+               Param(name='wait_timeout', long_name='wait_timeout',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='With --wait, stop waiting after this many seconds. (default=wait forever)'),
                ]
 
+    # parameters (or initialdata) may be a whole file
+    PostLarge = True
+
     def main(self):
         try:
             # first validate any initial 'data'
@@ -98,10 +112,36 @@ _Initial runtime data in a JSON file_
                         except:  # well, nothing worked so let's just whine
                             print ("'parameters' argument was provided, but unable to reconcile parameters as JSON, XML or a valid and existing file.")
 
-            results = self.call_api(self.API, ['task', 'log_level', 'options', 'parameters', 'run_later', 'initialdata'])
+            parameters = ['task', 'log_level', 'options', 'parameters', 'run_later', 'initialdata']
+            if self.wait:
+                self.run_and_wait(parameters)
+                return
+            results = self.call_api(self.API, parameters)
             print(results)
         except ValueError:
             # the results could not be parsed as JSON, just return them
             print(results)
         except Exception as ex:
             raise ex
+
+    def run_and_wait(self, parameters):
+        import sys
+        import json
+        from ctmcommands.automate.waittaskinstances import TaskInstanceWaiter, instance_of, print_status
+
+        # the instance is taken from the result as JSON, whatever the output format
+        result = self.call_api_result(self.API, parameters)
+        if isinstance(result, ctmcommands.cmd.ApiError):
+            print(result)
+            self.error_exit()
+        instance = instance_of(result)
+        if not instance:
+            print("Unable to find the Task Instance in the response.")
+            self.error_exit()
+        # what the output format would show, the whole result as JSON, otherwise the instance id
+        print(json.dumps(result, indent=4) if self.output_format == "json" else instance)
+        sys.stdout.flush()
+
+        waiter = TaskInstanceWaiter(self, [instance], timeout=self.wait_timeout, report=print_status)
+        waiter.wait()
+        sys.exit(waiter.exit_code())
@@ -16,23 +16,26 @@ class ScheduleTasks(ctmcommands.cmd.CSKCommand):
     ctm-schedule-tasks -s ./schedule_template.json
 '''
     Options = [Param(name='schedulefile', short_name='s', long_name='schedulefile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='''The path to a json formatted schedule definition file. See the schedule_tasks API documentation for the format of the file.''')
                ]
 
+    # the whole schedule file is sent
+    PostLarge = True
+
     def main(self):
         try:
-            # first, we need to load the schedule definition
-            self.tasks = None
+            # the schedule definition is sent from the file
+            files = None
             if self.schedulefile:
                 import os
                 fn = os.path.expanduser(self.schedulefile)
-                with open(fn, 'r') as f_in:
-                    if not f_in:
-                        print("Unable to open file [%s]." % fn)
-                    self.tasks = f_in.read()
+                if not os.path.isfile(fn):
+                    print("Unable to open file [%s]." % fn)
+                    self.error_exit()
+                files = {'tasks': fn}
 
-            results = self.call_api(self.API, ['tasks'])
+            results = self.call_api(self.API, files=files)
             print(results)
         except Exception as ex:
             raise ex
@@ -0,0 +1,170 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import sys
+import time
+
+import ctmcommands.cmd
+from ctmcommands.param import Param
+
+terminal_statuses = ["Completed", "Error", "Cancelled"]
+active_statuses = ["Submitted", "Staged", "Pending", "Processing", "Queued", "Aborting"]
+# an instance whose status can't be had this many times in a row (it doesn't exist, say) is given up on
+max_status_errors = 3
+unknown_status = "Unknown"
+
+
+def status_of(result):
+    """The status from a get_task_instance(s) JSON result, which may be a string or an object."""
+    if isinstance(result, dict):
+        for k in ["Status", "status", "task_status"]:
+            if k in result:
+                return result[k]
+        return None
+    return result
+
+
+def instance_of(result):
+    """The task instance id from a task instance (or run_task) JSON result."""
+    if isinstance(result, dict):
+        for k in ["Instance", "instance", "task_instance", "TaskInstance"]:
+            if result.get(k):
+                return str(result[k])
+        return None
+    if result:
+        return str(result).strip()
+    return None
+
+
+class TaskInstanceWaiter(object):
+    """
+    Waits for a set of Task Instances to finish.
+
+    Each poll makes one get_task_instances call for every instance still running,
+    and only confirms the final status of an instance (get_task_instance_status)
+    once it drops out of the list of active instances.  The poll interval grows
+    while nothing changes, and goes back to the minimum when something does.
+    """
+
+    def __init__(self, cmd, instances, min_interval=1, max_interval=30, timeout=0, report=None):
+        self.cmd = cmd
+        self.pending = list(instances)
+        self.statuses = {}
+        self.errors = {}
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.timeout = timeout
+        self.report = report
+
+    def call(self, method, args):
+        # get_task_instance(s) responses are always taken as JSON
+        result = self.cmd.call_api_result(method, data=args)
+        if isinstance(result, ctmcommands.cmd.ApiError):
+            raise result
+        return result
+
+    def active_instances(self):
+        """The ids of all currently active instances, or None if they couldn't be listed."""
+        try:
+            rows = self.call("get_task_instances", {"status": ",".join(active_statuses),
+                                                    "records": max(len(self.pending) * 10, 1000)})
+        except Exception:
+            return None
+        if not isinstance(rows, list):
+            return None
+        return set(instance_of(row) for row in rows)
+
+    def poll(self):
+        """Checks the pending instances, returns the ones that finished."""
+        active = self.active_instances()
+        finished = []
+        for instance in list(self.pending):
+            if active is not None and instance in active:
+                continue
+            try:
+                status = status_of(self.call("get_task_instance_status", {"instance": instance}))
+                self.errors.pop(instance, None)
+            except Exception as ex:
+                # a server blip is tried again at the next poll
+                self.errors[instance] = self.errors.get(instance, 0) + 1
+                sys.stderr.write("Unable to get the status of Task Instance [%s]. %s\n" % (instance, ex.args[0] if ex.args else ex))
+                if self.errors[instance] < max_status_errors:
+                    continue
+                status = unknown_status
+            if status in terminal_statuses or status == unknown_status:
+                self.pending.remove(instance)
+                self.statuses[instance] = status
+                finished.append(instance)
+                if self.report:
+                    self.report(instance, status)
+        return finished
+
+    def wait(self):
+        """Polls until every instance is finished, or the timeout. Returns {instance: status}."""
+        start = time.time()
+        interval = self.min_interval
+        while True:
+            if self.poll():
+                interval = self.min_interval
+            if not self.pending:
+                break
+            if self.timeout and time.time() - start + interval > self.timeout:
+                break
+            time.sleep(interval)
+            interval = min(interval * 1.5, self.max_interval)
+        return self.statuses
+
+    def exit_code(self):
+        """0 if all the instances Completed, 1 if any did not (or their status is Unknown), 2 if any are still running."""
+        if self.pending:
+            return 2
+        if [s for s in self.statuses.values() if s != "Completed"]:
+            return 1
+        return 0
+
+
+def print_status(instance, status):
+    print("%s\t%s" % (instance, status))
+    sys.stdout.flush()
+
+
+class WaitTaskInstances(ctmcommands.cmd.CSKCommand):
+
+    Description = '''Waits for one or more Task Instances to finish, printing each final status as it happens.
+
+Exits with 0 if every instance Completed, 1 if any ended in Error or Cancelled, and 2 on timeout.
+An instance whose status can't be had %d times in a row (one that doesn't exist) is reported as %s, and the exit code is 1.''' % (max_status_errors, unknown_status)
+    API = 'get_task_instances'
+    Examples = '''
+_To wait for three task instances, giving up after 10 minutes_
+
+    ctm-wait-task-instances -i "43667,43668,43669" -t 600
+'''
+    Options = [Param(name='instances', short_name='i', long_name='instances',
+                     optional=False, ptype='string',
+                     doc='A comma separated list of Task Instance IDs.'),
+               Param(name='timeout', short_name='t', long_name='timeout',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Stop waiting after this many seconds. (default=wait forever)'),
+               Param(name='interval', long_name='interval',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Initial number of seconds between checks. (default=1)'),
+               Param(name='max_interval', long_name='max_interval',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Maximum number of seconds between checks. (default=30)')
+               ]
+
+    def main(self):
+        instances = [i.strip() for i in self.instances.split(",") if i.strip()]
+        waiter = TaskInstanceWaiter(self, instances,
+                                    min_interval=self.interval or 1,
+                                    max_interval=self.max_interval or 30,
+                                    timeout=self.timeout,
+                                    report=print_status)
+        waiter.wait()
+        for instance in waiter.pending:
+            print("%s\t%s" % (instance, "Timed out"))
+        sys.exit(waiter.exit_code())
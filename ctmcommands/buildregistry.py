@@ -0,0 +1,118 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+Builds ctmcommands/registry.py, the map of every ctm-* command name to the
+module and class that implements it, by reading the scripts in bin/.
+The command line options of each command are recorded too, for shell completion.
+
+Nothing is imported, the scripts and modules are only parsed, so this runs
+at install time without any of the client's dependencies.
+
+    python -m ctmcommands.buildregistry [root directory]
+"""
+
+import os
+import re
+import sys
+import ast
+
+CLASS_RE = re.compile(r"^\s*cmd = (ctmcommands(?:\.\w+)+)\.(\w+)\(\)", re.M)
+ENTRY_RE = re.compile(r"^\s*cmd\.(\w+)\(\)", re.M)
+
+
+def read_commands(bindir):
+    """Returns {command name: (module, class, entry method)} for the scripts in bindir."""
+    commands = {}
+    for fname in sorted(os.listdir(bindir)):
+        if not fname.startswith("ctm-"):
+            continue
+        with open(os.path.join(bindir, fname), 'r') as f_in:
+            text = f_in.read()
+        cls = CLASS_RE.search(text)
+        entry = ENTRY_RE.search(text)
+        if cls and entry:
+            commands[fname] = (cls.group(1), cls.group(2), entry.group(1))
+    return commands
+
+
+def class_assignments(root, module_name, class_name):
+    """Returns {attribute: value node} for the assignments in the body of a class."""
+    fn = os.path.join(root, *module_name.split(".")) + ".py"
+    try:
+        with open(fn, 'r') as f_in:
+            tree = ast.parse(f_in.read(), fn)
+    except (IOError, SyntaxError) as ex:
+        print("Unable to read the options of [%s]. %s" % (class_name, ex))
+        return {}
+
+    assignments = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ClassDef) or node.name != class_name:
+            continue
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign):
+                for t in stmt.targets:
+                    if isinstance(t, ast.Name):
+                        assignments[t.id] = stmt.value
+    return assignments
+
+
+def read_options(root, module_name, class_name, attribute="Options"):
+    """
+    Returns the option flags (-x and --xyz) of a command class, by parsing the
+    list of Params assigned to its Options attribute.
+    """
+    assignments = class_assignments(root, module_name, class_name)
+    flags = []
+    params = assignments.get(attribute)
+    if isinstance(params, ast.List):
+        for param in params.elts:
+            for kw in getattr(param, "keywords", []):
+                value = getattr(kw.value, "s", getattr(kw.value, "value", None))
+                if kw.arg == "short_name" and value:
+                    flags.append("-%s" % value)
+                elif kw.arg == "long_name" and value:
+                    flags.append("--%s" % value)
+
+    # commands with a Paging setting get the paging options too
+    paging = assignments.get("Paging")
+    if attribute == "Options" and paging is not None and getattr(paging, "value", True) is not None:
+        flags += read_options(root, "ctmcommands.cmd", "CSKCommand", "PagingOptions")
+    return flags
+
+
+def write_registry(commands, options, standard_options, fn):
+    lines = ["# This file is generated by ctmcommands/buildregistry.py from the scripts in bin/.",
+             "# Do not edit it by hand.",
+             "",
+             "COMMANDS = {"]
+    for name in sorted(commands):
+        lines.append("    %r: %r," % (name, commands[name]))
+    lines.append("}")
+    lines.append("")
+    lines.append("OPTIONS = {")
+    for name in sorted(options):
+        lines.append("    %r: %r," % (name, options[name]))
+    lines.append("}")
+    lines.append("")
+    lines.append("STANDARD_OPTIONS = %r" % (standard_options,))
+    with open(fn, 'w') as f_out:
+        f_out.write("\n".join(lines) + "\n")
+
+
+def build(root):
+    commands = read_commands(os.path.join(root, "bin"))
+    options = dict((name, read_options(root, c[0], c[1])) for name, c in commands.items())
+    standard_options = read_options(root, "ctmcommands.cmd", "CSKCommand", "StandardOptions")
+    write_registry(commands, options, standard_options, os.path.join(root, "ctmcommands", "registry.py"))
+    return commands
+
+
+if __name__ == '__main__':
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    commands = build(root)
+    print("%d commands registered." % len(commands))
@@ -0,0 +1,138 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+An on-disk cache of API responses, for read-only methods whose results rarely change.
+
+It's off unless asked for, with "cache" in the config file (true, or a directory)
+or the CONTINUUM_CACHE environment variable, and --no-cache skips it for one command.
+
+Entries are keyed by the full request URL (server, method and arguments), the output
+format and a hash of the token, so users never see each other's results.  Each method
+has its own time to live, after which the entry is revalidated with the server
+(If-None-Match / If-Modified-Since) when it gave an ETag or Last-Modified, or fetched again.
+The least recently used entries are removed once the cache is over its size limit.
+"""
+
+import os
+import time
+import json
+import hashlib
+import tempfile
+
+default_dir = os.path.join(os.path.expanduser("~"), ".ctmclient_cache")
+
+# seconds a cached result is used without asking the server, only these methods are cached.
+# the method listing (ctm-describe-api) has no method name.
+method_ttls = {
+    "": 86400,
+    "list_tasks": 300,
+    "list_projects": 300,
+    "get_task_parameters": 600,
+    "get_plugin_schema": 3600,
+    "export_plugins": 3600,
+}
+
+
+def token_id(token):
+    return hashlib.sha256(str(token).encode("utf-8")).hexdigest()
+
+
+class ResponseCache(object):
+
+    def __init__(self, directory=None, max_size=None, ttls=None):
+        self.directory = os.path.expanduser(directory or default_dir)
+        self.max_size = int(float(max_size or 50) * 1024 * 1024)
+        self.ttls = dict(method_ttls)
+        if ttls:
+            self.ttls.update(ttls)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, 0o700)
+
+    def ttl(self, method):
+        """The time to live of a method, None if it isn't cached."""
+        return self.ttls.get(method or "")
+
+    def key(self, url, accept, token):
+        return hashlib.sha256("\n".join([url, accept, token_id(token)]).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns (meta, body) for a key, or None."""
+        fn = os.path.join(self.directory, key)
+        try:
+            with open(fn, 'rb') as f_in:
+                meta = json.loads(f_in.readline().decode("utf-8"))
+                body = f_in.read()
+        except (IOError, OSError, ValueError):
+            return None
+        # the modified time is the last use, for eviction
+        try:
+            os.utime(fn, None)
+        except OSError:
+            pass
+        return meta, body
+
+    def fresh(self, meta, ttl):
+        return time.time() - meta.get("stored", 0) < ttl
+
+    def put(self, key, url, headers, content):
+        """Stores a response body, with the headers needed to use and revalidate it."""
+        meta = {"url": url, "stored": time.time(),
+                "headers": dict((k, v) for k, v in headers.items()
+                                if k.lower() in ["content-type", "etag", "last-modified"])}
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f_out:
+                f_out.write(json.dumps(meta).encode("utf-8") + b"\n")
+                f_out.write(content)
+            getattr(os, "replace", os.rename)(tmp, os.path.join(self.directory, key))
+        except (IOError, OSError):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in max_size."""
+        entries = []
+        for fn in os.listdir(self.directory):
+            # skip entries still being written by another thread
+            if fn.startswith("tmp"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, fn))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, fn))
+        total = sum(e[1] for e in entries)
+        for mtime, size, fn in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, fn))
+                total -= size
+            except OSError:
+                pass
+
+    def validators(self, meta):
+        """Conditional request headers for revalidating an entry."""
+        headers = {}
+        for k, v in meta.get("headers", {}).items():
+            if k.lower() == "etag":
+                headers["If-None-Match"] = v
+            elif k.lower() == "last-modified":
+                headers["If-Modified-Since"] = v
+        return headers
+
+    def response(self, meta, body):
+        """A requests Response made from a cached entry."""
+        import requests
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = meta.get("url")
+        response.headers.update(meta.get("headers", {}))
+        response._content = body
+        return response
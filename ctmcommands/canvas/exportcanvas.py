@@ -5,7 +5,6 @@
 #########################################################################
 
 import os
-import json
 
 import ctmcommands.cmd
 from ctmcommands.param import Param
@@ -26,11 +25,14 @@ class ExportCanvas(ctmcommands.cmd.CSKCommand):
                      optional=True, ptype='string',
                      doc='Specify either "file" or "db" repository. ("db" if omitted.)'),
                Param(name='outputdirectory', short_name='o', long_name='outputdirectory',
-                     optional=True, ptype='string',
+                     optional=True, ptype='string', request_param=False,
                      doc='Directory where the output will be saved.  The directory must exist, and should be empty.'),
                Param(name='printoutput', long_name='printoutput',
-                     optional=True, ptype='boolean',
-                     doc='If provided, no file will be created.  The results of the API call will be printed.')
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='If provided, no file will be created.  The results of the API call will be printed.'),
+               Param(name='archive', short_name='a', long_name='archive',
+                     optional=True, ptype='string', request_param=False,
+                     doc='Write the items to this archive file instead of a directory.  Compressed if the name ends in .gz or .tgz.')
                ]
 
     def main(self):
@@ -53,28 +55,32 @@ class ExportCanvas(ctmcommands.cmd.CSKCommand):
             rootdir = os.path.expanduser(self.outputdirectory)
 
         # the directory must exist
-        if not os.path.exists(rootdir):
+        if not self.archive and not os.path.exists(rootdir):
             print("The directory [%s] does not exist." % (rootdir))
             return
 
-        results = self.call_api(self.API, ['project', 'component', 'repository'])
+        projs = self.call_api_result(self.API, ['project', 'component', 'repository'])
 
-        # the result MIGHT be an error!!! in which case the json.loads will fail
-        try:
-            projs = json.loads(results)
-        except:
-            print(results)
+        # the result MIGHT be an error!!!
+        if isinstance(projs, ctmcommands.cmd.ApiError):
+            print(projs)
             return
 
         if not projs:
             print("No results found.")
             return
 
+        archive = None
+        if self.archive:
+            from ctmcommands.archive import ArchiveWriter
+            rootdir = os.path.expanduser(self.archive)
+            archive = ArchiveWriter(rootdir, "canvas")
+
         for p in projs:
             # create the project dir
             print("Project: %s" % (p["Name"]))
             pdir = os.path.join(rootdir, "proj_%s" % (p["Name"]))
-            if not os.path.exists(pdir):
+            if not archive and not os.path.exists(pdir):
                 os.makedirs(pdir)
 
             # Components
@@ -82,7 +88,7 @@ class ExportCanvas(ctmcommands.cmd.CSKCommand):
                 print("    Component: %s" % (c["Name"]))
                 # create the category dir
                 cdir = os.path.join(pdir, "comp_%s" % (c["Name"]))
-                if not os.path.exists(cdir):
+                if not archive and not os.path.exists(cdir):
                     os.makedirs(cdir)
 
                 # Files
@@ -90,10 +96,16 @@ class ExportCanvas(ctmcommands.cmd.CSKCommand):
                     print("        Item: %s" % (i["Name"]))
                     # write this file into the category directory
                     filename = "item_%s" % (i["Name"])
+                    if archive:
+                        archive.add("proj_%s/comp_%s/%s" % (p["Name"], c["Name"], filename),
+                                    i["Data"].encode("utf-8", "ignore") if i["Data"] else b"")
+                        continue
                     fn = os.path.join(cdir, filename)
                     with open(fn, 'w+') as f_out:
                         if not f_out:
                             print("Unable to open file [%s]." % fn)
                         f_out.write(i["Data"].encode("utf-8", "ignore") if i["Data"] else "")
 
+        if archive:
+            archive.close()
         print("Project(s) successfully backed up to [%s]." % (rootdir))
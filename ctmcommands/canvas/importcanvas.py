@@ -8,9 +8,11 @@
 #########################################################################
 
 import os
+import json
 
 import ctmcommands.cmd
 from ctmcommands.param import Param
+from ctmcommands.statefile import StateFile
 
 from builtins import input
 
@@ -19,9 +21,11 @@ class ImportCanvas(ctmcommands.cmd.CSKCommand):
 
     Description = 'Imports Canvas items from a properly formatted directory.'
     API = 'create_canvas_item'
+    BatchAPI = 'create_canvas_items'
+    StateFileName = '.import_canvas_state'
     Examples = ''''''
     Options = [Param(name='inputdirectory', short_name='i', long_name='inputdirectory',
-                     optional=True, ptype='string',
+                     optional=True, ptype='string', request_param=False,
                      doc='Directory where the Canvas files exist.  Current directory if omitted.'),
                Param(name='repository', short_name='r', long_name='repository',
                      optional=True, ptype='string',
@@ -30,7 +34,22 @@ class ImportCanvas(ctmcommands.cmd.CSKCommand):
                Param(name='ignoreconflicts', long_name='ignoreconflicts',
                      optional=True, ptype='boolean',
                      doc="""If provided, the import process will handle Name conflicts aggressively.
-If Canvas items with the same Project/Component/Name exist, they will be overwritten.""")
+If Canvas items with the same Project/Component/Name exist, they will be overwritten."""),
+               Param(name='workers', short_name='w', long_name='workers',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Number of items to import concurrently. (default=1)'),
+               Param(name='batch', long_name='batch',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc="""If provided, all the items of a Component are sent in a single request (create_canvas_items).
+The import stops right away if the server does not offer that API method.
+Once a batch fails the rest are sent one request per item.
+The items of a failed batch that may have been imported are reported as failed rather than sent again."""),
+               Param(name='resume', long_name='resume',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc="""If provided, items successfully imported by a previous failed run are skipped."""),
+               Param(name='archive', short_name='a', long_name='archive',
+                     optional=True, ptype='string', request_param=False,
+                     doc="""Read the items from this archive file (from ctm-export-canvas --archive) instead of a directory.""")
                ]
 
     def main(self):
@@ -45,12 +64,18 @@ If Canvas items with the same Project/Component/Name exist, they will be overwri
         """
         # if no inputdirectory is provided, use the current directory
         rootdir = os.path.expanduser(os.getcwd())
-        if self.inputdirectory:
+        if self.archive:
+            # a --resume state file is kept next to the archive
+            rootdir = os.path.dirname(os.path.abspath(os.path.expanduser(self.archive)))
+        elif self.inputdirectory:
             rootdir = os.path.expanduser(self.inputdirectory)
         # the directory must exist
         if not os.path.exists(rootdir):
             print("The directory [%s] does not exist." % (rootdir))
             return
+        if self.archive and not os.path.isfile(os.path.expanduser(self.archive)):
+            print("The archive [%s] does not exist." % (self.archive))
+            return
 
         go = False
         if self.force:
@@ -80,7 +105,9 @@ If Canvas items with the same Project/Component/Name exist, they will be overwri
 
         # a flat list of all the details
         everything = []
-        projects = [d for d in os.listdir(rootdir) if os.path.isdir(os.path.join(rootdir, d))]
+        if self.archive:
+            everything = self.read_archive(os.path.expanduser(self.archive))
+        projects = [d for d in os.listdir(rootdir) if os.path.isdir(os.path.join(rootdir, d))] if not self.archive else []
         # filter out any invalid dirs
         projects = [p for p in projects if "proj_" in p]
         if projects:
@@ -103,10 +130,146 @@ If Canvas items with the same Project/Component/Name exist, they will be overwri
 
                             everything.append((p.replace("proj_", ""), c.replace("comp_", ""), f.replace("item_", ""), data))
 
-        # finally, make the api call for each row (suboptimal I know, but whatever)
-        for row in everything:
-            self.project, self.component, self.name, self.resourcedata = row[:]
-            response = self.call_api(self.API, ['project', 'component', 'name', 'resourcedata', 'repository', 'ignoreconflicts'], verb='POST')
-            print(response)
+        # items already imported by a previous (failed) run are skipped on --resume
+        state = StateFile(os.path.join(rootdir, self.StateFileName), resume=self.resume)
+        if len(state):
+            print("Skipping %d item(s) imported by a previous run." % len(state))
+        todo = [row for row in everything if self.item_key(row) not in state]
+
+        # each unit of work is a list of rows, either a single item or a whole component
+        if self.batch:
+            groups = {}
+            for row in todo:
+                groups.setdefault((row[0], row[1]), []).append(row)
+            units = list(groups.values())
+        else:
+            units = [[row] for row in todo]
+
+        workers = max(self.workers, 1)
+        self.pool_maxsize = max(int(self.pool_maxsize or 10), workers)
+        self._batch_supported = True
+        self._batch_unknown = False
+
+        results = []
+        if self.batch and units:
+            # the first batch is sent by itself, so a server without create_canvas_items stops the import before anything else
+            first = self.import_unit(units.pop(0))
+            if self._batch_unknown:
+                print("The server does not support --batch (the %s API method).  Import without --batch instead." % self.BatchAPI)
+                self.error_exit()
+            self.record_results(first, state, results)
 
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(workers)
+        try:
+            for unit_results in pool.imap_unordered(self.import_unit, units):
+                self.record_results(unit_results, state, results)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.print_results(results)
+
+        failed = [r for r in results if r[1]]
+        if failed:
+            print("%d of %d item(s) failed.  Run again with --resume to retry only the failed items." % (len(failed), len(results)))
+            self.error_exit()
+
+        state.remove()
         print("Success!")
+
+    def record_results(self, unit_results, state, results):
+        for row, response, error in unit_results:
+            if response is not None:
+                print(response)
+            if not error:
+                state.add(self.item_key(row))
+            results.append((row, error))
+
+    def read_archive(self, fn):
+        """The (project, component, name, data) rows of the items in an archive."""
+        from ctmcommands.archive import ArchiveReader
+        archive = ArchiveReader(fn, "canvas")
+        rows = []
+        for name in archive.names():
+            parts = name.split("/")
+            if len(parts) == 3 and parts[0].startswith("proj_") and parts[1].startswith("comp_") and parts[2].startswith("item_"):
+                rows.append((parts[0][5:], parts[1][5:], parts[2][5:], archive.read(name).decode("utf-8")))
+        archive.close()
+        return rows
+
+    def item_key(self, row):
+        return "/".join(row[:3])
+
+    def import_unit(self, rows):
+        """
+        Imports a list of rows, returning a (row, response, error) tuple for each.
+
+        Called from the worker threads, so item details are passed to call_api
+        explicitly rather than as attributes of 'self'.
+        """
+        results = []
+        if len(rows) > 1 and self._batch_supported:
+            project, component = rows[0][:2]
+            args = {
+                "project": project,
+                "component": component,
+                "items": [{"name": row[2], "resourcedata": row[3]} for row in rows]
+            }
+            for param in ['repository', 'ignoreconflicts']:
+                if getattr(self, param, None):
+                    args[param] = getattr(self, param)
+            try:
+                response = self.call_api(self.BatchAPI, data=json.dumps(args), verb='POST', content_type="application/json")
+                error = ctmcommands.cmd.response_error(response)
+            except Exception as ex:
+                response = None
+                error = ex
+            if not error:
+                return [(row, None, None) for row in rows[:-1]] + [(rows[-1], response, None)]
+
+            # one failed batch and the rest of the Components are sent an item at a time
+            self._batch_supported = False
+            if response is None and "not found" in str(error.args[0]):
+                # the server doesn't know how to do batches, nothing was imported
+                self._batch_unknown = True
+                return [(row, None, error) for row in rows]
+            failed = self.failed_items(response)
+            if failed is None:
+                # some of the items may have been imported, sending them again could make duplicates
+                return [(row, None, error) for row in rows[:-1]] + [(rows[-1], response, error)]
+            results = [(row, None, None) for row in rows if row[2] not in failed]
+            rows = [row for row in rows if row[2] in failed]
+
+        for row in rows:
+            project, component, name, resourcedata = row[:]
+            args = {"project": project, "component": component, "name": name, "resourcedata": resourcedata}
+            try:
+                response = self.call_api(self.API, ['repository', 'ignoreconflicts'], data=args, verb='POST')
+                results.append((row, response, ctmcommands.cmd.response_error(response)))
+            except Exception as ex:
+                results.append((row, None, ex))
+        return results
+
+    def failed_items(self, response):
+        """
+        The names of the items a failed batch response says weren't imported, or None
+        if it doesn't say (and any of them may have been).
+        """
+        try:
+            d = json.loads(response)
+        except (TypeError, ValueError):
+            return None
+        result = d.get("Response") if isinstance(d, dict) else None
+        failed = result.get("failed") if isinstance(result, dict) else None
+        if not isinstance(failed, list):
+            return None
+        return set(f.get("name") if isinstance(f, dict) else f for f in failed)
+
+    def print_results(self, results):
+        if not results:
+            print("No items to import.")
+            return
+        print("\n%s  %s" % ("Result".ljust(8), "Project/Component/Item"))
+        for row, error in sorted(results, key=lambda r: self.item_key(r[0])):
+            print("%s  %s%s" % (("FAILED" if error else "OK").ljust(8), self.item_key(row), "  (%s)" % error if error else ""))
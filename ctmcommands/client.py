@@ -0,0 +1,222 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+Using the client from Python, without a process (or command line parsing) per call.
+
+    from ctmcommands.client import ContinuumClient
+
+    client = ContinuumClient("https://continuum.example.com", "mytoken")
+    for task in client.list_tasks(filter="deploy"):
+        print(task["Name"])
+    instance = client.run_task(task="mytask", parameters={"host": "web01"})
+
+Every ctm-* command with an API method is a method of the client, named for the
+command without the "ctm-" (list_tasks for ctm-list-tasks), taking the command's
+options as keyword arguments.  The options are checked and converted as they
+would be on the command line, then sent as the arguments of the command's API
+method, and the parsed result is returned.  An error from the API is raised as
+an ApiError.
+
+The methods make the one API call of the command, a command that does more than
+that (ctm-export-catalog writing files, say) can be run as it is with run().  The
+options only the command line acts on (wait=True of run_task, a file to read or
+write, ...) are a TypeError, and a command that needs one (ctm-import-task reading
+its backup file) has no method, it's run().
+
+A client is safe to use from several threads, except for run().
+"""
+
+import os
+import sys
+
+import ctmcommands.cmd
+import ctmcommands.dispatch
+from ctmcommands.cmd import ApiError
+
+# settings of the client, other than the url and token, that are attributes of a command
+settings = ["pool_connections", "pool_maxsize", "retries", "backoff_factor", "cache",
+            "cache_size", "cache_ttls", "compress_requests", "trace", "debug"]
+
+
+class ContinuumClient(object):
+
+    def __init__(self, url=None, token=None, session=None, timeout=10, raise_errors=True, **kwargs):
+        """
+        url and token default to CONTINUUM_URL and CONTINUUM_TOKEN.  A requests
+        session may be given, otherwise the one shared by the process is used.
+
+        Other keyword arguments are the connection, cache, compression and trace
+        settings that may be in a config file: pool_maxsize=20, retries=3, cache=True, ...
+        With raise_errors=False API errors are returned as ApiError objects, not raised.
+        """
+        url = url or os.environ.get("CONTINUUM_URL")
+        token = token or os.environ.get("CONTINUUM_TOKEN")
+        if not url or not token:
+            raise ValueError("A url and token are required, as arguments or the CONTINUUM_URL and CONTINUUM_TOKEN environment variables.")
+
+        unknown = [k for k in kwargs if k not in settings]
+        if unknown:
+            raise TypeError("Unknown setting(s): %s" % ", ".join(unknown))
+
+        self._base = self._new_command(ctmcommands.cmd.CSKCommand, {"url": url, "token": token})
+        for k, v in kwargs.items():
+            if k == "debug":
+                self._base.set_debug(v)
+            else:
+                setattr(self._base, k, v)
+        self._base.session = session
+        self.timeout = timeout
+        self.raise_errors = raise_errors
+
+    def _new_command(self, cls, options):
+        # the command name is used in the trace and messages, not for anything else
+        saved = sys.argv
+        sys.argv = ["ctm-client"]
+        try:
+            return cls(options=options)
+        finally:
+            sys.argv = saved
+
+    def call(self, method, verb="GET", **args):
+        """Calls an API method by name, returning the parsed result."""
+        data = dict((k, v) for k, v in args.items() if v is not None)
+        result = self._base.call_api_result(method, data=data, verb=verb, timeout=self.timeout)
+        if self.raise_errors and isinstance(result, ApiError):
+            raise result
+        return result
+
+    def commands(self):
+        """The names of the client methods, one for each command."""
+        return sorted(name[4:].replace("-", "_") for name in ctmcommands.dispatch.command_names())
+
+    def __dir__(self):
+        return sorted(set(dir(type(self)) + list(self.__dict__.keys()) + self.commands()))
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        command = ctmcommands.dispatch.find_command(name.replace("_", "-"))
+        if not command:
+            raise AttributeError("There's no ctm-%s command." % name.replace("_", "-"))
+        method = self._make_method(name, command)
+        # made once, the next call finds it without __getattr__
+        setattr(self, name, method)
+        return method
+
+    def _make_method(self, name, command):
+        cls, _ = ctmcommands.dispatch.load_command(command)
+        api = getattr(cls, "API", None)
+        if not api:
+            raise AttributeError("%s has no API method, use run() instead." % command)
+        options = [o for o in cls.Options if o.request_param]
+        # the options the command itself handles (files to read, waiting, ...) aren't sent to the API
+        cli_only = [o.name for o in cls.Options if not o.request_param]
+        required = [o for o in cls.Options if not o.request_param and not o.optional]
+        if required:
+            raise AttributeError("%s reads %s itself, use run() instead." % (command, ", ".join(o.name for o in required)))
+        # the arguments of these may be whole documents, the API method takes them as a POST
+        verb = "POST" if cls.PostLarge else "GET"
+
+        def method(**kwargs):
+            return self.call(api, verb, **self._arguments(cls, options, kwargs, cli_only))
+
+        method.__name__ = name
+        method.__doc__ = "%s\n\nAPI method: %s\n\n%s" % (cls.Description, api, option_doc(options))
+        return method
+
+    def _arguments(self, cls, options, kwargs, cli_only=()):
+        """Checks and converts the arguments of a method, as the command line would."""
+        handled = [k for k in kwargs if k in cli_only and kwargs[k] is not None and kwargs[k] is not False]
+        if handled:
+            raise TypeError("Command line only option(s): %s, use run() instead." % ", ".join(handled))
+        names = dict((o.name, o) for o in options)
+        unknown = [k for k in kwargs if k not in names and k not in cli_only]
+        if unknown:
+            raise TypeError("Unknown argument(s): %s" % ", ".join(unknown))
+        missing = [o.name for o in options if not o.optional and kwargs.get(o.name) is None]
+        if missing:
+            raise TypeError("Missing required argument(s): %s" % ", ".join(missing))
+
+        # like the command line, a False boolean (or a None) is the option not given
+        return dict((k, convert(names[k], v)) for k, v in kwargs.items() if k in names and v is not None and v is not False)
+
+    def run(self, command, **options):
+        """
+        Runs a command as if from the command line (the options are keyword
+        arguments), returning what it printed.  Raises an Exception if it fails.
+
+        stdout is replaced while it runs, so don't run() from several threads.
+        """
+        name = ctmcommands.dispatch.find_command(command.replace("_", "-"))
+        if not name:
+            raise ValueError("There's no ctm-%s command." % command)
+        cls, entry = ctmcommands.dispatch.load_command(name)
+        options = dict(options, url=self._base.url, token=self._base.token)
+        cmd = self._new_command(cls, options)
+        for k in settings:
+            if k != "debug":
+                setattr(cmd, k, getattr(self._base, k))
+        cmd.session = self._base.session
+
+        out = OutputCapture()
+        saved = sys.stdout
+        sys.stdout = out
+        code = 0
+        try:
+            result = getattr(cmd, entry)()
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else (1 if e.code else 0)
+            result = None
+        finally:
+            sys.stdout = saved
+        output = out.getvalue()
+        if code:
+            raise Exception("%s failed. %s" % (name, output.strip()))
+        # some commands (ListProcesses) return their result rather than print it
+        return result if result is not None and not output else output
+
+
+class OutputCapture(object):
+    """A stdout replacement that keeps what's written, text or bytes, as text."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, s):
+        if isinstance(s, bytes):
+            s = s.decode("utf-8", "replace")
+        self.parts.append(s)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return "".join(self.parts)
+
+
+def convert(option, value):
+    """An argument value as it's sent to the API."""
+    if option.ptype == "boolean":
+        return "true"
+    if option.ptype == "integer":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise TypeError("%s should be of type integer" % option.name)
+    if isinstance(value, (dict, list)):
+        import json
+        return json.dumps(value)
+    if option.choices and value not in option.choices:
+        raise ValueError("%s value must be one of: %s" % (option.name, '|'.join(["%s" % str(x) for x in option.choices])))
+    return value
+
+
+def option_doc(options):
+    lines = []
+    for o in options:
+        lines.append("%s (%s%s): %s" % (o.name, o.ptype, "" if o.optional else ", required", " ".join(o.doc.split())))
+    return "\n".join(lines)
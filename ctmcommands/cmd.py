@@ -17,23 +17,210 @@ import getopt
 import os
 import sys
 import textwrap
-from future.standard_library import install_aliases
-install_aliases()
-import urllib.request, urllib.parse, urllib.error
 import json
-import requests
+import time
+import threading
+from collections import OrderedDict
 from ctmcommands.param import Param
 
 try:
-    import xml.etree.cElementTree as ET
-except (AttributeError, ImportError):
-    import xml.etree.ElementTree as ET
+    from urllib.parse import quote_plus, urlencode
+except ImportError:
+    from urllib import quote_plus, urlencode
+
+# NOTE: requests (and urllib3) and ElementTree are slow to import, and many invocations
+# (--help, --api, --dumpdoc, bad arguments) never make an API call.
+# So they are imported when first needed, not here.
+
+
+def get_element_tree():
+    try:
+        import xml.etree.cElementTree as ET
+    except (AttributeError, ImportError):
+        import xml.etree.ElementTree as ET
+    return ET
+
+# a single keep-alive session is shared by every API call made in this process,
+# so multi-call commands don't pay for a new connection (and TLS handshake) per call.
+_session = None
+_session_traced = False
+_session_pool_maxsize = 0
+# the session is made (or remade) by the first of several threads that want it
+_session_lock = threading.Lock()
+
+
+def get_session(pool_connections=None, pool_maxsize=None, retries=None, backoff_factor=None, trace=False):
+    """
+    Returns the process wide requests Session, creating it on the first call.
+
+    The pool and retry settings only apply when the session is created, except that
+    a bigger pool_maxsize (a command with more threads than the pool has connections)
+    gets the session a new, bigger pool.
+    Retries are only attempted for idempotent requests (GET, etc.) on connection
+    errors and 502/503/504 responses, never for a POST.
+    With trace=True the connections record their timings (see ctmcommands.trace),
+    the session is made again if it was created without.
+    """
+    pool_maxsize = int(pool_maxsize or 10)
+    session = _session
+    if session is not None and (_session_traced or not trace) and pool_maxsize <= _session_pool_maxsize:
+        return session
+    with _session_lock:
+        return _make_session(pool_connections, pool_maxsize, retries, backoff_factor, trace)
+
+
+def _make_session(pool_connections, pool_maxsize, retries, backoff_factor, trace):
+    # get_session, with the lock held, the checks made again since another thread may have got here first
+    global _session, _session_traced, _session_pool_maxsize
+    new_session = _session is None or (trace and not _session_traced)
+    if new_session or pool_maxsize > _session_pool_maxsize:
+        import requests
+        try:
+            from requests.packages import urllib3
+            urllib3.disable_warnings()
+        except (ImportError):
+            pass
+
+        max_retries = int(retries or 0)
+        if max_retries:
+            from requests.packages.urllib3.util.retry import Retry
+            max_retries = Retry(total=max_retries,
+                                backoff_factor=float(backoff_factor or 0),
+                                status_forcelist=[502, 503, 504],
+                                raise_on_status=False)
+        traced = bool(trace) or (not new_session and _session_traced)
+        adapter_class = requests.adapters.HTTPAdapter
+        if traced:
+            from ctmcommands.trace import traced_adapter_class
+            adapter_class = traced_adapter_class()
+        adapter = adapter_class(pool_connections=int(pool_connections or 10),
+                                pool_maxsize=pool_maxsize,
+                                max_retries=max_retries)
+        session = _session
+        if new_session:
+            session = requests.Session()
+            session.verify = False
+        # a session that's only getting a bigger pool keeps its cookies, the old pool's connections just aren't reused
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session_traced = traced
+        _session_pool_maxsize = pool_maxsize
+        # set last, so no other thread finds it before it's ready
+        _session = session
+    return _session
+
+
+# request bodies at least this big are compressed, when compress_requests is turned on
+compress_min_size = 1024
+# servers that refused a compressed request body, so it isn't tried again
+_uncompressed_hosts = set()
+# a GET of a command with PostLarge set is sent as a POST if its URL would be longer than this
+post_min_url_size = 2000
+
+
+def compress_body(body, encoding):
+    """
+    Compresses a request body with gzip or zstd, returning (body, encoding used).
+    zstd needs the zstandard package, without it gzip is used.
+    """
+    if encoding == "zstd":
+        try:
+            import zstandard
+            return zstandard.ZstdCompressor().compress(body), "zstd"
+        except ImportError:
+            pass
+    import zlib
+    # wbits of 16+ makes a gzip stream rather than a bare zlib one
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush(), "gzip"
+
+
+def response_error(response):
+    """
+    Given the result of a JSON formatted call_api, returns the error message
+    if the API reported an error, otherwise None.
+    """
+    try:
+        d = json.loads(response)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(d, dict) and d.get("ErrorCode"):
+        return "%s: %s" % (d.get("ErrorCode"), d.get("ErrorMessage", ""))
+    return None
+
+
+_json_loads = None
+
+
+def get_json_loads():
+    """
+    The fastest JSON parser installed: orjson, ujson, or the json module.
+    CONTINUUM_JSON=json (or ujson) picks one.
+    """
+    wanted = os.environ.get("CONTINUUM_JSON")
+    for name in ["orjson", "ujson"]:
+        if wanted and wanted != name:
+            continue
+        try:
+            module = __import__(name)
+            return module.loads
+        except ImportError:
+            pass
+
+    # objects keep the order of the document, which plain dicts only do from 3.7
+    hook = OrderedDict if sys.version_info < (3, 7) else None
+
+    def loads(s):
+        if isinstance(s, bytes) and sys.version_info >= (3,):
+            s = s.decode("utf-8")
+        return json.loads(s, object_pairs_hook=hook)
+    return loads
+
+
+def json_loads(s):
+    """Parses JSON (a str or utf-8 bytes) with the parser from get_json_loads."""
+    global _json_loads
+    if _json_loads is None:
+        _json_loads = get_json_loads()
+    return _json_loads(s)
+
+
+def http_error_message(status_code):
+    """The error of an API call answered with an HTTP error status, None if the response is still the result."""
+    # 400 level errors don't all raise an exception ... some
+    # actually do have a response.
+    if status_code <= 400:
+        return None
+    if status_code == 401 or status_code == 403:
+        return "API connection error. Most likely a credentials problem."
+    if status_code == 404:
+        return "API connection error. Requested path not found."
+    return "API error"
 
-try:
-    from requests.packages import urllib3
-    urllib3.disable_warnings()
-except (ImportError):
-    pass
+
+class ApiError(Exception):
+    """
+    An error reported by the API.  call_api_result returns (rather than raises) one
+    in place of the result, so callers can tell it apart from any result.
+    """
+
+    def __init__(self, code, message=""):
+        Exception.__init__(self, "%s: %s" % (code, message or ""))
+        self.code = code
+        self.message = message
+
+
+def is_error_response(content, outfmt):
+    """True if the body of a response is an API error (text responses can only be checked if they're a JSON error)."""
+    try:
+        if outfmt == "xml":
+            return bool(get_element_tree().fromstring(content).findtext("error/code", None))
+        if outfmt == "json" or content.lstrip()[:1] in (b"{", "{"):
+            d = json.loads(content.decode("utf-8") if isinstance(content, bytes) else content)
+            return bool(isinstance(d, dict) and d.get("ErrorCode"))
+    except Exception:
+        return outfmt != "text"
+    return False
 
 
 class CSKCommand(object):
@@ -76,11 +263,35 @@ class CSKCommand(object):
                              optional=True, ptype='boolean'),
                        Param(name='api', long_name='api',
                              doc='Identifies the API endpoint associated with this command.',
-                             optional=True, ptype='boolean')]
+                             optional=True, ptype='boolean'),
+                       Param(name='no_cache', long_name='no-cache',
+                             doc='Skip the response cache, if it is turned on.',
+                             optional=True, ptype='boolean'),
+                       Param(name='trace', long_name='trace',
+                             doc='Append the timings and sizes of every API call to this file, as JSON lines.  See ctm-trace-report.',
+                             optional=True, ptype='string')]
     Options = []
     Args = []
+    # commands whose API method also takes its arguments as a POST body set this,
+    # so a GET too big for a URL (a whole JSON document, say) is sent as a POST instead
+    PostLarge = False
+    # list commands that can walk their results a page at a time set this to
+    # {"limit": limit argument, "cursor": since/from/to argument, "order": "asc" or "desc",
+    #  "fields": [row properties that hold the cursor value, first one found is used]}
+    # without a cursor the results still stream, but come back in one request.
+    Paging = None
+    PagingOptions = [Param(name='page_size', long_name='page_size',
+                           doc='Get the results a page at a time, writing each row as it arrives. The limit is then for all pages, omitted or 0 for all results.',
+                           optional=True, ptype='integer'),
+                     Param(name='rows_format', long_name='rows_format',
+                           doc='With --page_size, how each row is written.  (default=text, or jsonl if the format is json)',
+                           optional=True, ptype='string', choices=['text', 'jsonl', 'csv'])]
 
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, options=None):
+        """
+        The options come from the command line, unless they're given as a dict
+        of {option name: value}, as ContinuumClient does.
+        """
         self.config_file_name = None
         self.debug = 0
         self.force = False
@@ -88,63 +299,87 @@ class CSKCommand(object):
         self.cmd_name = os.path.basename(sys.argv[0])
         self.token = os.environ.get("CONTINUUM_TOKEN")
         self.url = os.environ.get("CONTINUUM_URL")
-        self.process_cli_args()
-
-        # if we can find CONTINUUM_URL and CONTINUUM_TOKEN in the environment, don't bother with the file
-        if not self.token or not self.url:
-            # if there's a config file, we read it.
-            # any required values not explicitly specified on the command line,
-            # are read from the config file.
-            # there's a default file ".ctmclient.conf", and you can override with the "config_file" argument
-            config_doc = None
-            cfn = None
-            if self.config_file_name:
-                cfn = self.config_file_name
+        # connection pool and retry settings, may be set in the config file
+        self.pool_connections = None
+        self.pool_maxsize = None
+        self.retries = None
+        self.backoff_factor = None
+        # the response cache is off unless turned on here or in the config file
+        self.cache = os.environ.get("CONTINUUM_CACHE")
+        self.cache_size = None
+        self.cache_ttls = None
+        self._cache = None
+        # gzip or zstd to compress large request bodies, if the server accepts them
+        self.compress_requests = os.environ.get("CONTINUUM_COMPRESS")
+        # a file to record the timings of every API call in
+        self.trace = os.environ.get("CONTINUUM_TRACE")
+        self._tracer = None
+        # a requests Session to use instead of the shared one
+        self.session = None
+        # commands that page through their results get the paging options too
+        if self.Paging:
+            self.Options = self.Options + self.PagingOptions
+        if options is None:
+            self.process_cli_args()
+        else:
+            self.set_options(options)
+
+        # if there's a config file, we read it.
+        # even if CONTINUUM_URL and CONTINUUM_TOKEN are set, since the connection, cache,
+        # compression and trace settings are only in the file.
+        # any values not explicitly specified on the command line (or in the environment),
+        # are read from the config file.
+        # there's a default file ".ctmclient.conf", and you can override with the "config_file" argument
+        config_doc = None
+        cfn = None
+        if self.config_file_name:
+            cfn = self.config_file_name
+        else:
+            cfn = "%s/.ctmclient.conf" % os.path.expanduser("~")
+
+        try:
+            with open(cfn, 'r') as f_in:
+                if f_in:
+                    config_doc = json.loads(f_in.read())
+        except IOError:
+            # if the file doesn't exist, warn and exit (but continue if there's no default config file).
+            if cfn != "%s/.ctmclient.conf" % os.path.expanduser("~"):
+                raise Exception("The specified config file (%s) could not be found." % cfn)
             else:
-                cfn = "%s/.ctmclient.conf" % os.path.expanduser("~")
+                if self.debug:
+                    print("The default config file (%s) could not be found." % cfn)
 
-            try:
-                with open(cfn, 'r') as f_in:
-                    if f_in:
-                        config_doc = json.loads(f_in.read())
-            except IOError:
-                # if the file doesn't exist, warn and exit (but continue if there's no default config file).
-                if cfn != "%s/.ctmclient.conf" % os.path.expanduser("~"):
-                    raise Exception("The specified config file (%s) could not be found." % cfn)
-                else:
-                    if self.debug:
-                        print("The default config file (%s) could not be found." % cfn)
+        except ValueError:
+            # if the format of either file is bad, bark about it
+            print("The specified config file (%s) json format is invalid." % cfn)
+            self.error_exit()
 
-            except ValueError:
-                # if the format of either file is bad, bark about it
-                print("The specified config file (%s) json format is invalid." % cfn)
-                self.error_exit()
+        if config_doc:
+            # loop through the settings
+            # comments because this is a little hard to grok
+            # for every key in the config file
+            for k, v in config_doc.items():
+                # if 'self' has the key
+                if hasattr(self, k):
+                    # and self.key is not set
+                    if not getattr(self, k):
+                        # set it with the value from the file
+                        setattr(self, k, v)
 
-            if config_doc:
-                # loop through the settings
-                # comments because this is a little hard to grok
-                # for every key in the config file
-                for k, v in config_doc.items():
-                    # if 'self' has the key
-                    if hasattr(self, k):
-                        # and self.key is not set
-                        if not getattr(self, k):
-                            # set it with the value from the file
-                            setattr(self, k, v)
-
-        if not self.url:
+        if not self.url and self.requires_server():
             print("URL is required, either via `--url` argument, `CONTINUUM_URL` environment variable or in a config file.")
             self.error_exit()
-        if not self.url.endswith("/api"):
+        if self.url and not self.url.endswith("/api"):
             self.url = "%s/api" % (self.url)
-        if not self.token:
+        if not self.token and self.requires_server():
             print("Token is required, either via `--token`, `CONTINUUM_TOKEN` environment variable or in a config file.")
             self.error_exit()
 
         if self.debug:
             print("Using CONTINUUM_URL: %s" % self.url)
-        if self.debug:
-            print("Using CONTINUUM_TOKEN: %s" % self.token)
+        if self.debug and self.token:
+            # just enough of it to tell which one
+            print("Using CONTINUUM_TOKEN: %s" % (self.token[:4] + "*" * 8 if len(self.token) > 8 else "*" * 8))
 
     def set_debug(self, debug=False):
         if debug:
@@ -219,6 +454,50 @@ class CSKCommand(object):
                     msg = 'Only 1 argument (%s) permitted' % arg.name
                     self.display_error_and_exit(msg)
 
+    def set_options(self, options):
+        """
+        Sets options from a dict rather than the command line, checked and
+        converted as they would be there.  Raises ValueError if any are wrong.
+        """
+        for name, value in options.items():
+            option = self.find_option_by_name(name)
+            if not option:
+                raise ValueError("[%s] is not an option of %s." % (name, self.__class__.__name__))
+            if name == "debug":
+                self.set_debug(value)
+                continue
+            if name == "config_file":
+                self.config_file_name = value
+                continue
+            if value is None:
+                continue
+            try:
+                if option.ptype == "boolean":
+                    value = bool(value)
+                elif option.ptype == "integer":
+                    value = int(value)
+                elif option.cardinality not in ('*', '+'):
+                    if isinstance(value, (dict, list)):
+                        value = json.dumps(value)
+                    elif isinstance(value, (int, float)):
+                        value = str(value)
+                    value = option.convert(value)
+            except Exception:
+                raise ValueError("%s should be of type %s" % (name, option.ptype))
+            if option.choices and value not in option.choices:
+                raise ValueError("%s value must be one of: %s" % (name, '|'.join(["%s" % str(x) for x in option.choices])))
+            setattr(self, option.name, value)
+        self.handle_defaults()
+        missing = [o.name for o in self.Options if not o.optional and getattr(self, o.name, None) is None]
+        if missing:
+            raise ValueError("These required options are missing: %s" % ','.join(missing))
+
+    def find_option_by_name(self, name):
+        for option in self.StandardOptions + self.Options:
+            if option.name == name:
+                return option
+        return None
+
     def find_option(self, op_name):
         for option in self.StandardOptions + self.Options:
             if option.synopsis_short_name == op_name or option.synopsis_long_name == op_name:
@@ -377,18 +656,94 @@ class CSKCommand(object):
     def error_exit(self):
         sys.exit(1)
 
-    def call_api(self, method, parameters=[], data={}, verb="GET", content_type=None, timeout=10):
+    def requires_server(self):
+        """False for a command (or what it was asked to do) that works without calling the API, so needs no url or token."""
+        return True
+
+    def call_api(self, method, parameters=[], data={}, verb="GET", content_type=None, timeout=10, files=None):
+        response, outfmt = self.send_request(method, parameters, data, verb, content_type, timeout, files=files)
+        result = self.format_response(response, outfmt)
+        self.end_trace()
+        return result
+
+    def call_api_result(self, method, parameters=[], data={}, verb="GET", content_type=None, timeout=10):
+        """
+        Makes an API call as JSON (whatever the output format), returning the
+        parsed Response, or an ApiError if the API reported one.
+
+        Nothing is formatted, so a big result is parsed once and not turned back
+        into a string.  Safe to call from several threads.
+        """
+        response, outfmt = self.send_request(method, parameters, data, verb, content_type, timeout, output_format="json")
+        result = self.parse_result(response)
+        self.end_trace()
+        return result
+
+    def parse_result(self, response):
+        """
+        The parsed Response of a JSON API response, or an ApiError.
+
+        A bare JSON document (what some methods send for a text Accept header) is returned as is.
+        """
+        return self.parse_content(response.content)
+
+    def parse_content(self, content):
+        """parse_result of the body of a response."""
+        start = time.time()
+        try:
+            d = json_loads(content)
+        except ValueError:
+            return ApiError("", "Response JSON could not be parsed.")
+        tracer = self.get_tracer()
+        if tracer:
+            tracer.update(parse_ms=round((time.time() - start) * 1000.0, 3))
+        if isinstance(d, dict) and "ErrorCode" in d:
+            if d.get("ErrorCode"):
+                return ApiError(d.get("ErrorCode"), d.get("ErrorMessage"))
+            return d.get("Response")
+        return d
+
+    def get_output_format(self):
+        # was a different output format specified?
+        # we limit the values to xml or json.
+        x = getattr(self, "output_format", None)
+        if x == "xml" or x == "json":
+            return x
+        return "text"
+
+    def get_cache(self):
+        """The response cache, or None if it's not turned on (or skipped with --no-cache)."""
+        if not self.cache or getattr(self, "no_cache", False) or str(self.cache).lower() in ["false", "0", "no"]:
+            return None
+        if self._cache is None:
+            from ctmcommands.cache import ResponseCache
+            directory = None if str(self.cache).lower() in ["true", "1", "yes"] else self.cache
+            self._cache = ResponseCache(directory, self.cache_size, self.cache_ttls)
+        return self._cache
+
+    def get_tracer(self):
+        """The request tracer, or None if --trace (or CONTINUUM_TRACE) wasn't given."""
+        if not self.trace:
+            return None
+        if self._tracer is None:
+            from ctmcommands.trace import Tracer
+            self._tracer = Tracer(self.trace, self.cmd_name)
+        return self._tracer
+
+    def end_trace(self, **fields):
+        """Writes the trace record of the last request, once everything about it is known."""
+        tracer = self.get_tracer()
+        if tracer:
+            tracer.finish(**fields)
+
+    def build_url(self, method, parameters=[], data={}, verb="GET", outfmt="text"):
+        """
+        The URL of an API call, and its arguments: the data plus any of parameters
+        set on the command.  GET arguments are in the query string, otherwise they're the body.
+        """
         host = self.url
-        outfmt = "text"
         outdel = ""
         noheader = None
-        # was a different output format specified?
-        # we limit the values to xml or json.
-        if hasattr(self, "output_format"):
-            x = getattr(self, "output_format")
-            if x:
-                if x == "xml" or x == "json":
-                    outfmt = x
         # are we using a custom delimiter?
         if hasattr(self, "output_delimiter"):
             x = getattr(self, "output_delimiter")
@@ -398,7 +753,8 @@ class CSKCommand(object):
         if outfmt == "text":
             noheader = getattr(self, "noheader", None)
 
-        args = data
+        # copy, so the caller's dict (or the default!) isn't changed, several commands may run in one process
+        args = dict(data) if isinstance(data, dict) else data
         argstr = ""
         for param in parameters:
             if getattr(self, param, None):
@@ -407,7 +763,7 @@ class CSKCommand(object):
         # if post then args are a dict, if get args are qs
         if verb == "GET":
             if len(args):
-                arglst = ["&%s=%s" % (k, urllib.parse.quote_plus(str(v))) for k, v in args.items()]
+                arglst = ["&%s=%s" % (k, quote_plus(str(v))) for k, v in args.items()]
                 argstr = "".join(arglst)
 
         url = host
@@ -417,18 +773,21 @@ class CSKCommand(object):
         if argstr:
             url = "%s/%s?%s" % (host, method, argstr)
 
+        # a POST has no query string for these to go on
+        sep = "&" if "?" in url else "?"
         if outdel:
-            url = "%s&output_delimiter=%s" % (url, urllib.parse.quote_plus(outdel))
+            url = "%s%soutput_delimiter=%s" % (url, sep, quote_plus(outdel))
+            sep = "&"
 
         if noheader:
-            url = "%s&header=false" % (url)
+            url = "%s%sheader=false" % (url, sep)
 
         if not url:
-            return "URL not provided."
-
-        if self.debug:
-            print("Trying an HTTP %s to %s" % (verb, url))
+            raise Exception("URL not provided.")
+        return url, args
 
+    def request_headers(self, outfmt="text", content_type=None, headers=None):
+        """The headers of an API call: the token, and the Accept header of the output format."""
         hdrs = {
             "Authorization": "Token %s" % (self.token)
         }
@@ -441,41 +800,163 @@ class CSKCommand(object):
 
         if content_type:
             hdrs["Content-Type"] = content_type
+        if headers:
+            hdrs.update(headers)
+        return hdrs
+
+    def send_request(self, method, parameters=[], data={}, verb="GET", content_type=None, timeout=10, stream=False, headers=None,
+                     output_format=None, files=None, allow_status=None):
+        """
+        Makes the HTTP request for an API call, returning the requests Response
+        object along with the output format that was asked for.
+
+        With stream=True the body has not been read yet, the caller must consume
+        (or close) the response.  Any extra headers (a Range, say) are added to the request.
+        output_format overrides the command's output format for this request.
+
+        files is a dict of argument name to file path, the contents of the files are
+        sent as those arguments (in a POST), read as they're sent.  See upload.py.
 
+        allow_status is a list of HTTP error statuses the caller handles itself (416 for a
+        Range request), returned as a response rather than raised.
+        """
+        host = self.url
+        outfmt = output_format or self.get_output_format()
+        if files:
+            verb = "POST"
+        url, args = self.build_url(method, parameters, data, verb, outfmt)
+        if verb == "GET" and self.PostLarge and len(url) > post_min_url_size:
+            if self.debug:
+                print("The URL is %d characters, sending the arguments as a POST." % len(url))
+            verb = "POST"
+            url, args = self.build_url(method, parameters, data, verb, outfmt)
+
+        if self.debug:
+            print("Trying an HTTP %s to %s" % (verb, url))
+
+        tracer = self.get_tracer()
+        if tracer:
+            tracer.begin(method, verb)
+
+        hdrs = self.request_headers(outfmt, content_type, headers)
+
+        # read-only methods may come from the response cache
+        cache = self.get_cache() if verb == "GET" and not stream else None
+        ttl = cache.ttl(method) if cache else None
+        cached = None
+        if ttl:
+            key = cache.key(url, hdrs["Accept"], self.token)
+            cached = cache.get(key)
+            if cached and cache.fresh(cached[0], ttl):
+                if self.debug:
+                    print("Using the cached response.")
+                response = cache.response(*cached)
+                if tracer:
+                    tracer.update(cached=True, status=response.status_code, response_bytes=len(response.content))
+                    tracer.mark_done()
+                return response, outfmt
+            if cached:
+                hdrs.update(cache.validators(cached[0]))
+
+        body = args
+        if files:
+            # not compressed, that would need the whole body in memory
+            from ctmcommands.upload import FormFileBody
+            body = FormFileBody(args, files, self.debug)
+            hdrs.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        elif verb != "GET" and self.compress_requests and host not in _uncompressed_hosts:
+            raw = args
+            if isinstance(raw, dict):
+                raw = urlencode(raw, doseq=True)
+                hdrs.setdefault("Content-Type", "application/x-www-form-urlencoded")
+            if not isinstance(raw, bytes):
+                raw = raw.encode("utf-8")
+            if len(raw) >= compress_min_size:
+                body, hdrs["Content-Encoding"] = compress_body(raw, str(self.compress_requests).lower())
+                if self.debug:
+                    print("Request body compressed with %s, %d bytes to %d." % (hdrs["Content-Encoding"], len(raw), len(body)))
+
+        if tracer or (self.debug and verb != "GET"):
+            sent = body
+            if isinstance(sent, dict):
+                sent = urlencode(sent, doseq=True)
+            if self.debug and verb != "GET":
+                print("Request body is %d bytes." % len(sent or ""))
+            if tracer:
+                tracer.update(request_bytes=len(sent or ""), url_bytes=len(url))
+
+        import requests
+        extra_tries = 0
         try:
-            response = requests.request(verb, url, headers=hdrs, data=args, verify=False, timeout=timeout)
+            session = self.session or get_session(self.pool_connections, self.pool_maxsize, self.retries, self.backoff_factor, trace=bool(tracer))
+            if tracer:
+                tracer.sending()
+            response = session.request(verb, url, headers=hdrs, data=body, timeout=timeout, stream=stream)
+            if response.status_code == 415 and "Content-Encoding" in hdrs:
+                # the server can't take a compressed body, send it as is from now on
+                if self.debug:
+                    print("The server does not accept compressed requests, sending it uncompressed.")
+                _uncompressed_hosts.add(host)
+                del hdrs["Content-Encoding"]
+                extra_tries += 1
+                response = session.request(verb, url, headers=hdrs, data=args, timeout=timeout, stream=stream)
+            if tracer:
+                from ctmcommands.trace import retries_of
+                tracer.update(status=response.status_code, retries=retries_of(response) + extra_tries)
+                if not stream:
+                    tracer.update(response_bytes=len(response.content))
+                    tracer.mark_done()
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
-            # 400 level errors don't all raise an exception ... some
-            # actually do have a response.
-            if response.status_code == 400:
-                pass
-            elif response.status_code == 401 or response.status_code == 403:
-                m = "API connection error. Most likely a credentials problem."
-                raise Exception(m, e)
-            elif response.status_code == 404:
-                m = "API connection error. Requested path not found."
-                raise Exception(m, e)
-            else:
-                m = "API error"
+            m = None if response.status_code in (allow_status or []) else http_error_message(response.status_code)
+            if m:
+                self.end_trace(error=m)
                 raise Exception(m, e)
         except requests.exceptions.Timeout as e:
             m = "Timeout attempting to access [%s]" % url
+            self.end_trace(error=m)
             raise Exception(m, e)
         except requests.exceptions.ConnectionError as e:
             m = "API connection error. Check http or https, server address and port."
+            self.end_trace(error=m)
             raise Exception(m, e)
         except Exception as e:
             m = "API error."
+            self.end_trace(error=m)
             raise Exception(m, e)
 
         if self.debug:
             print(response)
 
+        if ttl:
+            if response.status_code == 304 and cached:
+                if self.debug:
+                    print("The cached response is still valid.")
+                if tracer:
+                    tracer.update(cached=True)
+                headers = dict(cached[0].get("headers", {}))
+                headers.update(response.headers)
+                cache.put(key, url, headers, cached[1])
+                response = cache.response(*cached)
+            elif response.status_code == 200 and not is_error_response(response.content, outfmt):
+                cache.put(key, url, response.headers, response.content)
+
+        return response, outfmt
+
+    def format_response(self, response, outfmt):
         if response is not None:
+            return self.format_content(response.content, outfmt)
+
+    def format_content(self, content, outfmt):
+        """The body of an API response as it's output, the Response unwrapped (unless it's an error)."""
+        if content is not None:
+            tracer = self.get_tracer()
             if outfmt == "json":
                 try:
-                    d = response.json()
+                    start = time.time()
+                    d = json_loads(content)
+                    if tracer:
+                        tracer.update(parse_ms=round((time.time() - start) * 1000.0, 3))
                     if d["ErrorCode"]:
                         return json.dumps(d, indent=4)
                     else:
@@ -486,12 +967,16 @@ class CSKCommand(object):
                         return json.dumps(d["Response"], indent=4)
                 except ValueError:
                     print("Response JSON could not be parsed.")
-                    return response.content
+                    return content
                 except Exception as ex:
                     raise ex
             elif outfmt == "xml":
+                ET = get_element_tree()
                 try:
-                    xRoot = ET.fromstring(response.content)
+                    start = time.time()
+                    xRoot = ET.fromstring(content)
+                    if tracer:
+                        tracer.update(parse_ms=round((time.time() - start) * 1000.0, 3))
                     if xRoot.findtext("error/code", None):
                         return ET.tostring(xRoot)
                     else:
@@ -506,7 +991,185 @@ class CSKCommand(object):
                 except Exception as ex:
                     raise ex
             else:
-                return response.content
+                return content
+
+    def download(self, method, parameters=[], data={}, output_file=None, timeout=10):
+        """
+        Makes an API call and writes the result to output_file (or stdout) as it arrives,
+        rather than holding the whole response in memory.  Returns the number of bytes written.
+
+        JSON results are unwrapped from the API response as they stream, and saved as the
+        server sent them, not indented.  To stdout JSON is still indented (as call_api
+        has it), which means reading it all first.  XML results are still unwrapped in memory.
+        """
+        from ctmcommands.stream import ResponseUnwrapper
+
+        response, outfmt = self.send_request(method, parameters, data, timeout=timeout, stream=True)
+        if outfmt == "json" and not output_file:
+            try:
+                result = self.format_response(response, outfmt)
+            finally:
+                response.close()
+                self.end_trace()
+            print(result)
+            if response_error(result):
+                self.error_exit()
+            return len(result)
+
+        unwrapper = ResponseUnwrapper() if outfmt == "json" else None
+
+        fn = os.path.expanduser(output_file) if output_file else None
+        if not fn:
+            # anything already printed goes first
+            sys.stdout.flush()
+        f_out = open(fn, 'wb') if fn else getattr(sys.stdout, "buffer", sys.stdout)
+        written = 0
+        received = 0
+        last = b""
+        error = None
+        try:
+            if outfmt == "xml":
+                chunks = [self.format_response(response, outfmt) or b""]
+            else:
+                chunks = response.iter_content(chunk_size=65536)
+            for chunk in chunks:
+                if not isinstance(chunk, bytes):
+                    chunk = chunk.encode("utf-8")
+                received += len(chunk)
+                if unwrapper:
+                    chunk = unwrapper.feed(chunk)
+                if chunk:
+                    f_out.write(chunk)
+                    written += len(chunk)
+                    last = chunk[-1:]
+            if unwrapper:
+                error = unwrapper.error()
+        finally:
+            response.close()
+            self.end_trace(response_bytes=received, written_bytes=written)
+            if fn:
+                f_out.close()
+            else:
+                if written and last != b"\n":
+                    f_out.write(b"\n")
+                f_out.flush()
+
+        if error:
+            if fn:
+                os.remove(fn)
+            print(error)
+            self.error_exit()
+        return written
+
+    def get_rows(self, args):
+        """Makes the API call for one page of results, returning the rows."""
+        # rows are always taken as JSON, then written in the asked for format
+        rows = self.call_api_result(self.API, data=args)
+        if isinstance(rows, ApiError):
+            raise rows
+        if rows is None:
+            return []
+        return rows if isinstance(rows, list) else [rows]
+
+    def iter_rows(self, parameters):
+        """
+        Yields the rows of a list API call, a page (--page_size) at a time.
+
+        Each page starts at the cursor value (since/from/to) of the last row of
+        the previous one, and the rows at that boundary are skipped if they come back
+        again.  If the rows aren't in cursor order, or a page is all the same cursor
+        value, the rest is fetched in one request so nothing is missed.
+        """
+        limit_arg = self.Paging["limit"]
+        cursor_arg = self.Paging.get("cursor")
+        ascending = self.Paging.get("order", "asc") == "asc"
+        try:
+            total = int(getattr(self, limit_arg, None) or 0)
+        except ValueError:
+            self.display_error_and_exit("%s should be of type integer" % limit_arg)
+        # without a page size (or a cursor to page on) it's one request, for the limit or everything
+        page_size = self.page_size if cursor_arg else 0
+
+        args = dict((p, getattr(self, p)) for p in parameters if p != limit_arg and getattr(self, p, None))
+        cursor = args.get(cursor_arg)
+        boundary = set()
+        count = 0
+        while True:
+            want = total
+            if page_size:
+                want = min(page_size, total - count + len(boundary)) if total else page_size
+            # not paging and no limit given, the API's own default limit applies (0 would be everything)
+            if want:
+                args[limit_arg] = want
+            if cursor:
+                args[cursor_arg] = cursor
+            rows = self.get_rows(args)
+
+            values = None
+            if page_size and len(rows) >= want:
+                field = [f for f in self.Paging.get("fields", []) if f in rows[0]]
+                values = [row.get(field[0]) for row in rows] if field else []
+                in_order = values and None not in values and values == sorted(values, reverse=not ascending)
+                keys = [json.dumps(row, sort_keys=True) for row in rows]
+                if not in_order or not [k for k in keys if k not in boundary]:
+                    if self.debug:
+                        print("Unable to page on [%s], getting the rest of the results at once." % cursor_arg)
+                    args[limit_arg] = total - count + len(boundary) if total else 0
+                    rows = self.get_rows(args)
+                    values = None
+
+            for row in rows:
+                if boundary and json.dumps(row, sort_keys=True) in boundary:
+                    continue
+                yield row
+                count += 1
+                if total and count >= total:
+                    return
+
+            if not values:
+                return
+            if values[-1] != cursor:
+                boundary = set()
+            cursor = values[-1]
+            boundary.update(json.dumps(row, sort_keys=True) for row, v in zip(rows, values) if v == cursor)
+
+    def write_rows(self, rows, output_file=None):
+        """Writes rows as they come, as delimited text, JSON lines or CSV, to stdout or a file."""
+        fmt = self.rows_format or ("jsonl" if getattr(self, "output_format", None) == "json" else "text")
+        f_out = open(os.path.expanduser(output_file), 'w') if output_file else sys.stdout
+        writer = None
+        if fmt == "csv":
+            import csv
+            writer = csv.writer(f_out)
+        delimiter = getattr(self, "output_delimiter", None) or "\t"
+
+        columns = None
+        try:
+            for row in rows:
+                if fmt == "jsonl":
+                    f_out.write(json.dumps(row) + "\n")
+                    continue
+                if columns is None:
+                    columns = list(row.keys()) if isinstance(row, dict) else ["value"]
+                    if not getattr(self, "noheader", None):
+                        if writer:
+                            writer.writerow(columns)
+                        else:
+                            f_out.write(delimiter.join(columns) + "\n")
+                if isinstance(row, dict):
+                    values = [row.get(c) for c in columns]
+                else:
+                    values = [row]
+                values = ["" if v is None else json.dumps(v) if isinstance(v, (dict, list)) else str(v) for v in values]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    f_out.write(delimiter.join(values) + "\n")
+        finally:
+            if output_file:
+                f_out.close()
+            else:
+                f_out.flush()
 
     def get_relative_filename(self, filename):
         return os.path.split(filename)[-1]
@@ -0,0 +1,134 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+Finds and runs ctm-* commands in the current process, using the command
+registry instead of a separate script (and Python process) per command.
+
+This is also the `ctm` command, which runs any other command:
+
+    ctm list-tasks -f "mytask01"
+
+Only the module of the command being run is imported, so startup time
+doesn't depend on how many commands there are.
+"""
+
+import sys
+import importlib
+import traceback
+
+from ctmcommands.registry import COMMANDS, OPTIONS, STANDARD_OPTIONS
+
+completion_script = """
+_ctm()
+{
+    local cur=${COMP_WORDS[COMP_CWORD]}
+    if [ $COMP_CWORD -eq 1 ]; then
+        COMPREPLY=( $(compgen -W "%s" -- "$cur") )
+    elif [[ "$cur" == -* ]]; then
+        COMPREPLY=( $(compgen -W "$(ctm --options ${COMP_WORDS[1]})" -- "$cur") )
+    fi
+}
+complete -o default -F _ctm ctm
+"""
+
+
+def command_names(short=False):
+    if short:
+        return sorted(name[4:] for name in COMMANDS)
+    return sorted(COMMANDS)
+
+
+def find_command(name):
+    """
+    Returns the full command name for 'name', which may be given with or
+    without the 'ctm-' prefix, or None if there is no such command.
+    """
+    if name in COMMANDS:
+        return name
+    if "ctm-%s" % name in COMMANDS:
+        return "ctm-%s" % name
+    return None
+
+
+def load_command(name):
+    """Imports the module for a command, returning its class and entry method name."""
+    module_name, class_name, entry = COMMANDS[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name), entry
+
+
+def run_command(argv, debug=False):
+    """
+    Runs a command, given its argument list (argv[0] is the command name),
+    exactly as if its script had been executed.  Returns the exit code.
+    """
+    name = find_command(argv[0])
+    if not name:
+        print("Unknown command [%s]." % argv[0])
+        return 1
+
+    cls, entry = load_command(name)
+    saved_argv = sys.argv
+    sys.argv = [name] + list(argv[1:])
+    try:
+        cmd = cls()
+        getattr(cmd, entry)()
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        # sys.exit("message") prints the message and exits with 1
+        print(e.code)
+        return 1
+    except EOFError:
+        print("\nThis command asks for confirmation, use --force.")
+        return 1
+    except Exception as ex:
+        if debug:
+            traceback.print_exc(file=sys.stdout)
+        else:
+            print("Error: %s" % (ex,))
+        return 1
+    finally:
+        sys.argv = saved_argv
+
+
+def usage():
+    print("""    Runs a Continuum client command.
+
+    ctm <command> [command options]
+
+    ctm --commands               Lists the available commands.
+    ctm --options <command>      Lists the options of a command.
+    ctm --completion             Prints a bash completion script, for example:
+                                     eval "$(ctm --completion)"
+    ctm <command> --help         Displays help for a command.
+""")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ["-H", "--help"]:
+        usage()
+        sys.exit()
+    elif args[0] == "--dumpdoc":
+        print('<h3 id="{0}" title="Permalink">{0}&nbsp;<a href="#{0}" style="display: margin-left: 1em;">&para;</a></h3>\n'.format('ctm'))
+        usage()
+        sys.exit()
+    elif args[0] == "--commands":
+        print("\n".join(command_names(short=True)))
+        sys.exit()
+    elif args[0] == "--options":
+        name = find_command(args[1]) if len(args) > 1 else None
+        if name:
+            print("\n".join(OPTIONS.get(name, []) + STANDARD_OPTIONS))
+        sys.exit()
+    elif args[0] == "--completion":
+        print(completion_script % " ".join(command_names(short=True)))
+        sys.exit()
+
+    sys.exit(run_command(args, debug=("-D" in args or "--debug" in args)))
@@ -22,20 +22,20 @@ class ConfigurePlugins(ctmcommands.cmd.CSKCommand):
     API = 'configure_plugins'
     Examples = ''''''
     Options = [Param(name='backupfile', short_name='b', long_name='backupfile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='A JSON document formatted as a list of Plugin Configurations.'),
                ]
 
     def main(self):
         import os
 
-        self.plugins = None
+        files = None
         if self.backupfile:
             fn = os.path.expanduser(self.backupfile)
-            with open(fn, 'r') as f_in:
-                if not f_in:
-                    print("Unable to open file [%s]." % fn)
-                self.plugins = f_in.read()
+            if not os.path.isfile(fn):
+                print("Unable to open file [%s]." % fn)
+                self.error_exit()
+            files = {'plugins': fn}
 
-        results = self.call_api(self.API, ['plugins'], verb='POST')
+        results = self.call_api(self.API, [], verb='POST', files=files)
         print(results)
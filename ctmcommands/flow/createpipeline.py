@@ -20,7 +20,7 @@ Returns a Pipeline Object."""
     API = 'create_pipeline'
     Examples = ''''''
     Options = [Param(name='templatefile', short_name='t', long_name='templatefile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='A JSON document formatted as a CSK Pipeline definition.')
                ]
 
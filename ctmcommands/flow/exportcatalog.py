@@ -2,15 +2,20 @@ import os
 import json
 import decimal
 import string
+import hashlib
+import threading
 import ctmcommands.cmd
 from ctmcommands.param import Param
 import shutil
 
 
 indent = "        "
+asset_types = ["projects", "packages", "pipelines", "tasks"]
 
 
-def AsJSON(dict_obj):
+def AsJSON(dict_obj, compact=False):
+    if compact:
+        return json.dumps(dict_obj, default=jsonSerializeHandler, sort_keys=True, separators=(',', ':'))
     return json.dumps(dict_obj, default=jsonSerializeHandler, indent=4, sort_keys=True, separators=(',', ': '))
 
 
@@ -36,7 +41,7 @@ def format_teamname_to_dirname(team_name):
 
 
 def remove_illegal_chars_in_filename(file_name):
-    valid_chars = string.letters + string.digits + " -_."
+    valid_chars = string.ascii_letters + string.digits + " -_."
     valid_file_name = ""
     unique_str = ""
 
@@ -49,32 +54,194 @@ def remove_illegal_chars_in_filename(file_name):
     return (valid_file_name, unique_str)
 
 
-def create_file(dir, file_label, asset):
-    print("%sItem: %s" % (indent, file_label))
-
+def asset_file_name(file_label):
+    """The file name for an asset, None (with a message) if it can't have one."""
     if "/" in file_label or "\\" in file_label:
         print("{0}{0}{1} contains a slash in its name. ".format(indent, file_label))
         print("{0}{0}Skipping...".format(indent))
-        return
+        return None
 
     valid_file_name, unique_str = remove_illegal_chars_in_filename(file_label)
+    if valid_file_name != file_label:
+        valid_file_name += "_" + unique_str
+    return valid_file_name + ".json"
+
+
+def create_file(dir, file_label, asset, compact=False, manifest=None):
+    file_name = asset_file_name(file_label)
+    if not file_name:
+        return
 
     # write this file into the category directory
     try:
-        if valid_file_name != file_label:
-            valid_file_name += "_" + unique_str
-
-        fn = os.path.join(dir, valid_file_name + ".json")
+        fn = os.path.join(dir, file_name)
+        content = AsJSON(asset, compact)
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if manifest and manifest.unchanged(fn, digest):
+            return
         with open(fn, 'w+') as f_out:
             if not f_out:
                 print("Unable to open file [%s]." % fn)
-            f_out.write(AsJSON(asset))
+            f_out.write(content)
+        # only once it's written, so a failed write is tried again next time
+        if manifest:
+            manifest.written(fn, digest)
     except Exception as ex:
+        if manifest:
+            manifest.failed(fn)
         print("{0}{0}Error handling Item {1}".format(indent, file_label))
         print("{0}{0}{1}".format(indent, ex))
         print("{0}{0}Skipping...".format(indent))
 
 
+class CatalogManifest(object):
+    """
+    A content hash of every file in an export, kept in the root of the export
+    directory, so a later export only has to touch the files that changed.
+    """
+
+    FileName = ".catalog_manifest.json"
+
+    def __init__(self, root_dir, full=False):
+        self.root_dir = root_dir
+        self.path = os.path.join(root_dir, self.FileName)
+        self.previous = {}
+        self.current = {}
+        # the team directories exported for each --team, so a team that's gone can be removed
+        self.previous_teams = {}
+        self.teams = {}
+        self.failed_files = set()
+        self.added = 0
+        self.changed = 0
+        self.unchanged_count = 0
+        self.removed = 0
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f_in:
+                    doc = json.loads(f_in.read())
+                self.previous = doc.get("files", {})
+                self.previous_teams = doc.get("teams", {})
+            except ValueError:
+                print("The manifest file [%s] is invalid and will be replaced." % self.path)
+
+        # with no previous manifest (or when asked to) every file is rewritten
+        self.incremental = bool(self.previous) and not full
+
+    def relpath(self, fn):
+        return os.path.relpath(fn, self.root_dir).replace(os.sep, "/")
+
+    def unchanged(self, fn, digest):
+        """
+        Returns True (and records its hash) if the file on disk already has the
+        content with this hash, and needn't be written.
+        """
+        relpath = self.relpath(fn)
+        with self._lock:
+            if self.previous.get(relpath) == digest and self.incremental and os.path.exists(fn):
+                self.current[relpath] = digest
+                self.unchanged_count += 1
+                return True
+        return False
+
+    def written(self, fn, digest):
+        """Records the hash of a file that's been written."""
+        relpath = self.relpath(fn)
+        with self._lock:
+            self.current[relpath] = digest
+            previous = self.previous.get(relpath)
+            if previous == digest:
+                self.unchanged_count += 1
+            elif previous:
+                self.changed += 1
+            else:
+                self.added += 1
+
+    def failed(self, fn):
+        """A file that couldn't be written is left out of the manifest, but not removed."""
+        with self._lock:
+            self.failed_files.add(self.relpath(fn))
+
+    def remove_stale(self, team_dirs=None, team=None):
+        """
+        Deletes files from the previous export that weren't exported this time.
+        If team_dirs is provided (an export of the --team teams) only files in those team
+        directories, or the ones the previous export of the same teams wrote, are considered.
+        """
+        self.teams = dict(self.previous_teams)
+        if team_dirs is not None:
+            self.teams[team] = sorted(team_dirs)
+            team_dirs = set(team_dirs) | set(self.previous_teams.get(team, []))
+        for relpath in sorted(self.previous):
+            if relpath in self.current or relpath in self.failed_files:
+                continue
+            if team_dirs is not None and relpath.split("/")[0] not in team_dirs:
+                # not part of this export, keep it
+                self.current[relpath] = self.previous[relpath]
+                continue
+            fn = os.path.join(self.root_dir, *relpath.split("/"))
+            if os.path.exists(fn):
+                print("%sRemoved: %s" % (indent, relpath))
+                os.remove(fn)
+                # tidy up the asset type and team directories if they are now empty
+                for d in (os.path.dirname(fn), os.path.dirname(os.path.dirname(fn))):
+                    if not os.listdir(d):
+                        os.rmdir(d)
+            self.removed += 1
+
+    def save(self):
+        with open(self.path, 'w') as f_out:
+            f_out.write(json.dumps({"files": self.current, "teams": self.teams}, indent=1, sort_keys=True))
+
+    def summary(self):
+        return "Added: %d, Changed: %d, Removed: %d, Unchanged: %d" % (self.added, self.changed, self.removed, self.unchanged_count)
+
+
+def get_ijson():
+    # ijson is optional, and only imported when a catalog is actually being exported
+    try:
+        import ijson
+        import ijson.common
+        return ijson
+    except ImportError:
+        return None
+
+
+def iter_catalog(fp):
+    """
+    Incrementally parses an export_catalog response from a file-like object,
+    yielding (asset_type, asset) tuples as each asset is read, so the whole
+    catalog is never held in memory.
+
+    Works with the bare catalog document, or one wrapped in the JSON API response.
+    An API error is raised as an Exception.
+    """
+    ijson = get_ijson()
+    prefixes = {}
+    for asset_type in asset_types:
+        prefixes["%s.item" % asset_type] = asset_type
+        prefixes["Response.%s.item" % asset_type] = asset_type
+
+    builder = None
+    error = {}
+    for prefix, event, value in ijson.parse(fp):
+        if builder is not None:
+            builder.event(event, value)
+            if prefix == item_prefix and event == "end_map":
+                yield prefixes[item_prefix], builder.value
+                builder = None
+        elif event == "start_map" and prefix in prefixes:
+            item_prefix = prefix
+            builder = ijson.common.ObjectBuilder()
+            builder.event(event, value)
+        elif prefix in ("ErrorCode", "ErrorMessage") and value:
+            error[prefix] = value
+
+    if error.get("ErrorCode"):
+        raise Exception("%s: %s" % (error.get("ErrorCode"), error.get("ErrorMessage", "")))
+
+
 class ExportCatalog(ctmcommands.cmd.CSKCommand):
 
     Description = 'Export all Project, Pipeline, Package, and Task definitions to a catalog as JSON documents.'
@@ -85,36 +252,103 @@ _To export a catalog of backup files._
     ctm-export-catalog -o myoutputdirectory -t "teamname or teamid"
 '''
     Options = [Param(name='outputdirectory', short_name='o', long_name='outputdirectory',
-                     optional=True, ptype='string',
+                     optional=True, ptype='string', request_param=False,
                      doc='Directory where the output will be saved.  The directory must exist, and should be empty.'),
                Param(name='team', short_name='t', long_name='team',
                      optional=True, ptype='string',
                      doc='''Team "name" or id, To export the assets of specified team. 
                             Multiple teams can be specified using comma. E.g. "Dev Team","Test Team"'''),
+               Param(name='compact', long_name='compact',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='If provided, the JSON documents are written without pretty-printing.'),
+               Param(name='workers', short_name='w', long_name='workers',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Number of threads writing files. (default=4)'),
+               Param(name='full', long_name='full',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='''If provided, every file is rewritten.  Otherwise only the files that changed
+                            since the previous export (according to its manifest) are written, and removed assets are deleted.'''),
+               Param(name='archive', short_name='a', long_name='archive',
+                     optional=True, ptype='string', request_param=False,
+                     doc='''Write the catalog to this archive file instead of a directory, a tar of the usual
+                            directory tree plus a manifest.  Compressed if the name ends in .gz or .tgz.'''),
+               Param(name='output_file', short_name='f', long_name='output_file',
+                     optional=True, ptype='string', request_param=False,
+                     doc='''Save the catalog to the specified file as a single JSON document, as it downloads,
+                            instead of a file per asset.  The JSON is saved as the server sends it, not indented.'''),
                ]
 
-    def save_assets_in_file(self, assets, asset_type, root_dir, team_dir_list):
-        for asset in assets:
-            if asset_type == "tasks":
-                team_name = format_teamname_to_dirname(asset.get("Team"))
-                asset_name = asset.get("Name")
-            else:
-                team_name = format_teamname_to_dirname(asset.get("team"))
-                asset_name = asset.get("name")
-            team_dir = os.path.join(root_dir, team_name)
-            asset_type_dir = os.path.join(team_dir, asset_type)
-
+    def save_asset(self, asset, asset_type, root_dir, team_dir_list):
+        if asset_type == "tasks":
+            team_name = format_teamname_to_dirname(asset.get("Team"))
+            asset_name = asset.get("Name")
+        else:
+            team_name = format_teamname_to_dirname(asset.get("team"))
+            asset_name = asset.get("name")
+        if self._archive:
             if team_name not in team_dir_list:
-                if os.path.isdir(team_dir):
-                    shutil.rmtree(team_dir)
                 team_dir_list.append(team_name)
+            file_name = asset_file_name(asset_name)
+            if file_name:
+                print("%sItem: %s" % (indent, asset_name))
+                self._archive.add("%s/%s/%s" % (team_name, asset_type, file_name), AsJSON(asset, self.compact))
+            return
+
+        team_dir = os.path.join(root_dir, team_name)
+        asset_type_dir = os.path.join(team_dir, asset_type)
+
+        if team_name not in team_dir_list:
+            # without a manifest from a previous export, start the team over
+            if not self._manifest.incremental and os.path.isdir(team_dir):
+                shutil.rmtree(team_dir)
+            team_dir_list.append(team_name)
+
+        if not os.path.exists(asset_type_dir):
+            os.makedirs(asset_type_dir)
 
-            if not os.path.exists(asset_type_dir):
-                os.makedirs(asset_type_dir)
+        # the directories are made here, the file itself is written by the writer pool
+        print("%sItem: %s" % (indent, asset_name))
+        self._slots.acquire()
+        self._pool.apply_async(self.write_file, (asset_type_dir, asset_name, asset))
 
-            create_file(asset_type_dir, asset_name, asset)
+    def write_file(self, dir, file_label, asset):
+        try:
+            create_file(dir, file_label, asset, self.compact, self._manifest)
+        finally:
+            self._slots.release()
+
+    def iter_results(self, response):
+        """
+        Yields (asset_type, asset) for the catalog in the response, parsed as
+        it's downloaded if ijson is installed.
+        """
+        if get_ijson() is not None:
+            response.raw.decode_content = True
+            for item in iter_catalog(response.raw):
+                yield item
+            return
+
+        # the result MIGHT be an error!!!
+        results = self.parse_result(response)
+        if isinstance(results, ctmcommands.cmd.ApiError):
+            raise results
+        for asset_type in asset_types:
+            for asset in (results or {}).get(asset_type, []):
+                yield asset_type, asset
 
     def main(self):
+        if self.output_file:
+            # the catalog is always JSON, whatever the output format
+            self.output_format = "json"
+            size = self.download(self.API, ['team'], output_file=self.output_file, timeout=300)
+            print("Catalog (%d bytes) written to [%s]." % (size, self.output_file))
+            return
+
+        self._archive = None
+        if self.archive:
+            self.export_archive()
+            return
+
         # if no outputdirectory is provided, use the current directory
         if self.outputdirectory:
             rootdir = os.path.expanduser(self.outputdirectory)
@@ -128,27 +362,71 @@ _To export a catalog of backup files._
             print("The directory [%s] does not exist." % (rootdir))
             return
 
-        response = self.call_api(self.API, ['team'], timeout=300)
-        # the result MIGHT be an error!!! in which case the json.loads will fail
+        self._manifest = CatalogManifest(rootdir, self.full)
+
+        response = self.send_request(self.API, ['team'], timeout=300, stream=True)[0]
+
+        from multiprocessing.pool import ThreadPool
+
+        # assets are handed to a pool of writer threads as they are parsed,
+        # the number of assets waiting to be written is bounded to keep memory flat.
+        workers = self.workers if self.workers > 0 else 4
+        self._pool = ThreadPool(workers)
+        self._slots = threading.BoundedSemaphore(workers * 4)
+
+        team_dir_list = []
+        last_type = None
         try:
-            results = json.loads(response)
-        except:
-            print(response)
+            for asset_type, asset in self.iter_results(response):
+                if asset_type != last_type:
+                    print(asset_type.capitalize())
+                    last_type = asset_type
+                self.save_asset(asset, asset_type, rootdir, team_dir_list)
+        except ValueError:
+            print("Response JSON could not be parsed.")
+            return
+        except Exception as ex:
+            print(ex)
             return
+        finally:
+            response.close()
+            self.end_trace()
+            self._pool.close()
+            self._pool.join()
 
-        if not results:
+        if last_type is None:
             print("No results found.")
-            return
+            # with --team the teams may be gone, their files still are
+            if not self.team:
+                return
 
-        team_dir_list = []
-        print("Projects")
-        self.save_assets_in_file(results.get("projects", []), "projects", rootdir, team_dir_list)
+        self._manifest.remove_stale(team_dir_list if self.team else None, self.team)
+        self._manifest.save()
+        print(self._manifest.summary())
 
-        print("Packages")
-        self.save_assets_in_file(results.get("packages", []), "packages", rootdir, team_dir_list)
+    def export_archive(self):
+        from ctmcommands.archive import ArchiveWriter
 
-        print("Pipelines")
-        self.save_assets_in_file(results.get("pipelines", []), "pipelines", rootdir, team_dir_list)
+        response = self.send_request(self.API, ['team'], timeout=300, stream=True)[0]
+        fn = os.path.expanduser(self.archive)
+        self._archive = ArchiveWriter(fn, "catalog")
+
+        last_type = None
+        try:
+            for asset_type, asset in self.iter_results(response):
+                if asset_type != last_type:
+                    print(asset_type.capitalize())
+                    last_type = asset_type
+                self.save_asset(asset, asset_type, None, [])
+        except ValueError:
+            print("Response JSON could not be parsed.")
+            return
+        except Exception as ex:
+            print(ex)
+            return
+        finally:
+            response.close()
+            self.end_trace()
+            self._archive.close()
 
-        print("Tasks")
-        self.save_assets_in_file(results.get("tasks", []), "tasks", rootdir, team_dir_list)
+        print("Catalog (%d files) written to [%s]." % (len(self._archive.files) - 1, fn))
@@ -1,14 +1,19 @@
 import os
 import json
+import time
 import string
 import sys
+import hashlib
 import ctmcommands.cmd
 from ctmcommands.param import Param
+from ctmcommands.statefile import StateFile
 
 from future.utils import itervalues
 
 indent = "        "
 human_readable = "true"
+# in dependency order
+asset_types = ["projects", "packages", "pipelines", "tasks"]
 
 
 def log(msg, force=False):
@@ -17,13 +22,23 @@ def log(msg, force=False):
         print(msg)
 
 
-def read_dir(dir):
-    dir_content = []
-    for file in os.listdir(dir):
-        file_content = read_file(dir, file)
-        if file_content:
-            dir_content.append(file_content)
-    return dir_content
+def read_dir(dir, pool=None):
+    return read_dirs([dir], pool)
+
+
+def read_dirs(dirs, pool=None):
+    """
+    Reads every file in the list of directories.  The files are read in parallel
+    if a thread pool is provided, the results are in directory listing order either way.
+    """
+    files = []
+    for dir in dirs:
+        files.extend([(dir, file) for file in sorted(os.listdir(dir))])
+    if pool:
+        contents = pool.map(lambda f: read_file(*f), files)
+    else:
+        contents = [read_file(*f) for f in files]
+    return [c for c in contents if c]
 
 
 def read_file(dir, file):
@@ -41,6 +56,21 @@ def read_file(dir, file):
         log("{0}{0}Skipping...".format(indent))
 
 
+def read_archive(archive, dirs):
+    """Reads every file in the list of directories of an archive, in name order."""
+    contents = []
+    for dir in dirs:
+        for name in archive.names(dir + "/"):
+            log("%sFile: %s" % (indent, name.split("/")[-1]))
+            try:
+                contents.append(json.loads(archive.read(name).decode("utf-8")))
+            except Exception as ex:
+                log("{0}{0}Error handling Item {1}".format(indent, name))
+                log("{0}{0}{1}".format(indent, ex))
+                log("{0}{0}Skipping...".format(indent))
+    return contents
+
+
 def get_dirname_for_team(team_name):
     valid_chars = "-_@'. %s%s" % (string.ascii_letters, string.digits)
     dirname = ''.join(c for c in team_name if c in valid_chars)
@@ -55,13 +85,14 @@ class ImportCatalog(ctmcommands.cmd.CSKCommand):
     Description = 'Import all Project, Pipeline, Package, and Task definitions from a catalog as JSON documents.'
     API = 'import_catalog'
     GetUserTeamsAPI = 'get_user_teams'
+    StateFileName = '.import_catalog_state'
     Examples = '''
 _To import a catalog from backup files._
 
     ctm-import-catalog -i myinputdirectory -t "teamname or teamid"
 '''
     Options = [Param(name='inputdirectory', short_name='i', long_name='inputdirectory',
-                     optional=True, ptype='string',
+                     optional=True, ptype='string', request_param=False,
                      doc='Directory where the input files are located.  The directory must exist.'),
                Param(name='team', short_name='t', long_name='team',
                      optional=True, ptype='string',
@@ -77,15 +108,40 @@ _To import a catalog from backup files._
                      optional=True, ptype='string',
                      doc='''Team "name" or id. If specified, the catalog will be imported into the specified team, rather than the teams specified in the input files.
                                 This may be useful if you wish to import items from another team or Continuum instance'''),
+               Param(name='workers', short_name='w', long_name='workers',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Number of threads reading files. (default=4)'),
+               Param(name='chunk_size', short_name='c', long_name='chunk_size',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='''If provided, the catalog is submitted in batches of at most this many kilobytes,
+                                projects first, then packages, pipelines and tasks.  Otherwise the whole catalog is sent in one request.'''),
+               Param(name='batch_retries', short_name='r', long_name='batch_retries',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='When submitting in batches, the number of times a failed batch is retried. (default=0)'),
+               Param(name='resume', long_name='resume',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='When submitting in batches, skip the batches that succeeded in a previous failed run.'),
+               Param(name='archive', short_name='a', long_name='archive',
+                     optional=True, ptype='string', request_param=False,
+                     doc='Read the catalog from this archive file (from ctm-export-catalog --archive) instead of a directory.'),
                ]
 
     def main(self):
         global human_readable
-        if self.human_readable:
-            human_readable = self.human_readable
+        human_readable = self.human_readable or "true"
 
+        archive = None
+        if self.archive:
+            from ctmcommands.archive import ArchiveReader
+            fn = os.path.expanduser(self.archive)
+            if not os.path.isfile(fn):
+                log("The archive [%s] does not exist." % (fn), force=True)
+                self.error_exit()
+            archive = ArchiveReader(fn, "catalog")
+            # a --resume state file is kept next to the archive
+            rootdir = os.path.dirname(os.path.abspath(fn))
         # if no inputdirectory is provided, use the current directory
-        if self.inputdirectory:
+        elif self.inputdirectory:
             rootdir = os.path.expanduser(self.inputdirectory)
         else:
             rootdir = os.path.join(os.getcwd(), "continuum_export")
@@ -102,7 +158,11 @@ _To import a catalog from backup files._
             'human_readable': self.human_readable or "true",
             'import_into_team': self.import_into_team,
         }
-        res_teams = json.loads(self.call_api(self.GetUserTeamsAPI)).get("teams")
+        res_teams = self.call_api_result(self.GetUserTeamsAPI)
+        if isinstance(res_teams, ctmcommands.cmd.ApiError):
+            log(res_teams, force=True)
+            self.error_exit()
+        res_teams = res_teams.get("teams")
         user_teams = {team["team_id"]: team["name"] for team in res_teams}
         team_dirs = []
 
@@ -129,55 +189,100 @@ _To import a catalog from backup files._
                 log("Found %d Invalid Team(s)" % int(no_of_invalid_teams))
             else:
                 pass
+        elif archive:
+            team_dirs = [d for d in archive.listdir() if archive.isdir(d)]
         else:
             team_dirs = os.listdir(rootdir)
 
-        log("Projects")
-        project_json = []
-        for team_dir in team_dirs:
-            # Read the projects dir
-            proj_dir = os.path.join(rootdir, team_dir, "projects")
-            if os.path.exists(proj_dir):
-                project_json.extend(read_dir(proj_dir))
-
-        if project_json:
-            import_dict["projects"] = project_json
-
-        log("Packages")
-        package_json = []
-        for team_dir in team_dirs:
-            # Read the packages dir
-            pkg_dir = os.path.join(rootdir, team_dir, "packages")
-            if os.path.exists(pkg_dir):
-                package_json.extend(read_dir(pkg_dir))
-
-        if package_json:
-            import_dict["packages"] = package_json
-
-        log("Pipelines")
-        pipeline_json = []
-        for team_dir in team_dirs:
-            # Read the pipelines dir
-            pipe_dir = os.path.join(rootdir, team_dir, "pipelines")
-            if os.path.exists(pipe_dir):
-                pipeline_json.extend(read_dir(pipe_dir))
-
-        if pipeline_json:
-            import_dict["pipelines"] = pipeline_json
-
-        log("Tasks")
-        task_json = []
-        for team_dir in team_dirs:
-            # Read the tasks dir
-            task_dir = os.path.join(rootdir, team_dir, "tasks")
-            if os.path.exists(task_dir):
-                task_json.extend(read_dir(task_dir))
-
-        if task_json:
-            import_dict["tasks"] = task_json
+        # read the files of each asset type, in dependency order
+        from multiprocessing.pool import ThreadPool
+        workers = self.workers if self.workers > 0 else 4
+        pool = ThreadPool(workers)
+        try:
+            for asset_type in asset_types:
+                log(asset_type.capitalize())
+                if archive:
+                    assets = read_archive(archive, ["%s/%s" % (team_dir, asset_type) for team_dir in team_dirs])
+                else:
+                    dirs = [os.path.join(rootdir, team_dir, asset_type) for team_dir in team_dirs]
+                    assets = read_dirs([d for d in dirs if os.path.exists(d)], pool)
+                if assets:
+                    import_dict[asset_type] = assets
+        finally:
+            pool.close()
+            pool.join()
 
         if self.team:
             import_dict['team'] = self.team
 
+        if self.chunk_size > 0:
+            self.submit_batches(rootdir, import_dict)
+            return
+
         response = self.call_api(self.API, data=json.dumps(import_dict), verb='POST', content_type="application/json")
         log(response, force=True)
+
+    def make_batches(self, import_dict):
+        """
+        Splits the import into batches of at most chunk_size kilobytes, each with
+        a single asset type.  The batches are in dependency order.
+        """
+        options = dict((k, v) for k, v in import_dict.items() if k not in asset_types)
+        limit = self.chunk_size * 1024
+        batches = []
+        for asset_type in asset_types:
+            assets = []
+            size = 0
+            for asset in import_dict.get(asset_type, []):
+                asset_size = len(json.dumps(asset))
+                # an asset bigger than the limit gets a batch of its own
+                if assets and size + asset_size > limit:
+                    batches.append(dict(options, **{asset_type: assets}))
+                    assets = []
+                    size = 0
+                assets.append(asset)
+                size += asset_size
+            if assets:
+                batches.append(dict(options, **{asset_type: assets}))
+        return batches
+
+    def submit_batches(self, rootdir, import_dict):
+        # we need JSON responses to tell if a batch failed
+        self.output_format = "json"
+
+        batches = self.make_batches(import_dict)
+        state = StateFile(os.path.join(rootdir, self.StateFileName), resume=self.resume)
+
+        for i, batch in enumerate(batches):
+            body = json.dumps(batch, sort_keys=True)
+            key = hashlib.sha256(body.encode("utf-8")).hexdigest()
+            asset_type = [t for t in asset_types if t in batch][0]
+            label = "Batch %d of %d (%d %s)" % (i + 1, len(batches), len(batch[asset_type]), asset_type)
+            if key in state:
+                log("%s: already imported, skipping." % label, force=True)
+                continue
+
+            for attempt in range(max(self.batch_retries, 0) + 1):
+                if attempt:
+                    log("%s: retrying..." % label, force=True)
+                    time.sleep(2 ** attempt)
+                try:
+                    response = self.call_api(self.API, data=body, verb='POST', content_type="application/json")
+                    error = ctmcommands.cmd.response_error(response)
+                except Exception as ex:
+                    response = None
+                    error = ex
+                if not error:
+                    break
+                log("%s: failed. %s" % (label, error), force=True)
+
+            if error:
+                # later batches may depend on this one, so stop here
+                log("Run again with --resume to continue from the failed batch.", force=True)
+                self.error_exit()
+
+            log(response)
+            log("%s: done." % label, force=True)
+            state.add(key)
+
+        state.remove()
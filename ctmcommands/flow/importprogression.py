@@ -20,7 +20,7 @@ Returns success or error."""
     API = 'import_progression'
     Examples = ''''''
     Options = [Param(name='backupfile', short_name='b', long_name='backupfile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='A JSON document formatted as a Progression backup.'),
                Param(name='overwrite', short_name='o', long_name='overwrite',
                      optional=True, ptype='string',
@@ -11,7 +11,7 @@ Returns a Project Object."""
     API = 'import_project'
     Examples = ''''''
     Options = [Param(name='backupfile', short_name='b', long_name='backupfile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='A JSON document formatted as a complete Project backup.'),
                Param(name='overwrite', short_name='o', long_name='overwrite',
                      optional=True, ptype='string',
@@ -21,13 +21,13 @@ Returns a Project Object."""
     def main(self):
         import os
 
-        self.backup = None
+        files = None
         if self.backupfile:
             fn = os.path.expanduser(self.backupfile)
-            with open(fn, 'r') as f_in:
-                if not f_in:
-                    print("Unable to open file [%s]." % fn)
-                self.backup = f_in.read()
+            if not os.path.isfile(fn):
+                print("Unable to open file [%s]." % fn)
+                self.error_exit()
+            files = {'backup': fn}
 
-        results = self.call_api(self.API, ['backup', 'overwrite'], verb='POST')
+        results = self.call_api(self.API, ['overwrite'], verb='POST', files=files)
         print(results)
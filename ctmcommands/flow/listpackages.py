@@ -29,6 +29,12 @@ _List all Package Definitions
                           '0 for unlimited. (Default is 100.)'))
                ]
 
+    Paging = {"limit": "limit"}
+
     def main(self):
+        if self.page_size or self.rows_format:
+            self.write_rows(self.iter_rows(['filter', 'limit']))
+            return
+
         results = self.call_api(self.API, ['filter', 'limit'])
         print(results)
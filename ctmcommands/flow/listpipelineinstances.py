@@ -36,6 +36,13 @@ _List all Pipeline Instances
                      optional=True, ptype='integer',
                      doc='Limit the number of results.  (0 for all results, 100 if omitted.')]
 
+    Paging = {"limit": "limit", "cursor": "since", "order": "asc",
+              "fields": ["created_dt", "created", "CreatedDT", "_created"]}
+
     def main(self):
+        if self.page_size or self.rows_format:
+            self.write_rows(self.iter_rows(['definition', 'project', 'group', 'since', 'limit']))
+            return
+
         results = self.call_api(self.API, ['definition', 'project', 'group', 'since', 'limit'])
         print(results)
@@ -28,6 +28,12 @@ _List all Projects
                      doc=('The maximum number of items to retrieve, or '
                           '0 for unlimited. (Default is unlimited.)'))]
 
+    Paging = {"limit": "limit"}
+
     def main(self):
+        if self.page_size or self.rows_format:
+            self.write_rows(self.iter_rows(['filter', 'limit']))
+            return
+
         results = self.call_api(self.API, ['filter', 'limit'])
         print(results)
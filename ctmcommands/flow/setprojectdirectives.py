@@ -50,7 +50,7 @@ Returns {"result": "success"} on success."""
     API = 'set_project_directives'
     Examples = ''''''
     Options = [Param(name='directivesfile', short_name='d', long_name='directivesfile',
-                     optional=False, ptype='string',
+                     optional=False, ptype='string', request_param=False,
                      doc='A JSON document containing a project_id and directives.')
                ]
 
@@ -0,0 +1,191 @@
+#########################################################################
+#
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#
+#
+#########################################################################
+
+import sys
+import json
+import time
+
+import ctmcommands.cmd
+from ctmcommands.param import Param
+
+finished_statuses = ["success", "failure", "failed", "canceled", "cancelled", "error", "completed"]
+# an instance the API reports an error for this many times in a row (it doesn't exist, say) is given up on
+max_api_errors = 3
+
+
+def list_key(old, new):
+    """
+    The property identifying the items of two lists (stages, steps...) if they're
+    all objects with a unique value for one, so changes can be matched by name
+    instead of position.
+    """
+    items = old + new
+    if not items or not all(isinstance(i, dict) for i in items):
+        return None
+    for key in ["id", "_id", "name", "Name"]:
+        for lst in (old, new):
+            values = [i.get(key) for i in lst]
+            if None in values or len(set(values)) != len(values):
+                break
+        else:
+            return key
+    return None
+
+
+def diff(old, new, path=None):
+    """
+    Yields the differences between two snapshots as (op, path, old value, new value),
+    where op is 'add', 'remove' or 'change' and path is a list of keys from the root.
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k in sorted(set(old) | set(new), key=str):
+            if k not in new:
+                yield "remove", path + [k], old[k], None
+            elif k not in old:
+                yield "add", path + [k], None, new[k]
+            else:
+                for d in diff(old[k], new[k], path + [k]):
+                    yield d
+    elif isinstance(old, list) and isinstance(new, list):
+        key = list_key(old, new)
+        if key:
+            old_items = dict((i[key], i) for i in old)
+            new_items = dict((i[key], i) for i in new)
+        else:
+            old_items = dict(enumerate(old))
+            new_items = dict(enumerate(new))
+        for k in list(old_items) + [k for k in new_items if k not in old_items]:
+            if k not in new_items:
+                yield "remove", path + [k], old_items[k], None
+            elif k not in old_items:
+                yield "add", path + [k], None, new_items[k]
+            else:
+                for d in diff(old_items[k], new_items[k], path + [k]):
+                    yield d
+    elif old != new:
+        yield "change", path, old, new
+
+
+class Watch(object):
+    """The last snapshot of one Pipeline Instance, and when to look at it again."""
+
+    def __init__(self, pi, interval):
+        self.pi = pi
+        self.snapshot = None
+        self.interval = interval
+        self.next_poll = 0
+        self.api_errors = 0
+        self.failed = False
+
+    @property
+    def finished(self):
+        if self.failed:
+            return True
+        status = self.snapshot.get("status") if isinstance(self.snapshot, dict) else None
+        return str(status).lower() in finished_statuses
+
+
+class WatchPipelineInstance(ctmcommands.cmd.CSKCommand):
+
+    Description = '''Watches one or more Pipeline Instances, writing changes as JSON lines.
+
+The first event for each instance is a "snapshot" of the whole instance, including stages,
+steps and plugins.  After that only the differences are written, one "add", "remove"
+or "change" event per changed value, with the path to the value.  Stages and steps are
+identified by name in the path where possible.
+
+Instances are checked less often while they aren't changing, and finished instances
+only at the maximum interval.  An instance the API keeps returning an error for (one that
+doesn't exist) gets a "failed" event and isn't watched any more, the exit code is then 1.'''
+    API = 'get_pipelineinstance'
+    Examples = '''
+_To watch two pipeline instances until both are finished_
+
+    ctm-watch-pipelineinstance -i "5ae9d1d8f8b0a95c45d7e0a1,5ae9d1d8f8b0a95c45d7e0a2" --exit
+'''
+    Options = [Param(name='pi', short_name='i', long_name='pi',
+                     optional=False, ptype='string',
+                     doc='A comma separated list of Pipeline Instance IDs or Names.'),
+               Param(name='interval', long_name='interval',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Initial number of seconds between checks of an instance. (default=2)'),
+               Param(name='max_interval', long_name='max_interval',
+                     optional=True, ptype='integer', request_param=False,
+                     doc='Maximum number of seconds between checks of an instance. (default=60)'),
+               Param(name='exit', long_name='exit',
+                     optional=True, ptype='boolean', request_param=False,
+                     doc='Stop once every instance is finished.')
+               ]
+
+    def emit(self, event):
+        print(json.dumps(event, sort_keys=True))
+        sys.stdout.flush()
+
+    def poll(self, watch):
+        try:
+            current = self.call_api_result(self.API, data={"pi": watch.pi, "include_stages": "true"})
+        except Exception as ex:
+            # the server may be back by the next check
+            self.emit({"pi": watch.pi, "event": "error", "error": str(ex)})
+            return False
+        if isinstance(current, ctmcommands.cmd.ApiError):
+            self.emit({"pi": watch.pi, "event": "error", "error": str(current)})
+            watch.api_errors += 1
+            if watch.api_errors >= max_api_errors:
+                watch.failed = True
+                self.emit({"pi": watch.pi, "event": "failed", "error": str(current)})
+            return False
+        watch.api_errors = 0
+
+        if watch.snapshot is None:
+            self.emit({"pi": watch.pi, "event": "snapshot", "value": current})
+            changed = True
+        else:
+            changed = False
+            for op, path, old, new in diff(watch.snapshot, current):
+                self.emit({"pi": watch.pi, "event": op, "path": path, "old": old, "new": new})
+                changed = True
+        watch.snapshot = current
+        return changed
+
+    def main(self):
+        # we're gonna be taking all API responses as JSON
+        self.output_format = "json"
+
+        min_interval = self.interval or 2
+        max_interval = max(self.max_interval or 60, min_interval)
+        watches = [Watch(pi.strip(), min_interval) for pi in self.pi.split(",") if pi.strip()]
+
+        failed = []
+        while watches:
+            now = time.time()
+            for watch in [w for w in watches if w.next_poll <= now]:
+                changed = self.poll(watch)
+                if watch.failed:
+                    watches.remove(watch)
+                    failed.append(watch.pi)
+                    continue
+                if watch.finished:
+                    if self.exit:
+                        watches.remove(watch)
+                        continue
+                    watch.interval = max_interval
+                elif changed:
+                    watch.interval = min_interval
+                else:
+                    watch.interval = min(watch.interval * 1.5, max_interval)
+                watch.next_poll = time.time() + watch.interval
+
+            if watches:
+                time.sleep(max(min(w.next_poll for w in watches) - time.time(), 0))
+
+        if failed:
+            sys.stderr.write("Unable to watch Pipeline Instance(s): %s\n" % ", ".join(failed))
+            self.error_exit()
@@ -22,7 +22,10 @@
 
 import os
 
-from past.builtins import basestring
+try:
+    basestring
+except NameError:
+    basestring = str
 
 
 class Converter(object):
@@ -0,0 +1,276 @@
+# This file is generated by ctmcommands/buildregistry.py from the scripts in bin/.
+# Do not edit it by hand.
+
+COMMANDS = {
+    'ctm-add-project-source': ('ctmcommands.flow.addprojectsource', 'AddProjectSource', 'main'),
+    'ctm-add-team-user': ('ctmcommands.admin.addteamuser', 'AddTeamUser', 'main'),
+    'ctm-batch': ('ctmcommands.admin.batch', 'Batch', 'main'),
+    'ctm-cancel-pipelineinstance': ('ctmcommands.flow.cancelpipelineinstance', 'CancelPipelineInstance', 'main'),
+    'ctm-complete-activity': ('ctmcommands.flow.completeactivity', 'CompleteActivity', 'main'),
+    'ctm-configure-plugin': ('ctmcommands.flow.configureplugin', 'ConfigurePlugin', 'main'),
+    'ctm-configure-plugins': ('ctmcommands.flow.configureplugins', 'ConfigurePlugins', 'main'),
+    'ctm-copy-project': ('ctmcommands.flow.copyproject', 'CopyProject', 'main'),
+    'ctm-create-asset': ('ctmcommands.automate.createasset', 'CreateAsset', 'main'),
+    'ctm-create-credential': ('ctmcommands.automate.createcredential', 'CreateCredential', 'main'),
+    'ctm-create-package': ('ctmcommands.flow.createpackage', 'CreatePackage', 'main'),
+    'ctm-create-pipeline': ('ctmcommands.flow.createpipeline', 'CreatePipeline', 'main'),
+    'ctm-create-progression': ('ctmcommands.flow.createprogression', 'CreateProgression', 'main'),
+    'ctm-create-project': ('ctmcommands.flow.createproject', 'CreateProject', 'main'),
+    'ctm-create-tag': ('ctmcommands.admin.createtag', 'CreateTag', 'main'),
+    'ctm-create-task': ('ctmcommands.automate.createtask', 'CreateTask', 'main'),
+    'ctm-create-team': ('ctmcommands.admin.createteam', 'CreateTeam', 'main'),
+    'ctm-create-user': ('ctmcommands.admin.createuser', 'CreateUser', 'main'),
+    'ctm-create-webhook': ('ctmcommands.admin.createwebhook', 'CreateWebhook', 'main'),
+    'ctm-delete-cloud-keypair': ('ctmcommands.automate.deletecloudkeypair', 'DeleteCloudKeypair', 'main'),
+    'ctm-delete-credential': ('ctmcommands.automate.deletecredential', 'DeleteCredential', 'main'),
+    'ctm-delete-package': ('ctmcommands.flow.deletepackage', 'DeletePackage', 'main'),
+    'ctm-delete-pipeline': ('ctmcommands.flow.deletepipeline', 'DeletePipeline', 'main'),
+    'ctm-delete-pipelinegroup': ('ctmcommands.flow.deletepipelinegroup', 'DeletePipelineGroup', 'main'),
+    'ctm-delete-pipelineinstance': ('ctmcommands.flow.deletepipelineinstance', 'DeletePipelineInstance', 'main'),
+    'ctm-delete-plan': ('ctmcommands.automate.deleteplan', 'DeletePlan', 'main'),
+    'ctm-delete-progression': ('ctmcommands.flow.deleteprogression', 'DeleteProgression', 'main'),
+    'ctm-delete-project': ('ctmcommands.flow.deleteproject', 'DeleteProject', 'main'),
+    'ctm-delete-task': ('ctmcommands.automate.deletetask', 'DeleteTask', 'main'),
+    'ctm-delete-user': ('ctmcommands.admin.deleteuser', 'DeleteUser', 'main'),
+    'ctm-deliver-packagerevision': ('ctmcommands.flow.deliverpackagerevision', 'DeliverPackageRevision', 'main'),
+    'ctm-describe-api': ('ctmcommands.admin.listmethods', 'ListMethods', 'main'),
+    'ctm-export-canvas': ('ctmcommands.canvas.exportcanvas', 'ExportCanvas', 'main'),
+    'ctm-export-catalog': ('ctmcommands.flow.exportcatalog', 'ExportCatalog', 'main'),
+    'ctm-export-package': ('ctmcommands.flow.exportpackage', 'ExportPackage', 'main'),
+    'ctm-export-pipeline': ('ctmcommands.flow.exportpipeline', 'ExportPipeline', 'main'),
+    'ctm-export-plugins': ('ctmcommands.flow.exportplugins', 'ExportPlugins', 'main'),
+    'ctm-export-progression': ('ctmcommands.flow.exportprogression', 'ExportProgression', 'main'),
+    'ctm-export-project': ('ctmcommands.flow.exportproject', 'ExportProject', 'main'),
+    'ctm-export-task': ('ctmcommands.automate.exporttask', 'ExportTask', 'main'),
+    'ctm-export-tasks': ('ctmcommands.automate.exporttasks', 'ExportTasks', 'main'),
+    'ctm-get-active-tasks': ('ctmcommands.automate.getactivetasks', 'GetActiveTasks', 'main'),
+    'ctm-get-asset': ('ctmcommands.automate.getasset', 'GetAsset', 'main'),
+    'ctm-get-cloud': ('ctmcommands.automate.getcloud', 'GetCloud', 'main'),
+    'ctm-get-license': ('ctmcommands.admin.getlicense', 'GetLicense', 'main'),
+    'ctm-get-next-id': ('ctmcommands.flow.getnextid', 'GetNextId', 'main'),
+    'ctm-get-package': ('ctmcommands.flow.getpackage', 'GetPackage', 'main'),
+    'ctm-get-package-manifest': ('ctmcommands.flow.getpackagemanifest', 'GetPackageManifest', 'main'),
+    'ctm-get-piartifacts': ('ctmcommands.flow.getpiartifacts', 'GetPIArtifacts', 'main'),
+    'ctm-get-pichanges': ('ctmcommands.flow.getpichanges', 'GetPIChanges', 'main'),
+    'ctm-get-pidata': ('ctmcommands.flow.getpidata', 'GetPIData', 'main'),
+    'ctm-get-pipeline': ('ctmcommands.flow.getpipeline', 'GetPipeline', 'main'),
+    'ctm-get-pipelineinstance': ('ctmcommands.flow.getpipelineinstance', 'GetPipelineInstance', 'main'),
+    'ctm-get-piworkitems': ('ctmcommands.flow.getpiworkitems', 'GetPIWorkitems', 'main'),
+    'ctm-get-plugin-schema': ('ctmcommands.flow.getpluginschema', 'GetPluginSchema', 'main'),
+    'ctm-get-progression-details': ('ctmcommands.flow.getprogressiondetails', 'GetProgressionDetails', 'main'),
+    'ctm-get-project': ('ctmcommands.flow.getproject', 'GetProject', 'main'),
+    'ctm-get-settings': ('ctmcommands.admin.getsettings', 'GetSettings', 'main'),
+    'ctm-get-submission': ('ctmcommands.flow.getsubmission', 'GetSubmission', 'main'),
+    'ctm-get-system-log': ('ctmcommands.admin.getsystemlog', 'GetSystemLog', 'main'),
+    'ctm-get-task': ('ctmcommands.automate.gettask', 'GetTask', 'main'),
+    'ctm-get-task-instance': ('ctmcommands.automate.gettaskinstance', 'GetTaskInstance', 'main'),
+    'ctm-get-task-instances': ('ctmcommands.automate.gettaskinstances', 'GetTaskInstances', 'main'),
+    'ctm-get-task-log': ('ctmcommands.automate.gettasklog', 'GetTaskLog', 'main'),
+    'ctm-get-task-plans': ('ctmcommands.automate.gettaskplans', 'GetTaskPlans', 'main'),
+    'ctm-get-task-schedules': ('ctmcommands.automate.gettaskschedules', 'GetTaskSchedules', 'main'),
+    'ctm-get-worklist': ('ctmcommands.flow.getworklist', 'GetWorklist', 'main'),
+    'ctm-import-backup': ('ctmcommands.automate.importbackup', 'ImportBackup', 'main'),
+    'ctm-import-canvas': ('ctmcommands.canvas.importcanvas', 'ImportCanvas', 'main'),
+    'ctm-import-catalog': ('ctmcommands.flow.importcatalog', 'ImportCatalog', 'main'),
+    'ctm-import-package': ('ctmcommands.flow.importpackage', 'ImportPackage', 'main'),
+    'ctm-import-pipeline': ('ctmcommands.flow.importpipeline', 'ImportPipeline', 'main'),
+    'ctm-import-progression': ('ctmcommands.flow.importprogression', 'ImportProgression', 'main'),
+    'ctm-import-project': ('ctmcommands.flow.importproject', 'ImportProject', 'main'),
+    'ctm-import-task': ('ctmcommands.automate.importtask', 'ImportTask', 'main'),
+    'ctm-initiate-pipeline': ('ctmcommands.flow.initiatepipeline', 'InitiatePipeline', 'main'),
+    'ctm-install-add-on': ('ctmcommands.admin.installaddon', 'InstallAddOn', 'main'),
+    'ctm-install-license': ('ctmcommands.admin.installlicense', 'InstallLicense', 'main'),
+    'ctm-invoke-plugin': ('ctmcommands.flow.invokeplugin', 'InvokePlugin', 'main'),
+    'ctm-list-add-ons': ('ctmcommands.admin.listaddons', 'ListAddOns', 'main'),
+    'ctm-list-canvas-items': ('ctmcommands.canvas.listcanvasitems', 'ListCanvasItems', 'main'),
+    'ctm-list-changes': ('ctmcommands.flow.listchanges', 'ListChanges', 'main'),
+    'ctm-list-cloud-accounts': ('ctmcommands.automate.listcloudaccounts', 'ListCloudAccounts', 'main'),
+    'ctm-list-clouds': ('ctmcommands.automate.listclouds', 'ListClouds', 'main'),
+    'ctm-list-packages': ('ctmcommands.flow.listpackages', 'ListPackages', 'main'),
+    'ctm-list-pipelinegroups': ('ctmcommands.flow.listpipelinegroups', 'ListPipelineGroups', 'main'),
+    'ctm-list-pipelineinstances': ('ctmcommands.flow.listpipelineinstances', 'ListPipelineInstances', 'main'),
+    'ctm-list-pipelines': ('ctmcommands.flow.listpipelines', 'ListPipelines', 'main'),
+    'ctm-list-processes': ('ctmcommands.admin.listprocesses', 'ListProcesses', 'main_cli'),
+    'ctm-list-progressions': ('ctmcommands.flow.listprogressions', 'ListProgressions', 'main'),
+    'ctm-list-projects': ('ctmcommands.flow.listprojects', 'ListProjects', 'main'),
+    'ctm-list-tasks': ('ctmcommands.automate.listtasks', 'ListTasks', 'main'),
+    'ctm-list-users': ('ctmcommands.admin.listusers', 'ListUsers', 'main'),
+    'ctm-mirror': ('ctmcommands.admin.mirror', 'Mirror', 'main'),
+    'ctm-override-control': ('ctmcommands.flow.overridecontrol', 'OverrideControl', 'main'),
+    'ctm-powershell': ('ctmcommands.automate.winrmcommand', 'WinRMPS', 'main'),
+    'ctm-promote-revision': ('ctmcommands.flow.promoterevision', 'PromoteRevision', 'main'),
+    'ctm-register-artifact': ('ctmcommands.flow.registerartifact', 'RegisterArtifact', 'main'),
+    'ctm-remove-team': ('ctmcommands.admin.removeteam', 'RemoveTeam', 'main'),
+    'ctm-remove-team-user': ('ctmcommands.admin.removeteamuser', 'RemoveTeamUser', 'main'),
+    'ctm-rerun-pipelineinstance': ('ctmcommands.flow.rerunpipelineinstance', 'RerunPipelineInstance', 'main'),
+    'ctm-reset-password': ('ctmcommands.admin.resetpassword', 'ResetPassword', 'main'),
+    'ctm-resubmit-change': ('ctmcommands.flow.resubmitchange', 'ResubmitChange', 'main'),
+    'ctm-retry-pipelineinstance': ('ctmcommands.flow.retrypipelineinstance', 'RetryPipelineInstance', 'main'),
+    'ctm-reversion-packagerevision': ('ctmcommands.flow.reversionpackagerevision', 'ReversionPackageRevision', 'main'),
+    'ctm-run-task': ('ctmcommands.automate.runtask', 'RunTask', 'main'),
+    'ctm-schedule-tasks': ('ctmcommands.automate.scheduletasks', 'ScheduleTasks', 'main'),
+    'ctm-send-message': ('ctmcommands.admin.sendmessage', 'SendMessage', 'main'),
+    'ctm-set-pi-description': ('ctmcommands.flow.setpidescription', 'SetPIDescription', 'main'),
+    'ctm-set-pi-global-summary': ('ctmcommands.flow.setpiglobalsummary', 'SetPIGlobalSummary', 'main'),
+    'ctm-set-pipelinegroup-number': ('ctmcommands.flow.setpigroupnumber', 'SetPIGroupNumber', 'main'),
+    'ctm-set-project-directives': ('ctmcommands.flow.setprojectdirectives', 'SetProjectDirectives', 'main'),
+    'ctm-shell': ('ctmcommands.shell', 'Shell', 'main'),
+    'ctm-stop-task': ('ctmcommands.automate.stoptask', 'StopTask', 'main'),
+    'ctm-test-messagehub': ('ctmcommands.admin.testmsghub', 'TestMessageHub', 'main'),
+    'ctm-testbamboo': ('ctmcommands.flow.testbamboo', 'TestBamboo', 'main'),
+    'ctm-testbitbucket': ('ctmcommands.flow.testbitbucket', 'TestBitBucket', 'main'),
+    'ctm-testgitlab': ('ctmcommands.flow.testgitlab', 'TestGitlab', 'main'),
+    'ctm-testhipchat': ('ctmcommands.flow.testhipchat', 'TestHipChat', 'main'),
+    'ctm-testjenkins': ('ctmcommands.flow.testjenkins', 'TestJenkins', 'main'),
+    'ctm-testjira': ('ctmcommands.flow.testjira', 'TestJira', 'main'),
+    'ctm-testoctopus': ('ctmcommands.flow.testoctopus', 'TestOctopus', 'main'),
+    'ctm-testopenshift': ('ctmcommands.flow.testopenshift', 'TestOpenShift', 'main'),
+    'ctm-testsonarqube': ('ctmcommands.flow.testsonarqube', 'TestSonarqube', 'main'),
+    'ctm-testteamcity': ('ctmcommands.flow.testteamcity', 'TestTeamCity', 'main'),
+    'ctm-testversionone': ('ctmcommands.flow.testversionone', 'TestVersionOne', 'main'),
+    'ctm-uninstall-add-on': ('ctmcommands.admin.uninstalladdon', 'UninstallAddOn', 'main'),
+    'ctm-untag-object': ('ctmcommands.admin.untagobject', 'UntagObject', 'main'),
+    'ctm-update-user': ('ctmcommands.admin.updateuser', 'UpdateUser', 'main'),
+    'ctm-version': ('ctmcommands.admin.version', 'Version', 'main'),
+    'ctm-wait-task-instances': ('ctmcommands.automate.waittaskinstances', 'WaitTaskInstances', 'main'),
+    'ctm-watch-pipelineinstance': ('ctmcommands.flow.watchpipelineinstance', 'WatchPipelineInstance', 'main'),
+    'ctm-winrm': ('ctmcommands.automate.winrmcommand', 'WinRM', 'main'),
+}
+
+OPTIONS = {
+    'ctm-add-project-source': ['-p', '--project', '-o', '--origin', '-s', '--secret'],
+    'ctm-add-team-user': ['-t', '--team', '-u', '--user', '-r', '--team_role'],
+    'ctm-batch': ['-f', '--manifest', '-n', '--concurrency', '-r', '--rate'],
+    'ctm-cancel-pipelineinstance': ['-i', '--pi'],
+    'ctm-complete-activity': ['-p', '--package', '-h', '--phase', '-a', '--activity', '-n', '--notes', '-r', '--revision', '-f', '--full_version', '--forcewith', '--failure', '-t', '--completion_time', '-z', '--timezone'],
+    'ctm-configure-plugin': ['-b', '--backupfile'],
+    'ctm-configure-plugins': ['-b', '--backupfile'],
+    'ctm-copy-project': ['-p', '--project', '-n', '--newname'],
+    'ctm-create-asset': ['-n', '--name', '-s', '--status', '-a', '--address', '-t', '--port', '-d', '--db_name', '-u', '--user', '-p', '--password', '-c', '--shared_credential', '--conn_string'],
+    'ctm-create-credential': ['-n', '--name', '-d', '--description', '-u', '--username', '-p', '--password', '-o', '--domain', '-v', '--privileged'],
+    'ctm-create-package': ['-n', '--name', '-t', '--team', '-d', '--description', '-p', '--progression'],
+    'ctm-create-pipeline': ['-t', '--templatefile'],
+    'ctm-create-progression': ['-n', '--name', '-d', '--description'],
+    'ctm-create-project': ['-n', '--name', '-t', '--team', '-d', '--description'],
+    'ctm-create-tag': ['-n', '--name', '-d', '--description'],
+    'ctm-create-task': ['-n', '--name', '-t', '--team', '-d', '--desc', '-c', '--code'],
+    'ctm-create-team': ['-n', '--name', '-d', '--description'],
+    'ctm-create-user': ['-u', '--user', '-n', '--name', '-t', '--teams', '-r', '--role', '-p', '--password', '-e', '--email', '-a', '--authtype', '-f', '--forcechange', '-s', '--status', '-x', '--expires', '-g', '--groups', '-c', '--contributors', '--get_token'],
+    'ctm-create-webhook': ['-n', '--name', '-d', '--destinationurl'],
+    'ctm-delete-cloud-keypair': ['-c', '--cloud', '-n', '--name'],
+    'ctm-delete-credential': ['-c', '--credential'],
+    'ctm-delete-package': ['-p', '--package', '--preserve'],
+    'ctm-delete-pipeline': ['-p', '--pipeline'],
+    'ctm-delete-pipelinegroup': ['-i', '--pg'],
+    'ctm-delete-pipelineinstance': ['-i', '--pi'],
+    'ctm-delete-plan': ['-p', '--plan_id'],
+    'ctm-delete-progression': ['-p', '--progression'],
+    'ctm-delete-project': ['-p', '--project', '--preserve'],
+    'ctm-delete-task': ['-t', '--task', '-f', '--force_delete'],
+    'ctm-delete-user': ['-u', '--user'],
+    'ctm-deliver-packagerevision': ['-p', '--package', '-r', '--revision', '-f', '--full_version'],
+    'ctm-describe-api': ['-l', '--listonly'],
+    'ctm-export-canvas': ['-p', '--project', '-c', '--component', '-r', '--repository', '-o', '--outputdirectory', '--printoutput', '-a', '--archive'],
+    'ctm-export-catalog': ['-o', '--outputdirectory', '-t', '--team', '--compact', '-w', '--workers', '--full', '-a', '--archive', '-f', '--output_file'],
+    'ctm-export-package': ['-p', '--package'],
+    'ctm-export-pipeline': ['-p', '--pipeline'],
+    'ctm-export-plugins': ['-n', '--name'],
+    'ctm-export-progression': ['-p', '--progression'],
+    'ctm-export-project': ['-p', '--project'],
+    'ctm-export-task': ['-t', '--task', '-r', '--include_refs', '-f', '--output_file'],
+    'ctm-export-tasks': ['-f', '--filter', '-r', '--include_refs', '-d', '--output_dir', '-a', '--archive', '-w', '--workers'],
+    'ctm-get-active-tasks': ['-f', '--filter', '-r', '--records'],
+    'ctm-get-asset': ['-a', '--asset'],
+    'ctm-get-cloud': ['-n', '--name'],
+    'ctm-get-license': [],
+    'ctm-get-next-id': ['-n', '--name', '-r', '--reseed', '-f', '--fallback'],
+    'ctm-get-package': ['-p', '--package'],
+    'ctm-get-package-manifest': ['-p', '--package', '-v', '--version', '-f', '--from', '-t', '--to', '-t', '--to', '--verbose'],
+    'ctm-get-piartifacts': ['-i', '--pi'],
+    'ctm-get-pichanges': ['-i', '--pi'],
+    'ctm-get-pidata': ['-i', '--pi', '-l', '--lookup'],
+    'ctm-get-pipeline': ['-p', '--pipeline'],
+    'ctm-get-pipelineinstance': ['-i', '--pi', '-s', '--include_stages'],
+    'ctm-get-piworkitems': ['-i', '--pi'],
+    'ctm-get-plugin-schema': ['-p', '--plugin_name'],
+    'ctm-get-progression-details': ['-p', '--progression', '-P', '--packages', '-t', '--teams'],
+    'ctm-get-project': ['-p', '--project'],
+    'ctm-get-settings': ['-m', '--module'],
+    'ctm-get-submission': ['-q', '--query'],
+    'ctm-get-system-log': ['-i', '--object_id', '-t', '--object_type', '-u', '--user', '-l', '--log_type', '-a', '--action', '-f', '--filter', '--from', '--to', '-r', '--records', '--output_file', '--page_size', '--rows_format'],
+    'ctm-get-task': ['-t', '--task', '-i', '--include_code'],
+    'ctm-get-task-instance': ['-i', '--instance'],
+    'ctm-get-task-instances': ['-f', '--filter', '-s', '--status', '--from', '--to', '-r', '--records', '--page_size', '--rows_format'],
+    'ctm-get-task-log': ['-i', '--instance', '-f', '--output_file', '--follow', '--interval'],
+    'ctm-get-task-plans': ['-t', '--task'],
+    'ctm-get-task-schedules': ['-t', '--task'],
+    'ctm-get-worklist': ['-f', '--filter'],
+    'ctm-import-backup': ['-f', '--file', '-c', '--on_conflict'],
+    'ctm-import-canvas': ['-i', '--inputdirectory', '-r', '--repository', '--ignoreconflicts', '-w', '--workers', '--batch', '--resume', '-a', '--archive'],
+    'ctm-import-catalog': ['-i', '--inputdirectory', '-t', '--team', '-o', '--overwrite', '-h', '--humanreadable', '-I', '--import_into_team', '-w', '--workers', '-c', '--chunk_size', '-r', '--batch_retries', '--resume', '-a', '--archive'],
+    'ctm-import-package': ['-b', '--backupfile', '-o', '--overwrite'],
+    'ctm-import-pipeline': ['-b', '--backupfile', '-o', '--overwrite'],
+    'ctm-import-progression': ['-b', '--backupfile', '-o', '--overwrite'],
+    'ctm-import-project': ['-b', '--backupfile', '-o', '--overwrite'],
+    'ctm-import-task': ['-f', '--file', '-c', '--on_conflict'],
+    'ctm-initiate-pipeline': ['-d', '--definition', '-p', '--project', '-g', '--group', '-n', '--name', '-j', '--details'],
+    'ctm-install-add-on': ['-n', '--name', '-t', '--team'],
+    'ctm-install-license': ['-i', '--inputfile'],
+    'ctm-invoke-plugin': ['-p', '--plugin', '-m', '--method', '-a', '--args', '-t', '--team', '-o', '--timeout'],
+    'ctm-list-add-ons': ['-c', '--include_contents'],
+    'ctm-list-canvas-items': ['-p', '--project', '-c', '--component', '-r', '--repository'],
+    'ctm-list-changes': ['-r', '--project', '-g', '--group', '-s', '--since', '-m', '--managed', '-u', '--unmanaged'],
+    'ctm-list-cloud-accounts': ['-f', '--filter'],
+    'ctm-list-clouds': ['-f', '--filter'],
+    'ctm-list-packages': ['-f', '--filter', '-l', '--limit', '--page_size', '--rows_format'],
+    'ctm-list-pipelinegroups': ['-p', '--pipeline', '-r', '--project', '-g', '--group', '-l', '--limit'],
+    'ctm-list-pipelineinstances': ['-d', '--definition', '-r', '--project', '-g', '--group', '-s', '--since', '-l', '--limit', '--page_size', '--rows_format'],
+    'ctm-list-pipelines': ['-f', '--filter', '-l', '--limit'],
+    'ctm-list-processes': [],
+    'ctm-list-progressions': ['-f', '--filter', '-l', '--limit'],
+    'ctm-list-projects': ['-f', '--filter', '-l', '--limit', '--page_size', '--rows_format'],
+    'ctm-list-tasks': ['-f', '--filter'],
+    'ctm-list-users': ['-f', '--filter', '-l', '--limit', '--page_size', '--rows_format'],
+    'ctm-mirror': ['--db', '-k', '--kind', '--since', '--until', '-t', '--task', '-s', '--status', '-r', '--project', '-g', '--group', '-b', '--by', '--sql', '-l', '--limit', '--page_size', '-c', '--concurrency', '--rows_format'],
+    'ctm-override-control': ['-p', '--package', '-h', '--phase', '-a', '--activity', '-c', '--control', '-e', '--reason', '-r', '--revision', '-f', '--full_version'],
+    'ctm-powershell': ['-s', '--server', '-u', '--user', '-p', '--password', '-a', '--asset', '-k', '--kerberos', '-c', '--command'],
+    'ctm-promote-revision': ['-p', '--package', '-r', '--revision', '-f', '--full_version', '-h', '--phase', '-v', '--new_version'],
+    'ctm-register-artifact': ['-p', '--project', '-n', '--name', '-b', '--branch', '-v', '--version', '-l', '--location', '-d', '--build_data'],
+    'ctm-remove-team': ['-t', '--team'],
+    'ctm-remove-team-user': ['-t', '--team', '-u', '--user', '-d', '--default'],
+    'ctm-rerun-pipelineinstance': ['-i', '--pi'],
+    'ctm-reset-password': ['-p', '--password', '-u', '--user', '-g', '--generate'],
+    'ctm-resubmit-change': ['-q', '--query'],
+    'ctm-retry-pipelineinstance': ['-i', '--pi'],
+    'ctm-reversion-packagerevision': ['-p', '--package', '-r', '--revision', '-f', '--full_version', '-v', '--new_version', '-n', '--new_full_version'],
+    'ctm-run-task': ['-t', '--task', '-l', '--log_level', '-o', '--options', '-r', '--run_later', '-p', '--parameters', '-i', '--initialdata', '-w', '--wait', '--wait_timeout'],
+    'ctm-schedule-tasks': ['-s', '--schedulefile'],
+    'ctm-send-message': ['-t', '--to', '-s', '--subject', '-m', '--message', '-c', '--cc', '-b', '--bcc'],
+    'ctm-set-pi-description': ['-i', '--pi', '-d', '--description'],
+    'ctm-set-pi-global-summary': ['-i', '--pi', '-k', '--key', '-v', '--value'],
+    'ctm-set-pipelinegroup-number': ['-i', '--pg', '-n', '--newnumber'],
+    'ctm-set-project-directives': ['-d', '--directivesfile'],
+    'ctm-shell': ['-s', '--socket'],
+    'ctm-stop-task': ['-i', '--instance'],
+    'ctm-test-messagehub': ['-s', '--server'],
+    'ctm-testbamboo': ['-i', '--instance', '-t', '--team'],
+    'ctm-testbitbucket': ['-i', '--instance', '-t', '--team'],
+    'ctm-testgitlab': ['-i', '--instance', '-t', '--team'],
+    'ctm-testhipchat': ['-i', '--instance', '-t', '--team'],
+    'ctm-testjenkins': ['-i', '--instance', '-t', '--team'],
+    'ctm-testjira': ['-i', '--instance', '-t', '--team'],
+    'ctm-testoctopus': ['-i', '--instance', '-t', '--team'],
+    'ctm-testopenshift': ['-i', '--instance', '-t', '--team'],
+    'ctm-testsonarqube': ['-i', '--instance', '-t', '--team'],
+    'ctm-testteamcity': ['-i', '--instance', '-t', '--team'],
+    'ctm-testversionone': ['-i', '--instance', '-t', '--team'],
+    'ctm-uninstall-add-on': ['-n', '--name'],
+    'ctm-untag-object': ['-t', '--tag', '-o', '--object_id', '-y', '--object_type'],
+    'ctm-update-user': ['-u', '--user', '-n', '--name', '-r', '--role', '-t', '--teams', '--is-sys-admin', '--is-shared-asset-mgr', '-e', '--email', '-a', '--authtype', '-f', '--forcechange', '-s', '--status', '-x', '--expires', '-g', '--groups', '-c', '--contributors', '-p', '--password', '--generate'],
+    'ctm-version': [],
+    'ctm-wait-task-instances': ['-i', '--instances', '-t', '--timeout', '--interval', '--max_interval'],
+    'ctm-watch-pipelineinstance': ['-i', '--pi', '--interval', '--max_interval', '--exit'],
+    'ctm-winrm': ['-s', '--server', '-u', '--user', '-p', '--password', '-a', '--asset', '-k', '--kerberos', '-c', '--command'],
+}
+
+STANDARD_OPTIONS = ['-U', '--url', '-T', '--token', '-C', '--config', '-F', '--format', '-L', '--output_delimiter', '-D', '--debug', '-H', '--help', '--force', '--noheader', '--dumpdoc', '--api', '--no-cache', '--trace']
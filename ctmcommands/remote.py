@@ -0,0 +1,80 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+The client side of `ctm-shell --socket`.  Forwards one command to a running
+shell and relays its output and exit code.
+
+This module deliberately imports as little as possible, it's startup time
+is the whole point.
+"""
+
+import os
+import sys
+import json
+import socket
+import struct
+
+default_socket = "~/.ctmclient.sock"
+
+# the shell's reply is a series of frames, each a kind (b"o" for output, b"x" for the
+# exit code), the length of the data as 4 bytes big-endian, and the data.
+# the output may be anything, NUL bytes included, so it isn't delimited.
+frame_header = struct.Struct(">cI")
+
+
+def frame(kind, data):
+    return frame_header.pack(kind, len(data)) + data
+
+
+def forward(argv, path):
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "env": dict((k, os.environ[k]) for k in ["CONTINUUM_URL", "CONTINUUM_TOKEN"] if k in os.environ)
+    }
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    try:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        out = getattr(sys.stdout, "buffer", sys.stdout)
+        f_in = sock.makefile("rb")
+        try:
+            while True:
+                header = f_in.read(frame_header.size)
+                if len(header) < frame_header.size:
+                    # the shell went away without telling us how the command ended
+                    return 1
+                kind, length = frame_header.unpack(header)
+                data = f_in.read(length)
+                if kind == b"x":
+                    return int(data or 1)
+                out.write(data)
+                out.flush()
+                if len(data) < length:
+                    return 1
+        finally:
+            f_in.close()
+    finally:
+        sock.close()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] in ["-H", "--help", "--dumpdoc"]:
+        if args and args[0] == "--dumpdoc":
+            print('<h3 id="{0}" title="Permalink">{0}&nbsp;<a href="#{0}" style="display: margin-left: 1em;">&para;</a></h3>\n'.format('ctm-remote'))
+        print("""Forwards a command to a running `ctm-shell --socket`, for example `ctm-remote list-tasks -f "mytask01"`.
+The socket is ~/.ctmclient.sock unless the CTM_SHELL_SOCKET environment variable is set.""")
+        sys.exit()
+
+    path = os.path.expanduser(os.environ.get("CTM_SHELL_SOCKET", default_socket))
+    try:
+        code = forward(args, path)
+    except socket.error as ex:
+        sys.stderr.write("Unable to connect to a ctm-shell on [%s]. %s\n" % (path, ex))
+        code = 1
+    sys.exit(code)
@@ -0,0 +1,183 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import os
+import sys
+import json
+import shlex
+import signal
+import socketserver
+
+import ctmcommands.cmd
+import ctmcommands.dispatch
+from ctmcommands.param import Param
+from ctmcommands.remote import frame
+
+# the environment variables a client may set for each command it forwards
+forwarded_env = ["CONTINUUM_URL", "CONTINUUM_TOKEN"]
+
+
+class SocketWriter(object):
+    """A file-like stdout replacement that writes to a client connection, as output frames."""
+
+    def __init__(self, f_out):
+        self.f_out = f_out
+
+    def write(self, s):
+        if not isinstance(s, bytes):
+            s = s.encode("utf-8")
+        if s:
+            self.f_out.write(frame(b"o", s))
+
+    def flush(self):
+        self.f_out.flush()
+
+
+class ShellRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Runs one command per connection.
+
+    The client sends a single line of JSON: {"argv": [...], "cwd": "...", "env": {...}}.
+    The output of the command is sent back as it is written, followed by the
+    exit code, in frames (see ctmcommands.remote).
+    """
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line.decode("utf-8"))
+            argv = request["argv"]
+        except (ValueError, KeyError):
+            self.wfile.write(frame(b"o", b"Invalid request.\n") + frame(b"x", b"1"))
+            return
+
+        saved = (sys.stdout, sys.stdin, os.getcwd(), dict((k, os.environ.get(k)) for k in forwarded_env))
+        sys.stdout = SocketWriter(self.wfile)
+        # there's nobody to answer an "Are you sure?" prompt
+        sys.stdin = open(os.devnull, 'r')
+        try:
+            if request.get("cwd"):
+                os.chdir(request["cwd"])
+            env = request.get("env", {})
+            for k in forwarded_env:
+                if env.get(k):
+                    os.environ[k] = env[k]
+            code = self.server.shell.run(argv)
+        finally:
+            sys.stdin.close()
+            sys.stdout, sys.stdin = saved[:2]
+            os.chdir(saved[2])
+            for k, v in saved[3].items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+        self.wfile.write(frame(b"x", str(code).encode("utf-8")))
+
+
+class ShellServer(socketserver.UnixStreamServer):
+    # commands change process wide state (sys.argv, stdout, the current directory),
+    # so this server deliberately handles one connection at a time.
+
+    def __init__(self, path, shell):
+        self.shell = shell
+        if os.path.exists(path):
+            os.remove(path)
+        # only this user may connect
+        umask = os.umask(0o077)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, ShellRequestHandler)
+        finally:
+            os.umask(umask)
+
+
+class Shell(ctmcommands.cmd.CSKCommand):
+
+    Description = '''Runs ctm-* commands in one long lived process, avoiding the startup cost of each command.
+
+Commands are read from stdin one per line, or, with --socket, received from
+`ctm-remote` clients over a local Unix socket.  All commands share one
+connection to the server.'''
+    API = ''
+    Examples = '''
+_To run several commands in one process_
+
+    printf 'list-tasks\\nlist-projects -F json\\n' | ctm-shell
+
+_To start a shell that `ctm-remote` forwards commands to_
+
+    ctm-shell --socket ~/.ctmclient.sock &
+    ctm-remote list-tasks -f "mytask01"
+'''
+    Options = [Param(name='socket', short_name='s', long_name='socket',
+                     optional=True, ptype='string',
+                     doc='Listen on this Unix socket for commands from `ctm-remote`, rather than reading stdin.')]
+
+    def run(self, argv):
+        if not argv:
+            return 0
+        if ctmcommands.dispatch.find_command(argv[0]) == "ctm-shell":
+            print("Already in a shell.")
+            return 1
+        return ctmcommands.dispatch.run_command(argv, self.debug)
+
+    def repl(self):
+        interactive = sys.stdin.isatty()
+        while True:
+            if interactive:
+                sys.stdout.write("ctm> ")
+                sys.stdout.flush()
+            line = sys.stdin.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line in ["exit", "quit"]:
+                break
+            if line in ["help", "commands"]:
+                print("\n".join(ctmcommands.dispatch.command_names()))
+                continue
+            try:
+                argv = shlex.split(line)
+            except ValueError as ex:
+                print(ex)
+                continue
+
+            if interactive:
+                self.run(argv)
+            else:
+                # stdin holds the commands, so it can't answer an "Are you sure?" prompt
+                stdin = sys.stdin
+                sys.stdin = open(os.devnull, 'r')
+                try:
+                    self.run(argv)
+                finally:
+                    sys.stdin.close()
+                    sys.stdin = stdin
+            sys.stdout.flush()
+
+    def main(self):
+        if not self.socket:
+            self.repl()
+            return
+
+        path = os.path.expanduser(self.socket)
+        server = ShellServer(path, self)
+        print("Listening on [%s]." % path)
+        sys.stdout.flush()
+        # clean up the socket when killed, too
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.remove(path)
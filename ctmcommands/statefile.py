@@ -0,0 +1,52 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import os
+import json
+import threading
+
+
+class StateFile(object):
+    """
+    Records the keys of completed work items in a file, one per line, so an
+    interrupted multi-call command can be resumed without repeating the work
+    that already succeeded.
+
+    Keys are appended (and flushed) as soon as they are added, so the file
+    is accurate even if the process is killed.  It is safe to add keys from
+    several threads.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            with open(path, 'r') as f_in:
+                for line in f_in:
+                    line = line.strip()
+                    if line:
+                        self.done.add(json.loads(line))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def add(self, key):
+        with self._lock:
+            with open(self.path, 'a') as f_out:
+                f_out.write(json.dumps(key) + "\n")
+            self.done.add(key)
+
+    def remove(self):
+        """Removes the state file, once all the work is complete."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,130 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+import re
+import json
+
+
+class ResponseUnwrapper(object):
+    """
+    Unwraps a JSON API response as it streams in, passing through just the bytes of
+    the "Response" value, and keeping ErrorCode and ErrorMessage for error().
+
+    It only scans for the characters that change the structure (quotes, brackets,
+    commas and colons), so a big response isn't looked at a character at a time.
+    """
+
+    special = re.compile(br'["\\{}\[\],:]')
+    # inside a string only the end of it matters, inside a nested value only strings and brackets
+    string_special = re.compile(br'["\\]')
+    nested_special = re.compile(br'["{}\[\]]')
+    keep = [b"ErrorCode", b"ErrorMessage"]
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = False
+        self.in_key = False
+        self.key_parts = []
+        self.key = None
+        self.in_value = False
+        self.found = False
+        self.kept = {}
+
+    def take(self, data):
+        """Handles some bytes of the value of the current top level key."""
+        if self.key == b"Response":
+            if not self.found:
+                data = data.lstrip()
+                self.found = bool(data)
+            return data
+        if self.key in self.keep:
+            self.kept.setdefault(self.key, []).append(data)
+        return b""
+
+    def feed(self, chunk):
+        """Returns the bytes of the Response value in this chunk."""
+        out = []
+        value_start = 0 if self.in_value else None
+        key_start = 0 if self.in_key else None
+        i = 0
+        n = len(chunk)
+        if self.escape:
+            self.escape = False
+            i = 1
+        while i < n:
+            if self.in_string:
+                m = self.string_special.search(chunk, i)
+            elif self.depth > 1:
+                m = self.nested_special.search(chunk, i)
+            else:
+                m = self.special.search(chunk, i)
+            if not m:
+                break
+            i = m.start()
+            c = chunk[i:i + 1]
+            if self.in_string:
+                if c == b"\\":
+                    if i + 1 >= n:
+                        self.escape = True
+                    i += 2
+                    continue
+                if c == b'"':
+                    self.in_string = False
+                    if self.in_key:
+                        self.key_parts.append(chunk[key_start:i])
+                        self.in_key = False
+                        key_start = None
+            elif c == b'"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.in_key = True
+                    self.key_parts = []
+                    key_start = i + 1
+            elif c in (b"{", b"["):
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+            elif c in (b"}", b"]"):
+                if self.depth == 1 and self.in_value:
+                    out.append(self.take(chunk[value_start:i]))
+                    self.in_value = False
+                    value_start = None
+                self.depth -= 1
+            elif self.depth == 1 and c == b":":
+                self.key = b"".join(self.key_parts)
+                self.expect_key = False
+                self.in_value = True
+                value_start = i + 1
+            elif self.depth == 1 and c == b",":
+                if self.in_value:
+                    out.append(self.take(chunk[value_start:i]))
+                    self.in_value = False
+                    value_start = None
+                self.expect_key = True
+            i += 1
+
+        # the rest of the chunk is carried over
+        if value_start is not None:
+            out.append(self.take(chunk[value_start:]))
+        if self.in_key:
+            self.key_parts.append(chunk[key_start:])
+        return b"".join(out)
+
+    def error(self):
+        """The API error, if there was one, as "ErrorCode: ErrorMessage"."""
+        values = {}
+        for k, parts in self.kept.items():
+            try:
+                values[k] = json.loads(b"".join(parts).decode("utf-8"))
+            except ValueError:
+                values[k] = None
+        if values.get(b"ErrorCode"):
+            return "%s: %s" % (values.get(b"ErrorCode"), values.get(b"ErrorMessage") or "")
+        if not self.found and not self.kept:
+            return "Response JSON could not be parsed."
+        return None
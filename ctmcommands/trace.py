@@ -0,0 +1,231 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+Request tracing: with --trace FILE (or CONTINUUM_TRACE) every API call appends
+one line of JSON to FILE, with where its time went and how big it was.
+
+    {"time": ..., "command": "ctm-list-tasks", "method": "list_tasks", "verb": "GET",
+     "status": 200, "request_bytes": 0, "response_bytes": 5120, "retries": 0,
+     "new_connection": true, "dns_ms": 1.2, "connect_ms": 0.8, "tls_ms": 10.4,
+     "setup_ms": 0.3, "send_ms": 0.1, "ttfb_ms": 35.2, "transfer_ms": 2.0, "parse_ms": 0.6,
+     "total_ms": 51.1}
+
+total_ms is from sending the request to having all of the response, setup_ms (before)
+and parse_ms (after) are not included.
+
+The DNS, connect, TLS, send and time to first byte timings come from the
+connection classes below, which urllib3 uses for the session only when tracing
+is on.  A reused keep-alive connection has no dns/connect/tls timings.
+If a request was retried, the timings are the sum over the attempts.
+
+ctm-trace-report summarizes a trace file.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+
+# the timings of the request being made in this thread
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def ms(seconds):
+    return round(seconds * 1000.0, 3)
+
+
+def add_timing(name, seconds):
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def set_mark(name, value):
+    timings = getattr(_local, "timings", None)
+    if timings is not None:
+        timings[name] = value
+
+
+class Tracer(object):
+    """Writes a record of each API call made, to a JSON lines file."""
+
+    def __init__(self, path, command=None):
+        self.path = os.path.expanduser(path)
+        self.command = command
+
+    def begin(self, method, verb):
+        # anything left over from a streamed request in this thread goes first
+        self.finish()
+        _local.timings = {}
+        _local.record = {"time": round(time.time(), 3), "command": self.command,
+                         "method": method, "verb": verb}
+        _local.start = time.time()
+
+    def sending(self):
+        """The request is about to go out, the time before it (imports, the session) is setup."""
+        if getattr(_local, "record", None) is not None:
+            now = time.time()
+            _local.record["setup_ms"] = ms(now - _local.start)
+            _local.start = now
+
+    def update(self, **fields):
+        record = getattr(_local, "record", None)
+        if record is not None:
+            record.update(fields)
+
+    def mark_done(self):
+        """The response is all in, the rest of the time goes to parsing it."""
+        if getattr(_local, "record", None) is not None:
+            self._add_times(time.time())
+
+    def _add_times(self, now):
+        record = _local.record
+        timings = _local.timings
+        if "dns" in timings or "connect" in timings:
+            record["new_connection"] = True
+        for k in ["dns", "connect", "tls", "send", "ttfb"]:
+            if k in timings:
+                record[k + "_ms"] = ms(timings[k])
+        if "headers_at" in timings:
+            record["transfer_ms"] = ms(now - timings["headers_at"])
+        record["total_ms"] = ms(now - _local.start)
+
+    def finish(self, **fields):
+        """Writes the record of the current request in this thread, if there is one."""
+        record = getattr(_local, "record", None)
+        if record is None:
+            return
+        if "total_ms" not in record:
+            self._add_times(time.time())
+        record.setdefault("new_connection", False)
+        record.update(fields)
+        _local.record = None
+        _local.timings = None
+
+        line = json.dumps(record, sort_keys=True) + "\n"
+        try:
+            with _write_lock:
+                with open(self.path, 'a') as f_out:
+                    f_out.write(line)
+        except IOError as ex:
+            sys.stderr.write("Unable to write to the trace file [%s]. %s\n" % (self.path, ex))
+
+
+def traced_connection_classes():
+    """HTTP and HTTPS connection classes that record their timings in this thread."""
+    try:
+        from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+    except ImportError:
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+
+    class TracedMixin(object):
+
+        def _new_conn(self):
+            # the name is resolved here (timed) and the connection made to the address,
+            # if that fails the normal resolve and connect is done
+            host = getattr(self, "_dns_host", None)
+            start = time.time()
+            try:
+                addr = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)[0][4][0] if host else None
+            except socket.error:
+                addr = None
+            add_timing("dns", time.time() - start)
+
+            start = time.time()
+            try:
+                if addr:
+                    self._dns_host = addr
+                    try:
+                        return super(TracedMixin, self)._new_conn()
+                    except Exception:
+                        self._dns_host = host
+                return super(TracedMixin, self)._new_conn()
+            finally:
+                self._dns_host = host
+                add_timing("connect", time.time() - start)
+
+        def connect(self):
+            before = self._connect_time()
+            start = time.time()
+            super(TracedMixin, self).connect()
+            if isinstance(self, HTTPSConnection):
+                # what's left of connect() after resolving and connecting is the handshake
+                add_timing("tls", max(0.0, time.time() - start - (self._connect_time() - before)))
+
+        def _connect_time(self):
+            timings = getattr(_local, "timings", None) or {}
+            return timings.get("dns", 0.0) + timings.get("connect", 0.0)
+
+        def request(self, *args, **kwargs):
+            start = time.time()
+            try:
+                return super(TracedMixin, self).request(*args, **kwargs)
+            finally:
+                now = time.time()
+                add_timing("send", now - start)
+                set_mark("sent_at", now)
+
+        def request_chunked(self, *args, **kwargs):
+            start = time.time()
+            try:
+                return super(TracedMixin, self).request_chunked(*args, **kwargs)
+            finally:
+                now = time.time()
+                add_timing("send", now - start)
+                set_mark("sent_at", now)
+
+        def getresponse(self, *args, **kwargs):
+            response = super(TracedMixin, self).getresponse(*args, **kwargs)
+            now = time.time()
+            timings = getattr(_local, "timings", None) or {}
+            if "sent_at" in timings:
+                add_timing("ttfb", now - timings["sent_at"])
+            set_mark("headers_at", now)
+            return response
+
+    class TracedHTTPConnection(TracedMixin, HTTPConnection):
+        pass
+
+    class TracedHTTPSConnection(TracedMixin, HTTPSConnection):
+        pass
+
+    return TracedHTTPConnection, TracedHTTPSConnection
+
+
+def traced_adapter_class():
+    """A requests HTTPAdapter whose connection pools use the traced connection classes."""
+    import requests
+    try:
+        from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+    except ImportError:
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    http_conn, https_conn = traced_connection_classes()
+
+    class TracedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = http_conn
+
+    class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = https_conn
+
+    class TracedHTTPAdapter(requests.adapters.HTTPAdapter):
+
+        def init_poolmanager(self, *args, **kwargs):
+            super(TracedHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {"http": TracedHTTPConnectionPool,
+                                                       "https": TracedHTTPSConnectionPool}
+
+    return TracedHTTPAdapter
+
+
+def retries_of(response):
+    """How many times urllib3 retried the request of a requests Response."""
+    retries = getattr(getattr(response, "raw", None), "retries", None)
+    return len(getattr(retries, "history", None) or [])
@@ -0,0 +1,161 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+ctm-trace-report: summarizes the trace files written with --trace (or CONTINUUM_TRACE),
+showing where the time of the API calls went, by API method or by command.
+
+It doesn't call the API, so it needs no url or token.
+"""
+
+import sys
+import json
+import math
+import getopt
+
+phases = ["setup", "dns", "connect", "tls", "send", "ttfb", "transfer", "parse"]
+
+usage_text = """Summarizes the API call trace files written with --trace FILE (or CONTINUUM_TRACE).
+
+    ctm-trace-report [-b method|command] [-s total|calls|mean|p95|bytes] [-F text|json] FILE [FILE ...]
+
+    -b, --by        Group the calls by API method (the default) or by command.
+    -s, --sort      Sort the groups by total time (the default), number of calls,
+                    mean or 95th percentile time, or bytes received.
+    -F, --format    text (the default) or json.
+"""
+
+
+def percentile(values, p):
+    """The p-th percentile of a sorted list, by the nearest rank."""
+    if not values:
+        return 0.0
+    k = max(0, min(len(values) - 1, int(math.ceil(p / 100.0 * len(values))) - 1))
+    return values[k]
+
+
+def read_records(files):
+    for fn in files:
+        with open(fn, 'r') as f_in:
+            for n, line in enumerate(f_in, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    sys.stderr.write("Skipping line %d of [%s], it isn't JSON.\n" % (n, fn))
+
+
+def summarize(records, by="method"):
+    """Returns a summary dict for each group of records."""
+    groups = {}
+    for r in records:
+        key = r.get(by) or "(none)"
+        g = groups.setdefault(key, {"name": key, "calls": 0, "errors": 0, "cached": 0, "retries": 0,
+                                    "new_connections": 0, "request_bytes": 0, "response_bytes": 0,
+                                    "times": [], "phases": dict((p, 0.0) for p in phases)})
+        g["calls"] += 1
+        if r.get("error") or (r.get("status") or 200) >= 400:
+            g["errors"] += 1
+        if r.get("cached"):
+            g["cached"] += 1
+        if r.get("new_connection"):
+            g["new_connections"] += 1
+        g["retries"] += r.get("retries") or 0
+        g["request_bytes"] += r.get("request_bytes") or 0
+        g["response_bytes"] += r.get("response_bytes") or 0
+        g["times"].append(sum(float(r.get(k) or 0.0) for k in ["setup_ms", "total_ms", "parse_ms"]))
+        for p in phases:
+            g["phases"][p] += float(r.get(p + "_ms") or 0.0)
+
+    summaries = []
+    for g in groups.values():
+        times = sorted(g.pop("times"))
+        total = sum(times)
+        g["total_ms"] = round(total, 3)
+        g["mean_ms"] = round(total / len(times), 3)
+        g["p50_ms"] = round(percentile(times, 50), 3)
+        g["p95_ms"] = round(percentile(times, 95), 3)
+        g["max_ms"] = round(times[-1], 3)
+        g["phases"] = dict((p, round(v, 3)) for p, v in g["phases"].items())
+        summaries.append(g)
+    return summaries
+
+
+def sort_key(sort):
+    if sort == "calls":
+        return lambda g: g["calls"]
+    if sort == "mean":
+        return lambda g: g["mean_ms"]
+    if sort == "p95":
+        return lambda g: g["p95_ms"]
+    if sort == "bytes":
+        return lambda g: g["response_bytes"]
+    return lambda g: g["total_ms"]
+
+
+def print_text(summaries):
+    total = sum(g["total_ms"] for g in summaries) or 1.0
+    columns = ["name", "calls", "errors", "cached", "retries", "new_conn", "total_ms", "pct",
+               "mean_ms", "p50_ms", "p95_ms", "max_ms"] + [p + "_ms" for p in phases] + ["sent", "received"]
+    rows = []
+    for g in summaries:
+        rows.append([g["name"], g["calls"], g["errors"], g["cached"], g["retries"], g["new_connections"],
+                     "%.1f" % g["total_ms"], "%.1f" % (100.0 * g["total_ms"] / total),
+                     "%.1f" % g["mean_ms"], "%.1f" % g["p50_ms"], "%.1f" % g["p95_ms"], "%.1f" % g["max_ms"]] +
+                    ["%.1f" % g["phases"][p] for p in phases] +
+                    [g["request_bytes"], g["response_bytes"]])
+    widths = [max(len(str(v)) for v in [c] + [r[i] for r in rows]) for i, c in enumerate(columns)]
+    print("  ".join(str(c).ljust(w) if i == 0 else str(c).rjust(w) for i, (c, w) in enumerate(zip(columns, widths))))
+    for r in rows:
+        print("  ".join(str(c).ljust(w) if i == 0 else str(c).rjust(w) for i, (c, w) in enumerate(zip(r, widths))))
+    calls = sum(g["calls"] for g in summaries)
+    print("\n%d calls, %.1f ms in total.  The phase times are totals, a reused connection has no dns/connect/tls time." % (calls, total))
+
+
+def main():
+    try:
+        (opts, files) = getopt.gnu_getopt(sys.argv[1:], "b:s:F:H", ["by=", "sort=", "format=", "help", "dumpdoc"])
+    except getopt.GetoptError as e:
+        print(e)
+        sys.exit(1)
+
+    by = "method"
+    sort = "total"
+    fmt = "text"
+    for (name, value) in opts:
+        if name in ("-H", "--help"):
+            print(usage_text)
+            sys.exit()
+        elif name == "--dumpdoc":
+            print('<h3 id="{0}" title="Permalink">{0}&nbsp;<a href="#{0}" style="display: margin-left: 1em;">&para;</a></h3>\n'.format('ctm-trace-report'))
+            print(usage_text)
+            sys.exit()
+        elif name in ("-b", "--by"):
+            by = value
+        elif name in ("-s", "--sort"):
+            sort = value
+        elif name in ("-F", "--format"):
+            fmt = value
+
+    if not files or by not in ["method", "command"]:
+        print(usage_text)
+        sys.exit(1)
+
+    try:
+        summaries = summarize(read_records(files), by)
+    except IOError as ex:
+        print("Unable to read the trace file. %s" % ex)
+        sys.exit(1)
+    summaries.sort(key=sort_key(sort), reverse=True)
+
+    if not summaries:
+        print("No API calls were traced.")
+    elif fmt == "json":
+        print(json.dumps(summaries, indent=4, sort_keys=True))
+    else:
+        print_text(summaries)
@@ -0,0 +1,139 @@
+#########################################################################
+# Copyright 2019 VersionOne
+# All Rights Reserved.
+# http://www.versionone.com
+#########################################################################
+
+"""
+Form encoded request bodies that read their file arguments as they're sent,
+so uploading a backup doesn't hold the file, and its encoded copy, in memory.
+
+    body = FormFileBody({"on_conflict": "replace"}, {"backup": "/tmp/backup.json"})
+
+is what urlencode() of the two arguments would give, with the contents of the file
+as the value of backup.  Its length is worked out (by reading the file through once)
+before anything is sent, so the request has a Content-Length rather than being chunked.
+
+CSKCommand.call_api(..., files={"backup": fn}) sends one.
+"""
+
+import os
+import sys
+
+try:
+    from urllib.parse import quote_plus, urlencode
+except ImportError:
+    from urllib import quote_plus, urlencode
+
+chunk_size = 65536
+# the progress of uploads at least this big is shown, when stderr is a terminal
+progress_min_size = 1048576
+
+# the bytes quote_plus leaves as one character (a space becomes a '+'), the rest become %XX
+_unquoted = bytes(bytearray(b for b in range(256) if len(quote_plus(bytes(bytearray([b])))) == 1))
+
+
+def encode(chunk):
+    return quote_plus(chunk).encode("ascii")
+
+
+def encoded_size(fn):
+    """The length of a file's contents once they're form encoded."""
+    total = 0
+    with open(fn, 'rb') as f_in:
+        while True:
+            chunk = f_in.read(chunk_size)
+            if not chunk:
+                return total
+            total += len(chunk) + 2 * len(chunk.translate(None, _unquoted))
+
+
+class FormFileBody(object):
+    """
+    A file-like request body: the fields, then each file, form encoded as it's read.
+
+    requests sends it with read(), and rewinds it with seek() if the request is retried.
+    """
+
+    def __init__(self, fields, files, progress=False):
+        """fields is a dict of arguments, files a dict of argument name to file path (which wins over a field of the same name)."""
+        fields = dict((k, v) for k, v in (fields or {}).items() if k not in files)
+        prefix = urlencode(fields, doseq=True) if fields else ""
+        self.parts = []
+        for name, fn in files.items():
+            prefix = "%s%s%s=" % (prefix, "&" if prefix or self.parts else "", quote_plus(name))
+            self.parts.append((prefix.encode("ascii"), fn, encoded_size(fn)))
+            prefix = ""
+        self.length = sum(len(p) + size for p, _, size in self.parts)
+        # progress=True shows it even if stderr isn't a terminal
+        self.progress = self.length >= progress_min_size and (progress or sys.stderr.isatty())
+        self.name = ", ".join(os.path.basename(fn) for fn in files.values())
+        self.seek(0)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=0):
+        # start over, and skip to the offset
+        self.close()
+        self.position = 0
+        self.part = 0
+        self.f_in = None
+        self.buffer = b""
+        self.offset = 0
+        while self.position < offset and self.read(min(chunk_size, offset - self.position)):
+            pass
+        self.shown = -1
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        # what's left of the buffer is kept by offset, not sliced off on every (small) read
+        while len(self.buffer) - self.offset < size and self.part < len(self.parts):
+            prefix, fn, _ = self.parts[self.part]
+            if self.f_in is None:
+                self.f_in = open(fn, 'rb')
+                more = prefix
+            else:
+                chunk = self.f_in.read(chunk_size)
+                if not chunk:
+                    self.f_in.close()
+                    self.f_in = None
+                    self.part += 1
+                    continue
+                more = encode(chunk)
+            self.buffer = self.buffer[self.offset:] + more
+            self.offset = 0
+
+        out = self.buffer[self.offset:self.offset + size]
+        self.offset += len(out)
+        self.position += len(out)
+        if self.progress:
+            self.show_progress()
+        return out
+
+    def show_progress(self):
+        pct = int(100 * self.position / self.length) if self.length else 100
+        if pct == self.shown:
+            return
+        self.shown = pct
+        sys.stderr.write("\rUploading [%s]: %.1f of %.1f MB (%d%%)" % (self.name, self.position / 1048576.0, self.length / 1048576.0, pct))
+        if self.position >= self.length:
+            sys.stderr.write("\n")
+        sys.stderr.flush()
+
+    def close(self):
+        if getattr(self, "f_in", None) is not None:
+            self.f_in.close()
+            self.f_in = None
@@ -6,11 +6,23 @@
 
 import os
 import setuptools
+from setuptools.command.build_py import build_py
+
+from ctmcommands import buildregistry
 
 binscripts = []
 for f in os.listdir("bin"):
     binscripts.append("bin/" + f)
 
+
+class BuildPyWithRegistry(build_py):
+    """Regenerates the command registry used by `ctm` from the scripts in bin/ before building."""
+
+    def run(self):
+        buildregistry.build(os.path.dirname(os.path.abspath(__file__)))
+        build_py.run(self)
+
+
 setuptools.setup(
     name='continuumclient',
     version='19.0.1',
@@ -20,6 +32,8 @@ setuptools.setup(
     packages=setuptools.find_packages(exclude=['bin']),
     include_package_data=True,
     install_requires=['requests<2.28', 'future', 'certifi<=2021.10.8'],
+    # the asyncio client (ctmcommands.asyncclient), Python 3 only
+    extras_require={'async': ['aiohttp; python_version >= "3.5"']},
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'License :: License :: Other/Proprietary License',
@@ -32,4 +46,5 @@ setuptools.setup(
         'Environment :: No Input/Output (Daemon)',
     ],
     scripts=binscripts,
+    cmdclass={'build_py': BuildPyWithRegistry},
     py_modules=[])
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+
+"""
+
+Benchmarks the client against a local stub server (stub_server.py), so the numbers only
+depend on the client, and on the latency and payload size given here.
+
+Measures:
+    startup          time to run a command that makes no API call (--api)
+    latency          time to run a command that makes one API call, and the time
+                     per call of 20 calls made from one process (on one connection)
+    export_catalog   ctm-export-catalog throughput, assets and MB per second
+    import_catalog   ctm-import-catalog of that export
+    import_canvas    ctm-import-canvas of --items generated items, in batches
+and the peak memory (max RSS) of each command.
+
+Each is run --repeat times, the best time is kept.  Results can be saved, and compared
+with a previous run to catch regressions:
+
+    python test/benchmark.py --save before.json
+    ...
+    python test/benchmark.py --compare before.json [--threshold 10]
+
+Run it from the root of the repository, it measures the working tree not the installed package.
+
+    python test/benchmark.py [--latency 20] [--items 2000] [--item_size 1024] [--repeat 3]
+                             [--only startup,latency,...] [--save FILE] [--compare FILE] [--threshold PCT]
+
+"""
+
+import os
+import sys
+import json
+import time
+import getopt
+import shutil
+import platform
+import tempfile
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bindir = os.path.join(root, "bin")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import stub_server
+
+scenarios = ["startup", "latency", "export_catalog", "import_catalog", "import_canvas"]
+
+# metrics where a bigger number is better, for everything else smaller is better
+higher_is_better = ["items_per_sec", "mb_per_sec"]
+
+# the command run by --child, with its peak memory written to stderr at the end
+child_code = """
+import sys, resource
+sys.argv = sys.argv[1:]
+code = 0
+try:
+    import ctmcommands.dispatch
+    code = ctmcommands.dispatch.run_command(sys.argv)
+finally:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    sys.stderr.write("PEAK_RSS_KB:%d\\n" % (rss // 1024 if sys.platform == "darwin" else rss))
+sys.exit(code)
+"""
+
+# 20 calls from one process, on one connection, the time per call written to stderr
+calls_code = """
+import sys, time
+sys.argv = ["ctm-list-users"]
+import ctmcommands.admin.listusers
+cmd = ctmcommands.admin.listusers.ListUsers()
+cmd.call_api(cmd.API)
+start = time.time()
+for _ in range(20):
+    cmd.call_api(cmd.API)
+sys.stderr.write("PER_CALL_MS:%.3f\\n" % ((time.time() - start) * 1000.0 / 20))
+"""
+
+
+def run(args, env, cwd=None, code=None):
+    """Runs a command as a child process, returns (seconds, peak rss KB, stderr)."""
+    if code:
+        cmdline = [sys.executable, "-c", code]
+    else:
+        cmdline = [sys.executable, "-c", child_code] + args
+    devnull = open(os.devnull, 'w')
+    start = time.time()
+    p = subprocess.Popen(cmdline, env=env, cwd=cwd or root, stdout=devnull, stderr=subprocess.PIPE)
+    err = p.communicate()[1].decode("utf-8", "replace")
+    elapsed = time.time() - start
+    devnull.close()
+    if p.returncode:
+        raise Exception("[%s] failed (%d).\n%s" % (" ".join(args or ["-c"]), p.returncode, err))
+    rss = None
+    for line in err.splitlines():
+        if line.startswith("PEAK_RSS_KB:"):
+            rss = int(line.split(":")[1])
+    return elapsed, rss, err
+
+
+def best_of(repeat, fn):
+    """Runs fn repeat times, returns the result with the lowest time (the first item)."""
+    results = [fn() for _ in range(repeat)]
+    return min(results, key=lambda r: r[0])
+
+
+def throughput(elapsed, items, nbytes, rss):
+    return {"seconds": round(elapsed, 3), "items_per_sec": round(items / elapsed, 1),
+            "mb_per_sec": round(nbytes / 1048576.0 / elapsed, 2), "peak_rss_kb": rss}
+
+
+def dir_size(path):
+    total = 0
+    for d, _, files in os.walk(path):
+        for f in files:
+            total += os.path.getsize(os.path.join(d, f))
+    return total
+
+
+def make_canvas(path, items, item_size):
+    config = stub_server.StubConfig(items=items, item_size=item_size)
+    for p in config.result("export_canvas"):
+        for c in p["Components"]:
+            cdir = os.path.join(path, "proj_%s" % p["Name"], "comp_%s" % c["Name"])
+            os.makedirs(cdir)
+            for i in c["Items"]:
+                with open(os.path.join(cdir, "item_%s" % i["Name"]), 'w') as f_out:
+                    f_out.write(i["Data"])
+
+
+def benchmark(options, only):
+    config = stub_server.StubConfig(latency=options["latency"], items=options["items"], item_size=options["item_size"])
+    server = stub_server.start(config)
+    env = dict(os.environ, PYTHONPATH=root, CONTINUUM_URL=server.url, CONTINUUM_TOKEN="benchmark")
+    for k in ["CONTINUUM_CACHE", "CONTINUUM_TRACE", "CONTINUUM_COMPRESS"]:
+        env.pop(k, None)
+    repeat = options["repeat"]
+    work = tempfile.mkdtemp(prefix="ctmbench")
+    results = {}
+    try:
+        if "startup" in only:
+            elapsed, rss, _ = best_of(repeat, lambda: run(["ctm-list-users", "--api"], env))
+            results["startup"] = {"seconds": round(elapsed, 3), "peak_rss_kb": rss}
+
+        if "latency" in only:
+            elapsed, rss, _ = best_of(repeat, lambda: run(["ctm-list-users"], env))
+            per_call = min(float(run(None, env, code=calls_code)[2].split("PER_CALL_MS:")[1]) for _ in range(repeat))
+            results["latency"] = {"seconds": round(elapsed, 3), "per_call_ms": round(per_call, 3),
+                                  "overhead_per_call_ms": round(per_call - options["latency"], 3), "peak_rss_kb": rss}
+
+        export_dir = os.path.join(work, "catalog")
+        if "export_catalog" in only or "import_catalog" in only:
+            def export():
+                if os.path.exists(export_dir):
+                    shutil.rmtree(export_dir)
+                # the directory must exist
+                os.makedirs(export_dir)
+                return run(["ctm-export-catalog", "-o", export_dir], env)
+            elapsed, rss, _ = best_of(repeat, export)
+            if "export_catalog" in only:
+                results["export_catalog"] = throughput(elapsed, options["items"], dir_size(export_dir), rss)
+
+        if "import_catalog" in only:
+            before = config.items_received
+            elapsed, rss, _ = best_of(repeat, lambda: run(["ctm-import-catalog", "-i", export_dir], env))
+            if config.items_received - before != options["items"] * repeat:
+                raise Exception("The stub server got %d assets, not %d." % (config.items_received - before, options["items"] * repeat))
+            results["import_catalog"] = throughput(elapsed, options["items"], dir_size(export_dir), rss)
+
+        if "import_canvas" in only:
+            canvas_dir = os.path.join(work, "canvas")
+            make_canvas(canvas_dir, options["items"], options["item_size"])
+            elapsed, rss, _ = best_of(repeat, lambda: run(["ctm-import-canvas", "-i", canvas_dir, "--force", "--batch", "-w", "4"], env))
+            results["import_canvas"] = throughput(elapsed, options["items"], dir_size(canvas_dir), rss)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=root, stderr=subprocess.STDOUT).decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    for name in scenarios:
+        if name in results:
+            print("%-16s %s" % (name, "  ".join("%s=%s" % (k, v) for k, v in sorted(results[name].items()))))
+
+
+def compare(old, new, threshold):
+    """Prints the change of every metric, returns the regressions (worse by more than threshold percent)."""
+    regressions = []
+    print("\n%-16s %-22s %12s %12s %9s" % ("scenario", "metric", "before", "after", "change"))
+    for name in scenarios:
+        for metric, value in sorted(new.get(name, {}).items()):
+            before = old.get(name, {}).get(metric)
+            if not before or value is None:
+                continue
+            change = 100.0 * (value - before) / before
+            worse = -change if metric in higher_is_better else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions.append((name, metric))
+            print("%-16s %-22s %12s %12s %+8.1f%%%s" % (name, metric, before, value, change, flag))
+    return regressions
+
+
+def main():
+    try:
+        (opts, args) = getopt.gnu_getopt(sys.argv[1:], "", ["latency=", "items=", "item_size=", "repeat=", "only=",
+                                                              "save=", "compare=", "threshold="])
+    except getopt.GetoptError as e:
+        print(e)
+        sys.exit(1)
+    opts = dict((k[2:], v) for k, v in opts)
+
+    options = {"latency": int(opts.get("latency", 20)), "items": int(opts.get("items", 2000)),
+               "item_size": int(opts.get("item_size", 1024)), "repeat": int(opts.get("repeat", 3))}
+    only = opts["only"].split(",") if opts.get("only") else scenarios
+    previous = None
+    if opts.get("compare"):
+        with open(opts["compare"], 'r') as f_in:
+            previous = json.load(f_in)
+        # compare like with like
+        options = previous.get("options", options)
+
+    print("Benchmarking with %s" % ", ".join("%s=%s" % kv for kv in sorted(options.items())))
+    results = benchmark(options, only)
+    print_results(results)
+
+    if opts.get("save"):
+        doc = {"options": options, "results": results, "commit": git_commit(),
+               "python": platform.python_version(), "platform": platform.platform(),
+               "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+        with open(opts["save"], 'w') as f_out:
+            json.dump(doc, f_out, indent=4, sort_keys=True)
+        print("Results saved to [%s]." % opts["save"])
+
+    if previous:
+        print("Compared with the run of %s (commit %s)." % (previous.get("time"), previous.get("commit")))
+        regressions = compare(previous.get("results", {}), results, float(opts.get("threshold", 10)))
+        if regressions:
+            print("FAILED: %d metric(s) regressed by more than %s%%." % (len(regressions), opts.get("threshold", 10)))
+            sys.exit(1)
+    print("SUCCESS")
+
+
+if __name__ == '__main__':
+    main()
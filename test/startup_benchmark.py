@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+
+"""
+
+Measures the startup cost of the ctm-* commands, which is most of the time spent by
+scripts that chain many commands together (and by smoketest.py).
+
+1) Uses `python -X importtime` (Python 3.7+) to report the slowest imports of a command.
+2) Checks that --api and --help don't import the HTTP and XML libraries.
+3) Times running every command in bin/ with --api, which makes no API call,
+   both as its own script and through the `ctm` dispatcher.
+
+Run it from the root of the repository, it measures the working tree not the installed package.
+
+    python test/startup_benchmark.py [repetitions]
+
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bindir = os.path.join(root, "bin")
+env = dict(os.environ, PYTHONPATH=root)
+
+# imports that should only happen when an API call is made
+lazy_modules = ["requests", "urllib3", "xml.etree.ElementTree"]
+
+
+def run(args):
+    return subprocess.check_output([sys.executable] + args, env=env, stderr=subprocess.STDOUT).decode("utf-8")
+
+
+def import_times(module, top=10):
+    print("Slowest imports of [%s] (cumulative microseconds):" % module)
+    # -X importtime writes to stderr, "import time: self [us] | cumulative | imported package"
+    out = run(["-X", "importtime", "-c", "import %s" % module])
+    rows = []
+    for line in out.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    for cumulative, name in sorted(rows, reverse=True)[:top]:
+        print("    %10d  %s" % (cumulative, name))
+    return rows
+
+
+def check_lazy_imports(command, flag):
+    code = """
+import sys
+import ctmcommands.dispatch
+ctmcommands.dispatch.run_command(["%s", "%s"])
+print("LOADED:" + ",".join(m for m in %r if m in sys.modules))
+""" % (command, flag, lazy_modules)
+    loaded = run(["-c", code]).split("LOADED:")[-1].strip()
+    print("    %s %s loads: %s" % (command, flag, loaded or "none of %s" % ", ".join(lazy_modules)))
+    return not loaded
+
+
+def time_commands(repetitions, dispatcher=False):
+    commands = sorted(f for f in os.listdir(bindir) if f.startswith("ctm-") and f not in ["ctm-list-commands", "ctm-remote"])
+    times = []
+    devnull = open(os.devnull, 'w')
+    for _ in range(repetitions):
+        start = time.time()
+        for c in commands:
+            if dispatcher:
+                args = [os.path.join(bindir, "ctm"), c, "--api"]
+            else:
+                args = [os.path.join(bindir, c), "--api"]
+            subprocess.call([sys.executable] + args, env=env, stdout=devnull, stderr=devnull)
+        times.append(time.time() - start)
+    best = min(times)
+    print("Ran %d commands with --api%s: best of %d %.2fs, %.1fms per command" % (len(commands), " via ctm" if dispatcher else "", repetitions, best, best * 1000 / len(commands)))
+    return best
+
+
+if __name__ == '__main__':
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    import_times("ctmcommands.automate.listtasks")
+    print("Lazy imports:")
+    ok = check_lazy_imports("ctm-list-tasks", "--api") and check_lazy_imports("ctm-list-tasks", "--help")
+    time_commands(repetitions)
+    time_commands(repetitions, dispatcher=True)
+    if not ok:
+        print("FAILED: modules that should be lazily imported were loaded.")
+        sys.exit(1)
+    print("SUCCESS")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+"""
+
+A stub Continuum server for benchmarking the client, it answers /api/<method>
+like the real one, with made up results of a configurable size after a configurable delay.
+
+    export_catalog      a catalog of --items assets, spread over the asset types
+    export_canvas       a canvas of --items items, 10 per component
+    get_user_teams      a single team, "Bench Team"
+    import_catalog, create_canvas_item, create_canvas_items
+                        reads the request and reports what it got
+    anything else       --rows rows
+
+Every asset or item has --item_size bytes of data.  Results are JSON (in the usual
+ErrorCode/ErrorMessage/Response document) or tab delimited text, per the Accept header,
+except that the documents of json_only methods are always JSON.
+
+It can be run by itself, or started in a thread by benchmark.py:
+
+    python test/stub_server.py [--port 8765] [--latency 20] [--items 1000] [--item_size 1024] [--rows 10]
+
+"""
+
+import sys
+import json
+import time
+import getopt
+import threading
+
+try:
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse
+except ImportError:
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse
+
+asset_types = ["projects", "packages", "pipelines", "tasks"]
+
+# results that are a bare JSON document for a text Accept header, as they are from the real server
+json_only = ["export_catalog", "export_canvas", "get_user_teams"]
+
+
+class StubConfig(object):
+
+    def __init__(self, latency=0, items=1000, item_size=1024, rows=10):
+        self.latency = latency
+        self.items = items
+        self.item_size = item_size
+        self.rows = rows
+        self._results = {}
+        self._lock = threading.Lock()
+        # what the server was sent, for the benchmark to check
+        self.requests = 0
+        self.bytes_received = 0
+        self.items_received = 0
+
+    def data(self, n):
+        return ("%08d" % n) * (self.item_size // 8) + "x" * (self.item_size % 8)
+
+    def result(self, method):
+        """The Response of a read-only method, made once and kept."""
+        with self._lock:
+            if method not in self._results:
+                self._results[method] = self.make_result(method)
+            return self._results[method]
+
+    def make_result(self, method):
+        if method == "export_catalog":
+            catalog = dict((t, []) for t in asset_types)
+            for n in range(self.items):
+                asset_type = asset_types[n % len(asset_types)]
+                if asset_type == "tasks":
+                    catalog[asset_type].append({"Name": "bench task %d" % n, "Team": "Bench Team", "Version": "1.000", "Data": self.data(n)})
+                else:
+                    catalog[asset_type].append({"name": "bench %s %d" % (asset_type[:-1], n), "team": "Bench Team", "data": self.data(n)})
+            return catalog
+        if method == "export_canvas":
+            components = {}
+            for n in range(self.items):
+                components.setdefault(n // 10, []).append({"Name": "item%d.txt" % n, "Data": self.data(n)})
+            return [{"Name": "bench", "Components": [{"Name": "comp%d" % c, "Items": items} for c, items in sorted(components.items())]}]
+        if method == "get_user_teams":
+            return {"teams": [{"team_id": "1", "name": "Bench Team"}]}
+        return [{"ID": "%s-%d" % (method, n), "Name": "row %d" % n, "Data": self.data(n)[:64]} for n in range(self.rows)]
+
+    def received(self, nbytes, nitems):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += nbytes
+            self.items_received += nitems
+
+
+def as_text(result):
+    rows = result if isinstance(result, list) else [result]
+    rows = [r for r in rows if isinstance(r, dict)]
+    if not rows:
+        return json.dumps(result)
+    columns = list(rows[0].keys())
+    lines = ["\t".join(columns)] + ["\t".join(str(r.get(c, "")) for c in columns) for r in rows]
+    return "\n".join(lines)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # the headers and body are written separately, without this a delayed ACK adds 40ms to every call
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def handle_any(self):
+        config = self.server.config
+        url = urlparse(self.path)
+        method = url.path.split("/api", 1)[-1].strip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if self.headers.get("Content-Encoding") == "gzip":
+            import zlib
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        elif self.headers.get("Content-Encoding"):
+            self.reply(415, b"")
+            return
+
+        if config.latency:
+            time.sleep(config.latency / 1000.0)
+
+        nitems = 0
+        if method in ["import_catalog", "create_canvas_items"]:
+            doc = json.loads(body.decode("utf-8"))
+            if method == "import_catalog":
+                nitems = sum(len(doc.get(t) or []) for t in asset_types)
+            else:
+                nitems = len(doc.get("items") or [])
+            result = {"imported": nitems}
+        elif method == "create_canvas_item":
+            nitems = 1
+            result = {"imported": 1}
+        else:
+            result = config.result(method)
+        config.received(len(body), nitems)
+
+        accept = self.headers.get("Accept", "")
+        if "json" in accept:
+            out = json.dumps({"ErrorCode": "", "ErrorMessage": "", "Response": result}).encode("utf-8")
+        elif method in json_only:
+            out = json.dumps(result).encode("utf-8")
+        else:
+            out = as_text(result).encode("utf-8")
+        self.reply(200, out)
+
+    def reply(self, status, out):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+    do_GET = handle_any
+    do_POST = handle_any
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 drops connections when hundreds are opened at once
+    request_queue_size = 1024
+
+    def __init__(self, port, config):
+        HTTPServer.__init__(self, ("127.0.0.1", port), StubHandler)
+        self.config = config
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+
+def start(config, port=0):
+    """Starts a stub server in a thread, on a free port unless one is given."""
+    server = StubServer(port, config)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    return server
+
+
+if __name__ == '__main__':
+    opts, _ = getopt.getopt(sys.argv[1:], "", ["port=", "latency=", "items=", "item_size=", "rows="])
+    opts = dict((k[2:], int(v)) for k, v in opts)
+    port = opts.pop("port", 8765)
+    server = StubServer(port, StubConfig(**opts))
+    print("Stub Continuum server on %s, CONTINUUM_URL=%s" % (server.url, server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+
+"""
+TaskInstanceWaiter against a made up server, without a real one:
+
+    python test/test_waittaskinstances.py
+
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ctmcommands.cmd
+from ctmcommands.automate import waittaskinstances
+from ctmcommands.automate.waittaskinstances import TaskInstanceWaiter
+
+
+class FakeCommand(object):
+    """Answers get_task_instance(s) calls from a dict of instance: [statuses...]."""
+
+    def __init__(self, statuses, fail=None):
+        self.statuses = statuses
+        # instance: the exception (or ApiError) every status call for it gets
+        self.fail = fail or {}
+        self.calls = 0
+
+    def call_api_result(self, method, data={}):
+        if method == "get_task_instances":
+            # nothing is active, so every pending instance is checked
+            return []
+        self.calls += 1
+        instance = data["instance"]
+        if instance in self.fail:
+            error = self.fail[instance]
+            if isinstance(error, ctmcommands.cmd.ApiError):
+                return error
+            raise error
+        statuses = self.statuses[instance]
+        return {"task_status": statuses.pop(0) if len(statuses) > 1 else statuses[0]}
+
+
+class WaiterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sleep = waittaskinstances.time.sleep
+        waittaskinstances.time.sleep = lambda seconds: None
+        self.stderr = sys.stderr
+        sys.stderr = open(os.devnull, "w")
+
+    def tearDown(self):
+        waittaskinstances.time.sleep = self.sleep
+        sys.stderr.close()
+        sys.stderr = self.stderr
+
+    def test_completed(self):
+        waiter = TaskInstanceWaiter(FakeCommand({"1": ["Processing", "Completed"]}), ["1"])
+        self.assertEqual(waiter.wait(), {"1": "Completed"})
+        self.assertEqual(waiter.exit_code(), 0)
+
+    def test_unknown_instance(self):
+        cmd = FakeCommand({"1": ["Completed"]}, fail={"404": ctmcommands.cmd.ApiError("Instance not found")})
+        waiter = TaskInstanceWaiter(cmd, ["1", "404"])
+        statuses = waiter.wait()
+        self.assertEqual(statuses, {"1": "Completed", "404": waittaskinstances.unknown_status})
+        self.assertEqual(waiter.exit_code(), 1)
+        self.assertEqual(cmd.calls, 1 + waittaskinstances.max_status_errors)
+
+    def test_connection_error_is_retried(self):
+        cmd = FakeCommand({"1": ["Completed"]}, fail={"1": Exception("API connection error.")})
+        waiter = TaskInstanceWaiter(cmd, ["1"])
+        waiter.poll()
+        self.assertEqual(waiter.pending, ["1"])
+        # the server is back
+        del cmd.fail["1"]
+        waiter.wait()
+        self.assertEqual(waiter.statuses, {"1": "Completed"})
+        self.assertEqual(waiter.exit_code(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()